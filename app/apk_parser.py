@@ -1,5 +1,7 @@
-import re
-from pathlib import Path
+from apk_version import version_key, parse_dependency
+from index_diff import IndexDiff, diff_indexes
+from index_backends import parse_index_stream
+import instrumentation
 from exceptions import PackageNotFoundError, APKParseError
 
 class APKParser:
@@ -7,6 +9,9 @@ class APKParser:
     
     def __init__(self, repository_manager):
         self.repository_manager = repository_manager
+        self._index = None
+        self._providers = None
+        self._provided_versions = None
     
     def get_package_dependencies(self, package_name):
         """
@@ -18,105 +23,255 @@ class APKParser:
         Returns:
             list: Список прямых зависимостей
         """
-        repo_file = self.repository_manager.get_repository_content()
+        # В тестовом режиме НЕ преобразуем имена пакетов - оставляем как есть
+        # Реальный APKINDEX использует нижний регистр
+        record = self.get_index().get(package_name)
+        if record is None:
+            raise PackageNotFoundError(f"Пакет '{package_name}' не найден в репозитории")
         
-        try:
-            with open(repo_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+        dependencies = []
+        for atom in record.depends:
+            constraint = parse_dependency(atom)
+            if constraint is None or constraint.conflict:
+                continue
             
-            # В тестовом режиме НЕ преобразуем имена пакетов - оставляем как есть
-            # Реальный APKINDEX использует нижний регистр
+            provider = self.resolve_dependency(constraint.name)
+            if provider and provider != package_name and provider not in dependencies:
+                dependencies.append(provider)
+        
+        return dependencies
+    
+    def resolve_dependency(self, dependency):
+        """
+        Определение пакета, удовлетворяющего зависимости
+        
+        Виртуальные имена (so:, pc:, cmd: и т.д.) разрешаются через
+        предвычисленный индекс предоставляемых имен за O(1).
+        
+        Args:
+            dependency (str): Имя пакета или виртуальное имя
             
-            # Ищем секцию пакета
-            package_section = self._find_package_section(content, package_name)
-            if not package_section:
-                raise PackageNotFoundError(f"Пакет '{package_name}' не найден в репозитории")
+        Returns:
+            str: Имя пакета или None если виртуальное имя никем не предоставляется
+        """
+        if dependency in self.get_index():
+            return dependency
+        
+        provider = self._providers.get(dependency)
+        if provider is not None:
+            return provider
+        
+        # Отсутствующий обычный пакет сохраняем - об ошибке сообщит построитель графа
+        return None if ':' in dependency else dependency
+    
+    def get_package_constraints(self, package_name):
+        """
+        Получение ограничений пакета (зависимостей и конфликтов) с их поставщиками
+        
+        Args:
+            package_name (str): Имя пакета
             
-            # Извлекаем зависимости
-            dependencies = self._extract_dependencies(package_section)
+        Returns:
+            list: Пары (Constraint, имя пакета-поставщика или None)
+        """
+        record = self.get_index().get(package_name)
+        if record is None:
+            raise PackageNotFoundError(f"Пакет '{package_name}' не найден в репозитории")
+        
+        constraints = []
+        for atom in record.depends:
+            constraint = parse_dependency(atom)
+            if constraint is not None:
+                constraints.append((constraint, self.resolve_dependency(constraint.name)))
+        
+        return constraints
+    
+    def get_constraint_issues(self, package_name):
+        """
+        Ограничения пакета, которые нарушены или могут быть нарушены
+        
+        Зависимости без поставщика в индексе пропускаются: они уже отражены
+        в предупреждениях построителя графа.
+        
+        Args:
+            package_name (str): Имя пакета (пакет вне индекса не имеет ограничений)
             
-            return dependencies
+        Returns:
+            list: Кортежи (Constraint, пакет-поставщик, вид), где вид - 'version'
+                (ограничение версии не выполнено) или 'conflict' (поставщик
+                удовлетворяет конфликту "!": нарушение, если он устанавливается
+                вместе с пакетом)
+        """
+        index = self.get_index()
+        if package_name not in index:
+            return []
+        
+        issues = []
+        for constraint, provider in self.get_package_constraints(package_name):
+            if provider is None or provider not in index:
+                continue
             
-        except (UnicodeDecodeError, IOError) as e:
-            raise APKParseError(f"Ошибка чтения файла репозитория: {e}")
+            if not constraint.conflict:
+                if not self.satisfies(constraint):
+                    issues.append((constraint, provider, 'version'))
+            elif provider != package_name and self.satisfies(constraint):
+                issues.append((constraint, provider, 'conflict'))
+        
+        return issues
     
-    def _find_package_section(self, content, package_name):
+    def get_provided_version(self, name):
         """
-        Поиск секции пакета в содержимом репозитория
+        Версия, в которой имя предоставляется выбранным поставщиком
+        
+        Для настоящего пакета это его версия V:, для виртуального имени -
+        версия из поля p: поставщика (None если имя предоставляется без версии).
         
         Args:
-            content (str): Содержимое файла репозитория
-            package_name (str): Имя пакета
+            name (str): Имя пакета или виртуальное имя
+            
+        Returns:
+            str: Версия или None
+        """
+        record = self.get_index().get(name)
+        if record is not None:
+            return record.version
+        return self._provided_versions.get(name)
+    
+    def satisfies(self, constraint):
+        """
+        Проверка, удовлетворяет ли выбранный поставщик ограничению версии
+        
+        Args:
+            constraint (Constraint): Ограничение зависимости
             
         Returns:
-            str: Секция пакета или None если не найдена
+            bool: True если ограничение выполнено
+        """
+        if constraint.operator is None:
+            return True
+        return constraint.matches(self.get_provided_version(constraint.name))
+    
+    def get_index(self):
+        """
+        Получение индекса пакетов репозитория
+        
+        Индекс репозитория загружается (из кэша или разбором) только при первом
+        обращении, все последующие запросы обслуживаются из памяти.
+        
+        Returns:
+            dict: Индекс в формате {пакет: PackageRecord}
+        """
+        if self._index is None:
+            try:
+                indexes = self.repository_manager.load_indexes(self._parse_stream)
+                index = self._merge_indexes(indexes)
+            except IOError as e:
+                raise APKParseError(f"Ошибка чтения файла репозитория: {e}")
+            
+            with instrumentation.phase('provides_index'):
+                self._providers, self._provided_versions = self._build_provides_index(index)
+            self._index = index
+        
+        return self._index
+    
+    def reload(self):
+        """
+        Повторная загрузка индекса и сравнение его с текущим
+        
+        Актуальность проверяется менеджером репозиториев как обычно (ETag,
+        Last-Modified или mtime), поэтому неизменившийся репозиторий
+        заново не разбирается и дает пустой список различий.
+        
+        Returns:
+            IndexDiff: Различия между прежним и новым индексом
         """
-        # Паттерн для поиска секции пакета в формате APKINDEX
-        # Ищем блок от "P:package_name" до следующего "C:" или конца файла
-        pattern = rf'P:{re.escape(package_name)}\n(.*?)(?=\nC:|\n\n|\Z)'
-        match = re.search(pattern, content, re.DOTALL)
+        previous = APKParser(self.repository_manager)
+        previous._index = self._index
+        previous._providers = self._providers
+        previous._provided_versions = self._provided_versions
         
-        if match:
-            return f"P:{package_name}\n{match.group(1)}"
-        return None
+        self._index = None
+        return self.diff_from(previous)
     
-    def _extract_dependencies(self, package_section):
+    def diff_from(self, previous):
         """
-        Извлечение зависимостей из секции пакета
+        Сравнение индекса с индексом другого парсера (прежней версии)
         
         Args:
-            package_section (str): Секция пакета
+            previous (APKParser): Парсер с прежним индексом
             
         Returns:
-            list: Список зависимостей
+            IndexDiff: Различия между прежним и текущим индексом
         """
-        dependencies = []
+        new_index = self.get_index()
+        if previous._index is None:
+            return IndexDiff(added=new_index)
+        return diff_indexes(previous._index, new_index, previous._providers, self._providers)
+    
+    def _merge_indexes(self, indexes):
+        """
+        Объединение индексов нескольких репозиториев в один
         
-        # Ищем строку с зависимостями (D:)
-        dep_match = re.search(r'D:(.*?)(?=\n[A-Z]:|\n\n|\Z)', package_section, re.DOTALL)
-        if dep_match:
-            deps_line = dep_match.group(1).strip()
-            if deps_line:
-                # Разделяем зависимости по пробелам
-                raw_deps = deps_line.split()
-                for dep in raw_deps:
-                    # Очищаем зависимость от версий и префиксов
-                    clean_dep = self._clean_dependency(dep)
-                    if clean_dep and clean_dep not in dependencies:
-                        dependencies.append(clean_dep)
+        Если пакет присутствует в нескольких репозиториях, используется
+        запись из репозитория с наивысшим приоритетом (указанного раньше).
+        Пакеты следуют в порядке приоритета репозиториев: при равных k:
+        и версии поставщиком виртуального имени становится пакет из
+        репозитория с более высоким приоритетом.
         
-        return dependencies
+        Args:
+            indexes (list): Индексы репозиториев в порядке убывания приоритета
+            
+        Returns:
+            dict: Объединенный индекс в формате {пакет: PackageRecord}
+        """
+        if len(indexes) == 1:
+            return indexes[0]
+        
+        merged = dict(indexes[0])
+        for index in indexes[1:]:
+            merged.update((name, record) for name, record in index.items() if name not in merged)
+        return merged
     
-    def _clean_dependency(self, dependency):
+    def _build_provides_index(self, index):
         """
-        Очистка зависимости от версий и специальных префиксов
+        Построение индекса предоставляемых имен {виртуальное имя: пакет}
+        
+        Для каждого имени из полей p: выбирается один поставщик: с наибольшим
+        приоритетом k:, затем с наибольшей версией, при равенстве - первый в индексе.
         
         Args:
-            dependency (str): Сырая зависимость
+            index (dict): Индекс в формате {пакет: PackageRecord}
             
         Returns:
-            str: Очищенное имя пакета или None если это не пакет
+            tuple: Индексы {виртуальное имя: имя пакета-поставщика}
+                и {виртуальное имя: предоставляемая версия или None}
         """
-        # Игнорируем зависимости с префиксами: so: (библиотеки), p: (предоставляемые пакеты), pc: (pkg-config)
-        if dependency.startswith(('so:', 'p:', 'pc:', 'cmd:')):
-            return None
+        best = {}
         
-        # Убираем версии (все что после =, <, >, ~ и т.д.)
-        clean_dep = re.split(r'[=<>~]', dependency)[0]
+        for record in index.values():
+            for entry in record.provides:
+                name, _, version = entry.partition('=')
+                rank = (record.provider_priority, version_key(version or record.version))
+                
+                current = best.get(name)
+                if current is None or rank > current[0]:
+                    best[name] = (rank, record.name, version or None)
         
-        return clean_dep
+        providers = {name: provider for name, (_, provider, _) in best.items()}
+        versions = {name: version for name, (_, _, version) in best.items()}
+        return providers, versions
     
-    def print_dependencies(self, package_name, dependencies):
+    @instrumentation.timed('parse')
+    def _parse_stream(self, stream):
         """
-        Вывод зависимостей в консоль
+        Разбор бинарного потока индекса в индекс пакетов
+        
+        Формат (APKINDEX или JSON) определяется по содержимому потока.
         
         Args:
-            package_name (str): Имя пакета
-            dependencies (list): Список зависимостей
-        """
-        print(f"\nПрямые зависимости пакета '{package_name}':")
-        if dependencies:
-            for i, dep in enumerate(dependencies, 1):
-                print(f"  {i}. {dep}")
-        else:
-            print("  Пакет не имеет зависимостей")
\ No newline at end of file
+            stream: Бинарный файловый объект с индексом репозитория
+            
+        Returns:
+            dict: Индекс в формате {пакет: PackageRecord}
+        """
+        return parse_index_stream(stream)
@@ -0,0 +1,154 @@
+import re
+from functools import lru_cache
+
+# Порядок суффиксов версий apk: _alpha < _beta < _pre < _rc < (без суффикса) < _cvs < _svn < _git < _hg < _p
+SUFFIX_ORDER = {
+    'alpha': 0,
+    'beta': 1,
+    'pre': 2,
+    'rc': 3,
+    'cvs': 5,
+    'svn': 6,
+    'git': 7,
+    'hg': 8,
+    'p': 9
+}
+NO_SUFFIX = ((4, 0),)
+
+VERSION_PATTERN = re.compile(
+    r'^(\d+(?:\.\d+)*)([a-z]?)((?:_(?:alpha|beta|pre|rc|cvs|svn|git|hg|p)\d*)*)(?:-r(\d+))?$'
+)
+SUFFIX_PATTERN = re.compile(r'_([a-z]+)(\d*)')
+
+# Атом зависимости: [!]имя[оператор версия], например "!foo", "so:libc.so.1", "bar>=1.2-r0"
+ATOM_PATTERN = re.compile(r'^(!?)(?:p:)?([^=<>~]+)(?:([<>=~]{1,2})(.*))?$')
+
+# Операторы ограничений apk: какие результаты сравнения версий (-1, 0, 1) допустимы
+OPERATORS = {
+    '=': (0,),
+    '<': (-1,),
+    '>': (1,),
+    '<=': (-1, 0),
+    '>=': (0, 1),
+    '><': (-1, 0, 1),
+}
+FUZZY_OPERATORS = {
+    '~': (),
+    '=~': (),
+    '<~': (-1,),
+    '>~': (1,),
+}
+
+@lru_cache(maxsize=None)
+def version_key(version):
+    """
+    Построение ключа сравнения версии в формате apk
+    
+    Версия вида "1.2.3b_rc1-r2" разбирается на числовые компоненты, букву,
+    суффиксы и номер ревизии. Некорректные версии считаются меньше любых
+    корректных. Ключ каждой строки версии вычисляется один раз.
+    
+    Args:
+        version (str): Строка версии
+    
+    Returns:
+        tuple: Ключ, пригодный для сравнения операторами < и >
+    """
+    match = VERSION_PATTERN.match(version or '')
+    if not match:
+        return ((), '', (), 0)
+    
+    numbers, letter, suffixes, revision = match.groups()
+    
+    suffix_key = tuple(
+        (SUFFIX_ORDER[name], int(number or 0))
+        for name, number in SUFFIX_PATTERN.findall(suffixes)
+    ) or NO_SUFFIX
+    
+    return (
+        tuple(int(part) for part in numbers.split('.')),
+        letter,
+        suffix_key,
+        int(revision or 0)
+    )
+
+def compare_versions(left, right):
+    """
+    Сравнение двух версий apk
+    
+    Returns:
+        int: -1 если left < right, 0 если равны, 1 если left > right
+    """
+    left_key = version_key(left)
+    right_key = version_key(right)
+    return (left_key > right_key) - (left_key < right_key)
+
+class Constraint:
+    """Ограничение на пакет из поля D: (зависимость или конфликт)"""
+    
+    __slots__ = ('name', 'operator', 'version', 'conflict')
+    
+    def __init__(self, name, operator=None, version=None, conflict=False):
+        self.name = name
+        self.operator = operator
+        self.version = version
+        self.conflict = conflict
+    
+    def matches(self, version):
+        """
+        Проверка версии на соответствие ограничению
+        
+        Args:
+            version (str): Версия пакета или None если версия неизвестна
+            
+        Returns:
+            bool: True если версия удовлетворяет ограничению
+        """
+        if self.operator is None:
+            return True
+        if version is None:
+            return False
+        
+        if self.operator in FUZZY_OPERATORS:
+            if _fuzzy_match(version, self.version):
+                return True
+            return compare_versions(version, self.version) in FUZZY_OPERATORS[self.operator]
+        
+        return compare_versions(version, self.version) in OPERATORS[self.operator]
+    
+    def __str__(self):
+        atom = '!' + self.name if self.conflict else self.name
+        return atom + self.operator + self.version if self.operator else atom
+    
+    def __repr__(self):
+        return f"Constraint({str(self)!r})"
+
+@lru_cache(maxsize=None)
+def parse_dependency(atom):
+    """
+    Разбор атома зависимости из поля D: в структурированное ограничение
+    
+    Каждая строка атома разбирается один раз, повторные вызовы возвращают
+    тот же объект.
+    
+    Args:
+        atom (str): Атом зависимости, например "!foo" или "bar>=1.2-r0"
+        
+    Returns:
+        Constraint: Ограничение или None если атом некорректен
+    """
+    match = ATOM_PATTERN.match(atom)
+    if not match:
+        return None
+    
+    conflict, name, operator, version = match.groups()
+    if operator is not None and operator not in OPERATORS and operator not in FUZZY_OPERATORS:
+        return None
+    
+    return Constraint(name, operator, version if operator else None, bool(conflict))
+
+def _fuzzy_match(version, prefix):
+    """Нечеткое совпадение (~): версия начинается с заданной на границе компонента"""
+    if not version.startswith(prefix):
+        return False
+    return len(version) == len(prefix) or not version[len(prefix)].isdigit()
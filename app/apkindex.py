@@ -0,0 +1,96 @@
+# Поля секции, которые нужны для построения графа зависимостей:
+# P - имя пакета, V - версия, D - зависимости, p - предоставляемые имена,
+# k - приоритет поставщика виртуальных имен, C - контрольная сумма пакета,
+# S - размер файла пакета, I - размер после установки
+DEFAULT_FIELDS = frozenset('PVDpkCSI')
+
+_COLON = ord(':')
+_C_FIELD = ord('C')
+
+class PackageRecord:
+    """
+    Запись о пакете из индекса репозитория
+    
+    Поле depends хранит атомы D: без изменений (с операторами версий
+    и конфликтами "!"), provides - элементы поля p:, checksum - значение
+    поля C:, по которому сравниваются версии индекса, size и installed_size -
+    размеры из полей S: и I: в байтах (0, если не указаны).
+    """
+    
+    __slots__ = ('name', 'version', 'depends', 'provides', 'provider_priority', 'checksum', 'size', 'installed_size')
+    
+    def __init__(self, name, version=None, depends=(), provides=(), provider_priority=0, checksum=None,
+                 size=0, installed_size=0):
+        self.name = name
+        self.version = version
+        self.depends = depends
+        self.provides = provides
+        self.provider_priority = provider_priority
+        self.checksum = checksum
+        self.size = size
+        self.installed_size = installed_size
+    
+    def __reduce__(self):
+        # Компактная сериализация для кэша: вызов конструктора вместо восстановления __slots__
+        return (PackageRecord, (
+            self.name, self.version, self.depends, self.provides, self.provider_priority, self.checksum,
+            self.size, self.installed_size
+        ))
+    
+    def same_as(self, other):
+        """
+        Проверка, что запись описывает ту же сборку пакета
+        
+        При наличии контрольных сумм C: сравниваются они, иначе -
+        все поля, влияющие на граф зависимостей.
+        """
+        if self.checksum and other.checksum:
+            return self.checksum == other.checksum
+        return (
+            self.version == other.version
+            and self.depends == other.depends
+            and self.provides == other.provides
+            and self.provider_priority == other.provider_priority
+        )
+    
+    def __repr__(self):
+        return f"PackageRecord({self.name!r}, {self.version!r})"
+
+def iter_stanzas(stream, fields=DEFAULT_FIELDS):
+    """
+    Потоковое чтение секций APKINDEX из бинарного файла
+    
+    Секции разделяются пустыми строками или строкой "C:" следующей секции.
+    В памяти одновременно хранится только одна секция, а декодируются
+    только запрошенные поля - остальные (T:, U:, m: и т.д.) пропускаются
+    без преобразования в строку.
+    
+    Args:
+        stream: Бинарный файловый объект с содержимым индекса
+        fields (iterable): Однобуквенные имена полей, которые нужно декодировать
+    
+    Yields:
+        dict: Поля секции в формате {поле: значение}
+    """
+    wanted = frozenset(ord(field) for field in fields)
+    stanza = {}
+    
+    for line in stream:
+        if len(line) < 2 or line[1] != _COLON:
+            # Пустая строка (или мусор) - конец секции
+            if stanza:
+                yield stanza
+                stanza = {}
+            continue
+        
+        key = line[0]
+        if key == _C_FIELD and stanza:
+            # "C:" открывает следующую секцию
+            yield stanza
+            stanza = {}
+        
+        if key in wanted and chr(key) not in stanza:
+            stanza[chr(key)] = line[2:].rstrip(b'\r\n').decode('utf-8', 'replace')
+    
+    if stanza:
+        yield stanza
@@ -0,0 +1,180 @@
+import json
+import sys
+from exceptions import ValidationError
+from footprint import totals_record
+
+def read_package_list(packages=None, packages_file=None):
+    """
+    Получение списка пакетов для пакетного анализа
+    
+    Args:
+        packages (list): Пакеты, переданные в командной строке
+        packages_file (str): Файл со списком пакетов ('-' - стандартный ввод)
+    
+    Returns:
+        list: Имена пакетов без повторов в порядке первого упоминания
+    """
+    names = list(packages or [])
+    
+    if packages_file:
+        try:
+            if packages_file == '-':
+                content = sys.stdin.read()
+            else:
+                with open(packages_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+        except OSError as e:
+            raise ValidationError(f"Не удалось прочитать список пакетов: {e}")
+        
+        for line in content.splitlines():
+            # Допускаются комментарии и несколько пакетов в строке
+            line = line.split('#', 1)[0]
+            names.extend(line.split())
+    
+    return list(dict.fromkeys(names))
+
+def run_batch(graph_builder, packages, out=None):
+    """
+    Пакетный анализ списка пакетов по общему графу всего репозитория
+    
+    Для каждого пакета выводится одна строка NDJSON с прямыми,
+    транзитивными и обратными зависимостями. Пакеты в списках идут
+    в порядке индекса репозитория.
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф репозитория
+        packages (list): Имена анализируемых пакетов
+        out: Поток вывода (по умолчанию стандартный вывод)
+    
+    Returns:
+        int: Количество пакетов, не найденных в репозитории
+    """
+    out = out or sys.stdout
+    missing = 0
+    
+    for package in packages:
+        if package not in graph_builder.graph:
+            missing += 1
+            record = {'package': package, 'found': False}
+        else:
+            record = {
+                'package': package,
+                'found': True,
+                'dependencies': graph_builder.graph[package],
+                'transitive_dependencies': graph_builder.get_closure(package),
+                'reverse_dependencies': graph_builder.get_reverse_dependencies(package),
+                'transitive_reverse_dependencies': graph_builder.get_closure(package, reverse=True)
+            }
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+    
+    out.flush()
+    return missing
+
+def run_closure_ranking(graph_builder, limit, out=None):
+    """
+    Вывод пакетов репозитория с наибольшими транзитивными замыканиями в формате NDJSON
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф репозитория
+        limit (int): Количество выводимых пакетов
+        out: Поток вывода (по умолчанию стандартный вывод)
+    """
+    out = out or sys.stdout
+    reverse_closures = graph_builder.get_closure_index(reverse=True)
+    ids = graph_builder.compact.ids
+    
+    for package, closure_size in graph_builder.get_closure_sizes()[:limit]:
+        record = {
+            'package': package,
+            'closure_size': closure_size,
+            'reverse_closure_size': reverse_closures.closure_size(ids[package])
+        }
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+    
+    out.flush()
+
+def run_changed_closures(graph_builder, diff, changed, out=None):
+    """
+    Вывод изменений индекса и пакетов с изменившимся замыканием в формате NDJSON
+    
+    Каждая строка содержит пакет и вид изменения: added, removed, changed
+    (изменилась запись пакета) или closure (изменилось только транзитивное
+    замыкание).
+    
+    Args:
+        graph_builder (DependencyGraph): Обновленный граф репозитория
+        diff (IndexDiff): Различия между прежним и текущим индексом
+        changed (list): Пакеты с изменившимся замыканием
+        out: Поток вывода (по умолчанию стандартный вывод)
+    """
+    out = out or sys.stdout
+    reported = set()
+    
+    for change, packages in (('added', diff.added), ('removed', diff.removed), ('changed', diff.changed), ('closure', changed)):
+        for package in packages:
+            if package in reported:
+                continue
+            reported.add(package)
+            record = {'package': package, 'change': change}
+            if change != 'removed':
+                record['closure_size'] = len(graph_builder.get_closure(package))
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+    
+    out.flush()
+
+def run_footprint(graph_builder, packages, installed=None, out=None):
+    """
+    Вывод размеров пакетов и их наборов установки в формате NDJSON
+    
+    Для каждого пакета выводятся его размеры (S: и I:), суммарные размеры
+    набора установки (install_set - пакет и его транзитивное замыкание)
+    и, если задан список установленных пакетов, размеры только тех пакетов
+    набора, которые еще не установлены (marginal).
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф репозитория
+        packages (list): Имена анализируемых пакетов
+        installed (list): Уже установленные пакеты (например, базовый образ)
+        out: Поток вывода (по умолчанию стандартный вывод)
+    
+    Returns:
+        int: Количество пакетов, не найденных в репозитории
+    """
+    out = out or sys.stdout
+    footprint = graph_builder.get_footprint_index()
+    ids = graph_builder.compact.ids
+    missing = 0
+    
+    installed_bits = None
+    if installed is not None:
+        unknown = [package for package in installed if package not in ids]
+        if unknown:
+            print(f"Предупреждение: установленные пакеты не найдены в репозитории: {', '.join(unknown)}", file=sys.stderr)
+        installed_bits = footprint.union_bits(ids[package] for package in installed if package in ids)
+        count, size, installed_size = footprint.totals(installed_bits)
+        print(f"Установленный набор: пакетов {count}, размер {size} байт, "
+              f"после установки {installed_size} байт", file=sys.stderr)
+    
+    for package in packages:
+        node_id = ids.get(package)
+        if node_id is None:
+            missing += 1
+            record = {'package': package, 'found': False}
+        else:
+            record = {
+                'package': package,
+                'found': True,
+                'size': footprint.sizes[node_id],
+                'installed_size': footprint.installed_sizes[node_id],
+                'install_set': totals_record(footprint.install_totals(node_id))
+            }
+            if installed_bits is not None:
+                record['marginal'] = totals_record(footprint.marginal_totals(node_id, installed_bits))
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+    
+    out.flush()
+    return missing
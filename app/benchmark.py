@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Добавляем текущую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from repository import RepositoryManager
+from apk_parser import APKParser
+from dependency_graph import DependencyGraph
+from contextlib import redirect_stdout
+from output import create_writer
+from synthetic_repo import generate_apkindex, pack_apkindex
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+
+# Размеры синтетических репозиториев по умолчанию
+DEFAULT_SIZES = (1000, 10000, 50000)
+
+# Этапы короче этого времени не сравниваются: их отношение определяется шумом
+MIN_COMPARE_SECONDS = 0.001
+
+# Допустимая медиана времени запуска запроса по кэшу (мс)
+DEFAULT_STARTUP_TARGET_MS = 50
+
+# Количество запусков для медианы времени запуска
+DEFAULT_STARTUP_RUNS = 10
+
+# Запрашиваемый пакет: пакет нижнего слоя синтетического репозитория без зависимостей
+STARTUP_PACKAGE = 'pkg0'
+
+# Модули стандартной библиотеки, без которых запрос по снимку невозможен
+# (разбор аргументов, записи кэша, вывод): время их импорта - нижняя граница запуска
+STARTUP_STDLIB_MODULES = ('argparse', 'json', 'pickle')
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+def phase_parse(state):
+    """Разбор текстового APKINDEX"""
+    state['parser'] = APKParser(RepositoryManager(state['index_path'], test_repo_mode=True))
+    state['parser'].get_index()
+
+def phase_parse_archive(state):
+    """Разбор того же индекса в архиве APKINDEX.tar.gz"""
+    APKParser(RepositoryManager(state['archive_path'], test_repo_mode=True)).get_index()
+
+def phase_graph_build(state):
+    """Построение графа всего репозитория"""
+    state['graph'] = DependencyGraph(state['parser'])
+    with redirect_stdout(state['devnull']):
+        state['graph'].build_repository_graph()
+
+def phase_cycles(state):
+    """Компоненты сильной связности и циклы"""
+    state['graph'].get_cycles()
+
+def phase_closure(state):
+    """Транзитивные замыкания выборки пакетов"""
+    graph = state['graph']
+    sizes = {package: len(graph.get_closure(package)) for package in state['sample']}
+    # Для вывода дерева берется пакет выборки с наибольшим замыканием
+    state['tree_package'] = max(sizes, key=sizes.get)
+
+def phase_reverse_closure(state):
+    """Обратные транзитивные замыкания выборки пакетов"""
+    graph = state['graph']
+    sizes = {package: len(graph.get_closure(package, reverse=True)) for package in state['sample']}
+    state['output_package'] = max(sizes, key=sizes.get)
+
+def phase_constraints(state):
+    """Проверка ограничений версий и конфликтов на всех дугах"""
+    state['graph'].get_constraint_problems()
+
+def phase_tree(state):
+    """Вывод ASCII-дерева пакета с наибольшим замыканием"""
+    state['graph'].print_dependency_tree(state['tree_package'], out=state['devnull'])
+
+def phase_output_text(state):
+    """Текстовый вывод обратных зависимостей"""
+    with redirect_stdout(state['devnull']):
+        state['graph'].print_reverse_dependencies(state['output_package'])
+
+def write_structured(state, output_format):
+    """Вывод обратных зависимостей в машиночитаемом формате"""
+    graph = state['graph']
+    package = state['output_package']
+    writer = create_writer(output_format, state['devnull'])
+    writer.begin(package)
+    writer.write_names('reverse_dependency', package, graph.get_reverse_dependencies(package))
+    writer.write_names('transitive_reverse_dependency', package, graph.get_closure(package, reverse=True))
+    writer.end()
+
+# Этапы замера в порядке выполнения: каждый этап использует результаты предыдущих
+PHASES = (
+    ('parse', phase_parse),
+    ('parse_archive', phase_parse_archive),
+    ('graph_build', phase_graph_build),
+    ('cycles', phase_cycles),
+    ('closure', phase_closure),
+    ('reverse_closure', phase_reverse_closure),
+    ('constraints', phase_constraints),
+    ('tree', phase_tree),
+    ('output_text', phase_output_text),
+    ('output_json', lambda state: write_structured(state, 'json')),
+    ('output_ndjson', lambda state: write_structured(state, 'ndjson')),
+    ('output_csv', lambda state: write_structured(state, 'csv')),
+)
+
+def run_phases(state, trace_memory):
+    """
+    Последовательное выполнение всех этапов на новом состоянии
+    
+    Args:
+        state (dict): Пути к индексу, выборка пакетов и поток для вывода
+        trace_memory (bool): Замерять пиковую память вместо времени
+    
+    Returns:
+        dict: {этап: время в секундах или пиковая память в байтах}
+    """
+    state = dict(state)
+    measurements = {}
+    
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for name, phase in PHASES:
+            if trace_memory:
+                tracemalloc.reset_peak()
+                start_size, _ = tracemalloc.get_traced_memory()
+                phase(state)
+                _, peak = tracemalloc.get_traced_memory()
+                # Прирост над памятью, занятой к началу этапа
+                measurements[name] = peak - start_size
+            else:
+                start = time.perf_counter()
+                phase(state)
+                measurements[name] = time.perf_counter() - start
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    
+    measurements['_packages'] = len(state['graph'].compact)
+    measurements['_edges'] = state['graph'].compact.edge_count
+    return measurements
+
+def bench_size(package_count, params):
+    """
+    Замер всех этапов на синтетическом репозитории заданного размера
+    
+    Время и память замеряются в отдельных проходах, так как tracemalloc
+    заметно замедляет выполнение. Каждый проход начинается с разбора
+    индекса, поэтому запомненные замыкания не переходят между проходами.
+    
+    Args:
+        package_count (int): Количество пакетов
+        params (dict): Параметры генератора и размер выборки
+    
+    Returns:
+        dict: Результат для одного размера репозитория
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, 'w', encoding='utf-8') as devnull:
+        index_path = os.path.join(tmp_dir, 'APKINDEX')
+        archive_path = os.path.join(tmp_dir, 'APKINDEX.tar.gz')
+        
+        generate_apkindex(
+            index_path, package_count,
+            fan_out=params['fan_out'],
+            depth=params['depth'],
+            cycle_density=params['cycle_density'],
+            provider_mix=params['provider_mix'],
+            seed=params['seed']
+        )
+        pack_apkindex(index_path, archive_path)
+        
+        rng = random.Random(params['seed'])
+        sample_size = min(params['sample'], package_count)
+        state = {
+            'index_path': index_path,
+            'archive_path': archive_path,
+            'devnull': devnull,
+            'sample': [f"pkg{i}" for i in rng.sample(range(package_count), sample_size)],
+        }
+        
+        timings = run_phases(state, trace_memory=False)
+        peaks = run_phases(state, trace_memory=True)
+    
+    return {
+        'packages': timings.pop('_packages'),
+        'edges': timings.pop('_edges'),
+        'phases': {
+            name: {'seconds': round(timings[name], 6), 'peak_bytes': peaks[name]}
+            for name, _ in PHASES
+        },
+    }
+
+def print_result(result):
+    """Вывод результатов замера одного размера"""
+    print(f"\nРепозиторий: {result['packages']} пакетов, {result['edges']} дуг")
+    for name, phase in result['phases'].items():
+        print(f"  {name:<16} {phase['seconds']:9.3f} с  {phase['peak_bytes'] / 1e6:9.1f} МБ")
+
+def compare_results(baseline, current, threshold):
+    """
+    Сравнение результатов с сохраненными ранее
+    
+    Сравниваются этапы на репозиториях одинакового размера.
+    
+    Args:
+        baseline (dict): Результаты предыдущего запуска
+        current (dict): Результаты текущего запуска
+        threshold (float): Допустимое отношение времени (например, 1.2 - замедление на 20%)
+    
+    Returns:
+        list: Регрессии в виде (размер, этап, отношение времени)
+    """
+    previous = {result['packages']: result for result in baseline['results']}
+    regressions = []
+    
+    for result in current['results']:
+        old = previous.get(result['packages'])
+        if old is None:
+            continue
+        
+        print(f"\nСравнение: {result['packages']} пакетов")
+        for name, phase in result['phases'].items():
+            old_phase = old['phases'].get(name)
+            if old_phase is None or old_phase['seconds'] < MIN_COMPARE_SECONDS:
+                continue
+            
+            ratio = phase['seconds'] / old_phase['seconds']
+            memory_ratio = phase['peak_bytes'] / old_phase['peak_bytes'] if old_phase['peak_bytes'] else 1.0
+            mark = ''
+            if ratio > threshold:
+                mark = '  РЕГРЕССИЯ'
+                regressions.append((result['packages'], name, ratio))
+            print(f"  {name:<16} {old_phase['seconds']:9.3f} -> {phase['seconds']:9.3f} с  "
+                  f"x{ratio:5.2f}  память x{memory_ratio:5.2f}{mark}")
+    
+    return regressions
+
+def startup_environment(pycache_dir):
+    """
+    Окружение запусков замера времени запуска
+    
+    Байт-код модулей сохраняется в отдельный каталог (PYTHONPYCACHEPREFIX):
+    при PYTHONDONTWRITEBYTECODE каждый запуск заново компилировал бы
+    измененные модули, а запись в каталог приложения изменяла бы рабочее дерево.
+    
+    Args:
+        pycache_dir (str): Каталог байт-кода
+    
+    Returns:
+        dict: Переменные окружения
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPYCACHEPREFIX'] = pycache_dir
+    return env
+
+def startup_commands(index_path, cache_dir, output_path):
+    """
+    Запросы пакета по кэшу: машиночитаемый вывод и текстовый с сохранением графа в DOT
+    
+    Запросы выполняются с --snapshot: первый запуск сохраняет снимок,
+    следующие отвечают по нему и снимок не перестраивают.
+    
+    Returns:
+        dict: Команды {вид запроса: аргументы}
+    """
+    command = [
+        sys.executable, MAIN_PATH, '-p', STARTUP_PACKAGE, '-r', index_path, '-t',
+        '--cache-dir', cache_dir, '--snapshot'
+    ]
+    return {
+        'json': command + ['--format', 'json'],
+        'text': command + ['-o', output_path],
+    }
+
+def stdlib_command():
+    """Пустой запуск с импортом только необходимых модулей стандартной библиотеки"""
+    return [sys.executable, '-c', f"import {', '.join(STARTUP_STDLIB_MODULES)}"]
+
+def run_times(command, runs, env=None):
+    """Время выполнения команды в секундах для каждого из runs запусков"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, env=env)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def import_times(command, env=None):
+    """
+    Импорты команды по -X importtime
+    
+    Returns:
+        list: Все импортированные модули в виде (время с вложенными импортами
+            в секундах, модуль, импортирован ли модуль на верхнем уровне)
+    """
+    process = subprocess.run(
+        [command[0], '-X', 'importtime', *command[1:]],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True, env=env
+    )
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # Вложенные импорты выводятся с дополнительным отступом
+        modules.append((int(cumulative) / 1e6, name.strip(), not name.startswith('  ')))
+    return modules
+
+def bench_startup(package_count, params, runs):
+    """
+    Замер времени запуска запросов пакета по кэшу (снимку графа репозитория)
+    
+    Первый запуск разбирает индекс и сохраняет снимок, следующие отвечают
+    по снимку. Запрашивается пакет нижнего слоя без зависимостей, поэтому
+    время определяется запуском, а не размером ответа. Для сравнения
+    замеряется запуск пустого интерпретатора и интерпретатора с импортом
+    необходимых модулей стандартной библиотеки, а отдельные запуски
+    с -X importtime показывают самые дорогие импорты приложения.
+    
+    Args:
+        package_count (int): Количество пакетов синтетического репозитория
+        params (dict): Параметры генератора
+        runs (int): Количество запусков для медианы
+    
+    Returns:
+        dict: Время запуска пустого интерпретатора и запросов каждого вида
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = os.path.join(tmp_dir, 'APKINDEX')
+        generate_apkindex(
+            index_path, package_count,
+            fan_out=params['fan_out'],
+            depth=params['depth'],
+            cycle_density=params['cycle_density'],
+            provider_mix=params['provider_mix'],
+            seed=params['seed']
+        )
+        
+        env = startup_environment(os.path.join(tmp_dir, 'pycache'))
+        commands = startup_commands(index_path, os.path.join(tmp_dir, 'cache'), os.path.join(tmp_dir, 'graph.dot'))
+        interpreter = [sys.executable, '-c', 'pass']
+        interpreter_modules = {name for _, name, _ in import_times(interpreter, env)}
+        
+        queries = {}
+        for kind, command in commands.items():
+            # Первый запуск заполняет кэш индекса, снимка и байт-кода
+            run_times(command, 1, env)
+            timings = run_times(command, runs, env)
+            imports = [
+                (seconds, name) for seconds, name, top_level in import_times(command, env)
+                if top_level and name not in interpreter_modules
+            ]
+            queries[kind] = {
+                'median_seconds': statistics.median(timings),
+                'min_seconds': min(timings),
+                'import_seconds': sum(seconds for seconds, _ in imports),
+                'slowest_imports': sorted(imports, reverse=True)[:5],
+            }
+        
+        interpreter_seconds = statistics.median(run_times(interpreter, runs, env))
+        stdlib_seconds = statistics.median(run_times(stdlib_command(), runs, env))
+    
+    return {
+        'packages': package_count,
+        'interpreter_seconds': interpreter_seconds,
+        'stdlib_seconds': stdlib_seconds,
+        'queries': queries
+    }
+
+def run_startup(sizes, params, runs, target_ms):
+    """
+    Замер времени запуска на репозиториях заданных размеров
+    
+    Returns:
+        int: Количество запросов, медиана времени запуска которых превышает target_ms
+    """
+    failures = 0
+    for package_count in sizes:
+        result = bench_startup(package_count, params, runs)
+        print(f"\nЗапуск запроса по кэшу: {package_count} пакетов "
+              f"(пустой интерпретатор {result['interpreter_seconds'] * 1000:.1f} мс, "
+              f"импорт {', '.join(STARTUP_STDLIB_MODULES)} {result['stdlib_seconds'] * 1000:.1f} мс, "
+              f"порог {target_ms:g} мс)")
+        
+        for kind, query in result['queries'].items():
+            mark = ''
+            if query['median_seconds'] * 1000 > target_ms:
+                mark = '  ПРЕВЫШЕНИЕ'
+                failures += 1
+            print(f"  {kind:<6} медиана {query['median_seconds'] * 1000:8.1f} мс  "
+                  f"минимум {query['min_seconds'] * 1000:8.1f} мс  "
+                  f"импорты {query['import_seconds'] * 1000:8.1f} мс{mark}")
+            for seconds, name in query['slowest_imports']:
+                print(f"    {name:<24} {seconds * 1000:8.1f} мс")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности на синтетических репозиториях')
+    parser.add_argument(
+        '--sizes',
+        type=lambda value: [int(size) for size in value.split(',')],
+        default=list(DEFAULT_SIZES),
+        help='Размеры репозиториев через запятую (по умолчанию 1000,10000,50000)'
+    )
+    parser.add_argument('--fan-out', type=int, default=4, help='Среднее количество зависимостей у пакета')
+    parser.add_argument('--depth', type=int, default=8, help='Количество слоев графа')
+    parser.add_argument('--cycle-density', type=float, default=0.01, help='Доля пакетов с обратной дугой')
+    parser.add_argument('--provider-mix', type=float, default=0.3, help='Доля зависимостей через виртуальные имена')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--sample', type=int, default=1000, help='Количество пакетов для замера замыканий')
+    parser.add_argument('--output', '-o', help='Файл для сохранения результатов в формате JSON')
+    parser.add_argument('--compare', help='Файл результатов предыдущего запуска для сравнения')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.2,
+        help='Допустимое отношение времени этапа к предыдущему запуску (по умолчанию 1.2)'
+    )
+    parser.add_argument(
+        '--startup',
+        action='store_true',
+        help='Замерить время запуска запроса пакета по кэшу вместо этапов обработки'
+    )
+    parser.add_argument(
+        '--startup-runs',
+        type=int,
+        default=DEFAULT_STARTUP_RUNS,
+        help='Количество запусков для медианы времени запуска'
+    )
+    parser.add_argument(
+        '--startup-target',
+        type=float,
+        default=DEFAULT_STARTUP_TARGET_MS,
+        help='Допустимая медиана времени запуска запроса в мс (по умолчанию 50)'
+    )
+    args = parser.parse_args()
+    
+    params = {
+        'fan_out': args.fan_out,
+        'depth': args.depth,
+        'cycle_density': args.cycle_density,
+        'provider_mix': args.provider_mix,
+        'seed': args.seed,
+        'sample': args.sample,
+    }
+    if args.startup:
+        failures = run_startup(args.sizes, params, args.startup_runs, args.startup_target)
+        if failures:
+            print(f"\nПревышений времени запуска: {failures}")
+            sys.exit(1)
+        return
+    
+    report = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'params': params,
+        'results': [],
+    }
+    
+    for package_count in args.sizes:
+        result = bench_size(package_count, params)
+        report['results'].append(result)
+        print_result(result)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены: {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.threshold)
+        if regressions:
+            print(f"\nОбнаружено регрессий: {len(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
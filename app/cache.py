@@ -0,0 +1,157 @@
+import gc
+import json
+import os
+import pickle
+import sys
+import time
+import zlib
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 32
+# Версия формата записей: увеличивается при изменении структуры PackageRecord
+CACHE_FORMAT_VERSION = 6
+
+def default_cache_dir():
+    """Каталог кэша по умолчанию (с учетом XDG_CACHE_HOME)"""
+    base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'configmanagement2')
+
+class IndexCache:
+    """Постоянный кэш разобранных индексов репозиториев на диске"""
+    
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_size = max_size
+        self.max_entries = max_entries
+    
+    def get_meta(self, key):
+        """
+        Получение метаданных записи кэша
+        
+        Метаданные хранятся отдельно от индекса, поэтому проверка
+        актуальности не требует загрузки самого индекса.
+        
+        Args:
+            key (str): Ключ записи (URL или путь к репозиторию)
+        
+        Returns:
+            dict: Метаданные записи или None если записи нет
+        """
+        try:
+            with open(self._meta_path(key), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if meta.get('key') != key or meta.get('format') != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+    
+    def load(self, key):
+        """
+        Загрузка индекса из кэша
+        
+        Args:
+            key (str): Ключ записи
+        
+        Returns:
+            Индекс репозитория или None если запись отсутствует или повреждена
+        """
+        # Сборщик мусора отключается на время загрузки: десятки тысяч
+        # создаваемых объектов иначе многократно запускают его впустую
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self._data_path(key), 'rb') as f:
+                index = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        
+        self._touch(key)
+        return index
+    
+    def store(self, key, validators, index):
+        """
+        Сохранение индекса в кэш
+        
+        Args:
+            key (str): Ключ записи
+            validators (dict): Данные для проверки актуальности (ETag, Last-Modified, mtime, размер)
+            index: Разобранный индекс репозитория
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            
+            data_path = self._data_path(key)
+            self._write_atomic(data_path, pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+            
+            meta = dict(validators)
+            meta['key'] = key
+            meta['format'] = CACHE_FORMAT_VERSION
+            meta['size'] = os.path.getsize(data_path)
+            meta['last_used'] = time.time()
+            self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+            
+            self._evict()
+        except OSError as e:
+            # stdout занят результатами машиночитаемых форматов и пакетного режима
+            print(f"Предупреждение: не удалось сохранить индекс в кэш: {e}", file=sys.stderr)
+    
+    def _touch(self, key):
+        """Обновление времени последнего использования записи (для LRU-вытеснения)"""
+        meta = self.get_meta(key)
+        if meta is None:
+            return
+        
+        meta['last_used'] = time.time()
+        try:
+            self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+        except OSError:
+            pass
+    
+    def _evict(self):
+        """Вытеснение давно не использованных записей при превышении лимитов"""
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, file_name), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append((meta.get('last_used', 0), meta.get('size', 0), file_name[:-len('.json')]))
+        
+        entries.sort(reverse=True)
+        total_size = 0
+        for position, (_, size, digest) in enumerate(entries):
+            total_size += size
+            if position >= self.max_entries or total_size > self.max_size:
+                for suffix in ('.json', '.pickle'):
+                    try:
+                        os.unlink(os.path.join(self.cache_dir, digest + suffix))
+                    except OSError:
+                        pass
+    
+    def _write_atomic(self, path, data):
+        """Атомарная запись файла через временный файл и переименование"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    
+    def _digest(self, key):
+        # Имя файла записи - две 32-битные контрольные суммы ключа: hashlib загружает
+        # OpenSSL, что заметно во времени запуска запроса по снимку. Совпадение имен
+        # разных ключей не приводит к ошибке: get_meta сверяет ключ записи
+        data = key.encode('utf-8')
+        return f"{zlib.crc32(data):08x}{zlib.adler32(data):08x}"
+    
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, self._digest(key) + '.json')
+    
+    def _data_path(self, key):
+        return os.path.join(self.cache_dir, self._digest(key) + '.pickle')
@@ -1,20 +1,54 @@
 import argparse
 import os
-from pathlib import Path
+import sys
 from exceptions import ValidationError
 
+# Форматы вывода (список задается здесь, чтобы разбор аргументов не загружал модуль output)
+OUTPUT_FORMATS = ('text', 'json', 'ndjson', 'csv')
+
+# Ширина справки, если размер терминала определить не удалось
+DEFAULT_HELP_WIDTH = 80
+
+class HelpFormatter(argparse.RawDescriptionHelpFormatter):
+    """
+    Форматирование справки с шириной по размеру терминала
+    
+    Стандартный форматтер создается при каждом add_argument и определяет
+    ширину через shutil, импорт которого заметен во времени запуска.
+    Ширина здесь вычисляется один раз через os.
+    """
+    
+    _width = None
+    
+    def __init__(self, prog, indent_increment=2, max_help_position=24, width=None):
+        if width is None:
+            width = HelpFormatter._terminal_width() - 2
+        super().__init__(prog, indent_increment, max_help_position, width)
+    
+    @staticmethod
+    def _terminal_width():
+        if HelpFormatter._width is None:
+            try:
+                columns = int(os.environ.get('COLUMNS', ''))
+            except ValueError:
+                try:
+                    columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+                except (AttributeError, ValueError, OSError):
+                    columns = DEFAULT_HELP_WIDTH
+            HelpFormatter._width = columns or DEFAULT_HELP_WIDTH
+        return HelpFormatter._width
+
 def setup_arg_parser():
     """Настройка парсера аргументов командной строки"""
     parser = argparse.ArgumentParser(
         description='Инструмент визуализации графа зависимостей пакетов',
-        formatter_class=argparse.RawDescriptionHelpFormatter
+        formatter_class=HelpFormatter
     )
     
     # Обязательные параметры
     parser.add_argument(
         '--package',
         '-p',
-        required=True,
         help='Имя анализируемого пакета'
     )
     
@@ -22,16 +56,103 @@ def setup_arg_parser():
         '--repo',
         '-r',
         required=True,
-        help='URL-адрес репозитория или путь к файлу тестового репозитория'
+        nargs='+',
+        help='URL-адреса репозиториев или пути к файлам тестовых репозиториев в порядке убывания приоритета'
     )
     
     parser.add_argument(
         '--output',
         '-o',
-        required=True,
         help='Имя сгенерированного файла с изображением графа'
     )
     
+    # Пакетный режим
+    parser.add_argument(
+        '--packages',
+        nargs='+',
+        help='Пакетный режим: список анализируемых пакетов (вывод в формате NDJSON)'
+    )
+    
+    parser.add_argument(
+        '--packages-file',
+        help="Пакетный режим: файл со списком пакетов ('-' - стандартный ввод)"
+    )
+    
+    parser.add_argument(
+        '--closure-ranking',
+        type=int,
+        metavar='N',
+        help='Пакетный режим: N пакетов репозитория с наибольшим транзитивным замыканием'
+    )
+    
+    parser.add_argument(
+        '--changed-closures',
+        action='store_true',
+        help='Пакетный режим: сравнить индекс из кэша с актуальным и вывести пакеты с изменившимся замыканием'
+    )
+    
+    parser.add_argument(
+        '--footprint',
+        action='store_true',
+        help='Пакетный режим: вывести размеры пакетов списка и их наборов установки (поля S: и I:)'
+    )
+    
+    parser.add_argument(
+        '--installed',
+        nargs='+',
+        metavar='PKG',
+        help='Пакетный режим с --footprint: уже установленные пакеты для расчета прироста размера'
+    )
+    
+    # Режим сервера
+    parser.add_argument(
+        '--serve',
+        metavar='ADDRESS',
+        help='Режим сервера: отвечать на запросы JSON через Unix-сокет (unix:/путь) или TCP (хост:порт)'
+    )
+    
+    parser.add_argument(
+        '--refresh-interval',
+        type=int,
+        metavar='SECONDS',
+        help='Режим сервера: период проверки обновлений репозитория в секундах'
+    )
+    
+    # Порядок установки
+    parser.add_argument(
+        '--install-order',
+        action='store_true',
+        help='Вывести порядок установки волнами и критический путь (для пакета или всего репозитория)'
+    )
+    
+    parser.add_argument(
+        '--path-weight',
+        choices=('size', 'installed_size', 'count'),
+        help='Вес пакета на критическом пути: size (S:, по умолчанию), installed_size (I:) или count (1 на пакет)'
+    )
+    
+    # Многоархитектурный режим
+    parser.add_argument(
+        '--arch',
+        nargs='+',
+        metavar='ARCH',
+        help='Сравнить замыкания и циклы нескольких архитектур: имя подставляется вместо {arch} в адресах репозиториев'
+    )
+    
+    parser.add_argument(
+        '--jobs',
+        '-j',
+        type=int,
+        help='Количество рабочих процессов многоархитектурного режима (по умолчанию - по числу ядер)'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=OUTPUT_FORMATS,
+        default='text',
+        help='Формат вывода результатов анализа пакета (text - текст для чтения человеком)'
+    )
+    
     # Флаги
     parser.add_argument(
         '--test-repo-mode',
@@ -47,6 +168,25 @@ def setup_arg_parser():
         help='Режим вывода зависимостей в формате ASCII-дерева'
     )
     
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        help='Максимальная глубина ASCII-дерева и изображения графа'
+    )
+    
+    parser.add_argument(
+        '--max-degree',
+        type=int,
+        help='Не рисовать на изображении дуги к пакетам, от которых зависит больше N пакетов'
+    )
+    
+    parser.add_argument(
+        '--dot-timeout',
+        type=int,
+        default=120,
+        help='Ограничение времени работы Graphviz в секундах'
+    )
+    
     parser.add_argument(
         '--reverse',
         '-R',
@@ -54,11 +194,119 @@ def setup_arg_parser():
         help='Режим вывода обратных зависимостей (пакетов, которые зависят от данного)'
     )
     
+    parser.add_argument(
+        '--whole-repo',
+        '-W',
+        action='store_true',
+        help='Искать обратные зависимости по всему репозиторию, а не только в графе анализируемого пакета'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш разобранных индексов'
+    )
+    
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Принудительно загрузить и разобрать индекс заново, обновив кэш'
+    )
+    
+    parser.add_argument(
+        '--cached',
+        action='store_true',
+        help='Использовать индексы из кэша без проверки актуальности (без запросов к удаленным репозиториям)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Каталог кэша разобранных индексов (по умолчанию ~/.cache/configmanagement2)'
+    )
+    
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Сохранить в кэше снимок графа всего репозитория: следующие запросы пакета не загружают индекс'
+    )
+    
+    # Диагностика производительности
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Вывести в stderr время этапов и счетчики (загрузка, разбор, кэш, обход графа)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='Сохранить профиль всего запуска: .json - Chrome trace по этапам, иначе - файл cProfile/pstats'
+    )
+    
     return parser
 
+def is_batch_mode(args):
+    """Проверка, запрошен ли пакетный режим"""
+    return bool(
+        args.packages or args.packages_file or args.closure_ranking or args.changed_closures
+        or args.footprint or args.installed
+    )
+
+def package_output_flags(args):
+    """Заданные параметры вывода дерева, обратных зависимостей и графа одного пакета"""
+    flags = {
+        '--output': args.output is not None,
+        '--reverse': args.reverse,
+        '--whole-repo': args.whole_repo,
+        '--ascii-tree': args.ascii_tree,
+        '--max-depth': args.max_depth is not None,
+        '--max-degree': args.max_degree is not None,
+    }
+    return [flag for flag, given in flags.items() if given]
+
 def validate_arguments(args):
     """Валидация переданных аргументов"""
     
+    if args.profile is not None:
+        validate_profile_path(args.profile)
+    
+    if args.cached and (args.no_cache or args.refresh):
+        raise ValidationError("Параметр --cached нельзя совмещать с --no-cache и --refresh")
+    
+    if args.cached and (args.serve or args.changed_closures or args.arch):
+        raise ValidationError("Параметр --cached нельзя совмещать с --serve, --changed-closures и --arch")
+    
+    if args.snapshot and args.no_cache:
+        raise ValidationError("Параметр --snapshot требует кэш индексов: снимок сохраняется в кэше")
+    
+    if args.snapshot and (args.serve or args.arch or args.install_order or is_batch_mode(args)):
+        raise ValidationError("Параметр --snapshot используется только при анализе одного пакета")
+    
+    if args.path_weight is not None and not args.install_order:
+        raise ValidationError("Параметр --path-weight используется только с параметром --install-order")
+    
+    if args.serve:
+        validate_server_arguments(args)
+        return
+    
+    if args.arch:
+        validate_multi_arch_arguments(args)
+        return
+    
+    if args.install_order:
+        validate_install_order_arguments(args)
+        return
+    
+    if args.jobs is not None:
+        raise ValidationError("Параметр --jobs используется только с параметром --arch")
+    
+    if args.refresh_interval is not None:
+        raise ValidationError("Параметр --refresh-interval используется только в режиме сервера")
+    
+    if is_batch_mode(args):
+        validate_batch_arguments(args)
+        return
+    
     # Проверка имени пакета
     if not args.package or not args.package.strip():
         raise ValidationError("Имя пакета не может быть пустым")
@@ -66,20 +314,28 @@ def validate_arguments(args):
     if not is_valid_package_name(args.package):
         raise ValidationError(f"Некорректное имя пакета: {args.package}")
     
-    # Проверка репозитория
-    if not args.repo or not args.repo.strip():
+    # Проверка репозиториев
+    if not args.repo:
         raise ValidationError("Репозиторий не может быть пустым")
     
-    # Если включен режим тестового репозитория, проверяем что путь существует
-    if args.test_repo_mode:
-        if not os.path.exists(args.repo):
-            raise ValidationError(f"Файл тестового репозитория не существует: {args.repo}")
-        if not os.path.isfile(args.repo):
-            raise ValidationError(f"Указанный путь не является файлом: {args.repo}")
-    else:
-        # Проверка URL (базовая валидация)
-        if not is_valid_url_or_path(args.repo):
-            raise ValidationError(f"Некорректный URL или путь: {args.repo}")
+    for repo in args.repo:
+        validate_repository(repo, args.test_repo_mode)
+    
+    if args.max_depth is not None and args.max_depth < 0:
+        raise ValidationError("Глубина дерева не может быть отрицательной")
+    
+    if args.max_degree is not None and args.max_degree < 0:
+        raise ValidationError("Порог числа входящих дуг не может быть отрицательным")
+    
+    if args.dot_timeout <= 0:
+        raise ValidationError("Ограничение времени Graphviz должно быть положительным")
+    
+    if args.format != 'text' and args.ascii_tree:
+        raise ValidationError("ASCII-дерево выводится только в формате text")
+    
+    # В машиночитаемых форматах изображение графа строится только по запросу
+    if args.format != 'text' and args.output is None:
+        return
     
     # Проверка выходного файла
     if not args.output or not args.output.strip():
@@ -93,11 +349,141 @@ def validate_arguments(args):
         raise ValidationError(f"Нет прав на запись в директорию: {output_dir}")
     
     # Проверка расширения файла
-    valid_extensions = {'.png', '.jpg', '.jpeg', '.svg', '.pdf'}
-    file_ext = Path(args.output).suffix.lower()
+    valid_extensions = {'.png', '.jpg', '.jpeg', '.svg', '.pdf', '.dot', '.gv'}
+    file_ext = os.path.splitext(args.output)[1].lower()
     if file_ext and file_ext not in valid_extensions:
         raise ValidationError(f"Неподдерживаемое расширение файла: {file_ext}. Допустимые: {', '.join(valid_extensions)}")
 
+def validate_batch_arguments(args):
+    """Валидация аргументов пакетного режима"""
+    if args.package:
+        raise ValidationError("Параметр --package нельзя совмещать с пакетным режимом")
+    
+    if args.format != 'text':
+        raise ValidationError("Параметр --format не используется в пакетном режиме: результаты всегда выводятся в NDJSON")
+    
+    ignored = package_output_flags(args)
+    if ignored:
+        raise ValidationError(f"Пакетный режим нельзя совмещать с параметрами вывода графа пакета: {', '.join(ignored)}")
+    
+    if args.closure_ranking is not None and args.closure_ranking <= 0:
+        raise ValidationError("Размер рейтинга замыканий должен быть положительным")
+    
+    if args.footprint and not (args.packages or args.packages_file):
+        raise ValidationError("Параметр --footprint требует список пакетов (--packages, --packages-file)")
+    
+    if args.installed and not args.footprint:
+        raise ValidationError("Параметр --installed используется только с параметром --footprint")
+    
+    for package in args.installed or []:
+        if not is_valid_package_name(package):
+            raise ValidationError(f"Некорректное имя пакета: {package}")
+    
+    if args.changed_closures and args.no_cache:
+        raise ValidationError("Параметр --changed-closures требует кэш индексов: прежний индекс берется из кэша")
+    
+    for package in args.packages or []:
+        if not is_valid_package_name(package):
+            raise ValidationError(f"Некорректное имя пакета: {package}")
+    
+    if args.packages_file and args.packages_file != '-' and not os.path.isfile(args.packages_file):
+        raise ValidationError(f"Файл со списком пакетов не существует: {args.packages_file}")
+    
+    if not args.repo:
+        raise ValidationError("Репозиторий не может быть пустым")
+    
+    for repo in args.repo:
+        validate_repository(repo, args.test_repo_mode)
+
+def validate_install_order_arguments(args):
+    """Валидация аргументов режима порядка установки"""
+    if is_batch_mode(args):
+        raise ValidationError("Параметр --install-order нельзя совмещать с пакетным режимом")
+    
+    ignored = package_output_flags(args)
+    if ignored:
+        raise ValidationError(f"Параметр --install-order нельзя совмещать с параметрами вывода графа пакета: {', '.join(ignored)}")
+    
+    if args.jobs is not None:
+        raise ValidationError("Параметр --jobs используется только с параметром --arch")
+    
+    if args.package is not None and not is_valid_package_name(args.package):
+        raise ValidationError(f"Некорректное имя пакета: {args.package}")
+    
+    for repo in args.repo:
+        validate_repository(repo, args.test_repo_mode)
+
+def validate_multi_arch_arguments(args):
+    """Валидация аргументов многоархитектурного режима"""
+    if args.package or args.closure_ranking or args.changed_closures or args.footprint or args.installed:
+        raise ValidationError("Параметр --arch совмещается только со списком пакетов (--packages, --packages-file)")
+    
+    if args.format != 'text':
+        raise ValidationError("Параметр --format не используется с --arch: результаты всегда выводятся в NDJSON")
+    
+    ignored = package_output_flags(args)
+    if ignored:
+        raise ValidationError(f"Параметр --arch нельзя совмещать с параметрами вывода графа пакета: {', '.join(ignored)}")
+    
+    if len(set(args.arch)) < 2:
+        raise ValidationError("Для сравнения нужны как минимум две разные архитектуры")
+    
+    if args.jobs is not None and args.jobs <= 0:
+        raise ValidationError("Количество рабочих процессов должно быть положительным")
+    
+    if not any('{arch}' in repo for repo in args.repo):
+        raise ValidationError("Адрес репозитория должен содержать {arch} для подстановки архитектуры")
+    
+    for package in args.packages or []:
+        if not is_valid_package_name(package):
+            raise ValidationError(f"Некорректное имя пакета: {package}")
+    
+    if args.packages_file and args.packages_file != '-' and not os.path.isfile(args.packages_file):
+        raise ValidationError(f"Файл со списком пакетов не существует: {args.packages_file}")
+    
+    for arch in args.arch:
+        for repo in args.repo:
+            validate_repository(repo.replace('{arch}', arch), args.test_repo_mode)
+
+def validate_server_arguments(args):
+    """Валидация аргументов режима сервера"""
+    if args.package or is_batch_mode(args):
+        raise ValidationError("Режим сервера нельзя совмещать с анализом пакета и пакетным режимом")
+    
+    if args.refresh_interval is not None and args.refresh_interval <= 0:
+        raise ValidationError("Период проверки обновлений должен быть положительным")
+    
+    for repo in args.repo:
+        validate_repository(repo, args.test_repo_mode)
+
+def validate_profile_path(path):
+    """Валидация пути к файлу профиля"""
+    if not path.strip():
+        raise ValidationError("Имя файла профиля не может быть пустым")
+    
+    profile_dir = os.path.dirname(path) or '.'
+    if not os.path.isdir(profile_dir):
+        raise ValidationError(f"Директория для файла профиля не существует: {profile_dir}")
+    
+    if not os.access(profile_dir, os.W_OK):
+        raise ValidationError(f"Нет прав на запись в директорию: {profile_dir}")
+
+def validate_repository(repo, test_repo_mode):
+    """Валидация одного репозитория"""
+    if not repo or not repo.strip():
+        raise ValidationError("Репозиторий не может быть пустым")
+    
+    # Если включен режим тестового репозитория, проверяем что путь существует
+    if test_repo_mode:
+        if not os.path.exists(repo):
+            raise ValidationError(f"Файл тестового репозитория не существует: {repo}")
+        if not os.path.isfile(repo):
+            raise ValidationError(f"Указанный путь не является файлом: {repo}")
+    else:
+        # Проверка URL (базовая валидация)
+        if not is_valid_url_or_path(repo):
+            raise ValidationError(f"Некорректный URL или путь: {repo}")
+
 def is_valid_package_name(package_name):
     """Проверка корректности имени пакета"""
     if not package_name:
@@ -120,6 +506,7 @@ def is_valid_url_or_path(repo):
         return True
     
     # Проверка что это может быть путь
+    from pathlib import Path
     try:
         Path(repo)
         return True
@@ -130,7 +517,10 @@ def print_configuration(args):
     """Вывод конфигурации параметров"""
     print("Настроенные параметры:")
     print(f"  Имя пакета: {args.package}")
-    print(f"  Репозиторий: {args.repo}")
+    print(f"  Репозиторий: {', '.join(args.repo)}")
     print(f"  Режим тестового репозитория: {'Включен' if args.test_repo_mode else 'Выключен'}")
     print(f"  Выходной файл: {args.output}")
-    print(f"  Режим ASCII-дерева: {'Включен' if args.ascii_tree else 'Выключен'}")
\ No newline at end of file
+    print(f"  Режим ASCII-дерева: {'Включен' if args.ascii_tree else 'Выключен'}")
+    print(f"  Кэш индексов: {'Выключен' if args.no_cache else 'Включен'}")
+    if args.cached:
+        print("  Проверка актуальности индексов: Выключена")
\ No newline at end of file
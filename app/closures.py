@@ -0,0 +1,195 @@
+import re
+from itertools import compress
+
+# Таблица перевода ASCII-цифр '0'/'1' в байты 0/1
+_BINARY_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+# Номера установленных битов для каждого значения байта
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+# Множество считается разреженным, если ненулевых байтов меньше этой доли
+# (1/4) от длины: тогда обход ненулевых байтов быстрее разбора двоичной записи
+SPARSE_BYTES_RATIO = 4
+
+def bits_from_ids(node_ids, size):
+    """
+    Построение битового множества (целого числа) по идентификаторам вершин
+    
+    Args:
+        node_ids (iterable): Идентификаторы вершин
+        size (int): Общее количество вершин
+    
+    Returns:
+        int: Битовое множество, в котором установлены биты node_ids
+    """
+    buffer = bytearray((size + 7) // 8)
+    for node_id in node_ids:
+        buffer[node_id >> 3] |= 1 << (node_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+def ids_from_bits(bits):
+    """
+    Получение идентификаторов вершин из битового множества в порядке возрастания
+    
+    Args:
+        bits (int): Битовое множество
+    
+    Returns:
+        list: Идентификаторы установленных битов
+    """
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    nonzero = len(data) - data.count(0)
+    
+    if nonzero * SPARSE_BYTES_RATIO > len(data):
+        # Плотное множество: двоичная запись переводится в последовательность
+        # байтов 0/1 и фильтруется через compress - без побитового цикла на Python
+        flags = bin(bits)[:1:-1].encode('ascii').translate(_BINARY_DIGITS)
+        return list(compress(range(len(flags)), flags))
+    
+    # Разреженное множество (замыкание пакета в большом репозитории):
+    # ненулевые байты находятся регулярным выражением, биты байта - по таблице
+    ids = []
+    for position in map(re.Match.start, _NONZERO_BYTE.finditer(data)):
+        base = position << 3
+        ids.extend([base + bit for bit in _BYTE_BITS[data[position]]])
+    return ids
+
+def relocate_bits(bits, moves):
+    """
+    Перенос разрядов битового множества на новые позиции
+    
+    Переводит множество в нумерацию, в которой вершины moves сменили
+    идентификаторы (остальные вершины сохраняют свои).
+    
+    Args:
+        bits (int): Битовое множество
+        moves (iterable): Пары (прежний, новый разряд); новые разряды
+            в исходном множестве должны быть сброшены
+    
+    Returns:
+        int: Битовое множество в новой нумерации
+    """
+    for source, target in moves:
+        if bits >> source & 1:
+            bits ^= (1 << source) | (1 << target)
+    return bits
+
+# int.bit_count появился в Python 3.10
+_bit_count = getattr(int, 'bit_count', None) or (lambda bits: bin(bits).count('1'))
+
+def count_bits(bits):
+    """Количество установленных битов"""
+    return _bit_count(bits)
+
+class ClosureIndex:
+    """
+    Транзитивные замыкания графа, вычисляемые по графу конденсации
+    
+    Замыкание считается один раз для каждой компоненты сильной связности
+    (все пакеты компоненты достигают одних и тех же вершин) и запоминается
+    в виде битового множества по идентификаторам пакетов. Замыкание
+    компоненты - объединение замыканий ее соседей в DAG, поэтому общие
+    поддеревья не обходятся повторно.
+    """
+    
+    def __init__(self, condensation, reverse=False):
+        self.condensation = condensation
+        self.reverse = reverse
+        self._size = len(condensation.graph)
+        self._reach = [None] * len(condensation)
+        self._members = [None] * len(condensation)
+    
+    def inherit(self, previous, components, moves=()):
+        """
+        Перенос запомненных замыканий из индекса прежней версии графа
+        
+        Args:
+            previous (ClosureIndex): Индекс прежнего графа
+            components (iterable): Пары (прежний, текущий номер) компонент,
+                множество достижимых пакетов которых не изменилось
+            moves (list): Пары (прежний, текущий идентификатор) вершин,
+                сменивших номер
+        """
+        reach = previous._reach
+        for old_id, component_id in components:
+            bits = reach[old_id]
+            if bits is not None:
+                self._reach[component_id] = relocate_bits(bits, moves)
+    
+    def _neighbors(self, component_id):
+        dag = self.condensation.dag
+        if self.reverse:
+            return dag.predecessors(component_id)
+        return dag.successors(component_id)
+    
+    def member_bits(self, component_id):
+        """Битовое множество пакетов компоненты"""
+        bits = self._members[component_id]
+        if bits is None:
+            bits = bits_from_ids(self.condensation.components[component_id], self._size)
+            self._members[component_id] = bits
+        return bits
+    
+    def component_reach(self, component_id):
+        """
+        Пакеты из других компонент, достижимые из данной компоненты
+        
+        Вычисление идет без рекурсии: компонента обрабатывается после того,
+        как посчитаны все ее соседи.
+        
+        Args:
+            component_id (int): Номер компоненты
+        
+        Returns:
+            int: Битовое множество достижимых пакетов
+        """
+        reach = self._reach
+        if reach[component_id] is not None:
+            return reach[component_id]
+        
+        stack = [component_id]
+        while stack:
+            current = stack[-1]
+            if reach[current] is not None:
+                stack.pop()
+                continue
+            
+            pending = [neighbor for neighbor in self._neighbors(current) if reach[neighbor] is None]
+            if pending:
+                stack.extend(pending)
+                continue
+            
+            bits = 0
+            for neighbor in self._neighbors(current):
+                bits |= reach[neighbor] | self.member_bits(neighbor)
+            reach[current] = bits
+            stack.pop()
+        
+        return reach[component_id]
+    
+    def closure_bits(self, node_id):
+        """
+        Транзитивное замыкание пакета без самого пакета
+        
+        Args:
+            node_id (int): Идентификатор пакета
+        
+        Returns:
+            int: Битовое множество пакетов замыкания
+        """
+        component_id = self.condensation.component_of[node_id]
+        bits = self.component_reach(component_id)
+        if self.condensation.is_cyclic(component_id):
+            # Внутри цикла пакет достигает всех пакетов своей компоненты
+            bits |= self.member_bits(component_id)
+        return bits & ~(1 << node_id)
+    
+    def closure_ids(self, node_id):
+        """Идентификаторы пакетов транзитивного замыкания в порядке возрастания"""
+        return ids_from_bits(self.closure_bits(node_id))
+    
+    def closure_size(self, node_id):
+        """Размер транзитивного замыкания пакета"""
+        return count_bits(self.closure_bits(node_id))
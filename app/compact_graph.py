@@ -0,0 +1,391 @@
+from array import array
+from collections import deque
+from collections.abc import Mapping
+
+class CompactGraph:
+    """
+    Компактное представление графа зависимостей
+    
+    Имена пакетов хранятся один раз в таблице names, а вершины графа -
+    плотные целочисленные идентификаторы. Смежность хранится в формате
+    CSR: дуги вершины i - это targets[offsets[i]:offsets[i + 1]].
+    Обратная смежность строится сразу вместе с прямой в том же формате.
+    """
+    
+    def __init__(self, names, offsets, targets):
+        self.names = names
+        self.ids = {name: node_id for node_id, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self._targets_view = memoryview(targets)
+        self.reverse_offsets, self.reverse_targets = self._build_reverse()
+        self._reverse_view = memoryview(self.reverse_targets)
+    
+    def _build_reverse(self):
+        """
+        Построение обратной смежности сортировкой подсчетом за O(V + E)
+        
+        Источники каждой вершины упорядочены по возрастанию идентификаторов.
+        
+        Returns:
+            tuple: (reverse_offsets, reverse_targets) в формате CSR
+        """
+        node_count = len(self.names)
+        counts = [0] * (node_count + 1)
+        for target in self.targets:
+            counts[target + 1] += 1
+        
+        reverse_offsets = array('I', [0]) * (node_count + 1)
+        total = 0
+        for node_id in range(node_count + 1):
+            total += counts[node_id]
+            reverse_offsets[node_id] = total
+        
+        positions = list(reverse_offsets)
+        reverse_targets = array('I', [0]) * len(self.targets)
+        offsets = self.offsets
+        targets = self.targets
+        for source in range(node_count):
+            for index in range(offsets[source], offsets[source + 1]):
+                target = targets[index]
+                reverse_targets[positions[target]] = source
+                positions[target] += 1
+        
+        return reverse_offsets, reverse_targets
+    
+    @classmethod
+    def from_adjacency(cls, names, adjacency):
+        """
+        Построение графа из списков смежности
+        
+        Args:
+            names (list): Имена вершин в порядке идентификаторов
+            adjacency (iterable): Для каждой вершины - список идентификаторов соседей
+        
+        Returns:
+            CompactGraph: Граф в формате CSR
+        """
+        offsets = array('I', [0])
+        targets = array('I')
+        
+        for successors in adjacency:
+            targets.extend(successors)
+            offsets.append(len(targets))
+        
+        return cls(names, offsets, targets)
+    
+    @classmethod
+    def from_mapping(cls, graph):
+        """
+        Построение графа из словаря {пакет: [зависимости]}
+        
+        Вершины получают идентификаторы в порядке ключей словаря,
+        зависимости, отсутствующие среди ключей, добавляются в конец.
+        """
+        names = list(graph)
+        ids = {name: node_id for node_id, name in enumerate(names)}
+        
+        adjacency = []
+        for name in list(names):
+            successors = []
+            for dependency in graph[name]:
+                dependency_id = ids.get(dependency)
+                if dependency_id is None:
+                    dependency_id = ids[dependency] = len(names)
+                    names.append(dependency)
+                successors.append(dependency_id)
+            adjacency.append(successors)
+        
+        adjacency.extend([] for _ in range(len(names) - len(adjacency)))
+        return cls.from_adjacency(names, adjacency)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    @property
+    def edge_count(self):
+        """Количество дуг графа"""
+        return len(self.targets)
+    
+    def successors(self, node_id):
+        """Идентификаторы прямых зависимостей вершины (без копирования)"""
+        return self._targets_view[self.offsets[node_id]:self.offsets[node_id + 1]]
+    
+    def predecessors(self, node_id):
+        """Идентификаторы вершин, которые напрямую зависят от данной (без копирования)"""
+        return self._reverse_view[self.reverse_offsets[node_id]:self.reverse_offsets[node_id + 1]]
+    
+    def degree(self, node_id):
+        """Количество прямых зависимостей вершины"""
+        return self.offsets[node_id + 1] - self.offsets[node_id]
+    
+    def strongly_connected_components(self, nodes=None):
+        """
+        Поиск компонент сильной связности алгоритмом Тарьяна без рекурсии за O(V + E)
+        
+        Компоненты нумеруются в порядке завершения: все компоненты, достижимые
+        из данной, имеют меньшие номера (обратный топологический порядок).
+        
+        Args:
+            nodes (iterable): Вершины подграфа, в котором ищутся компоненты
+                (по умолчанию - весь граф); дуги в остальные вершины не учитываются
+        
+        Returns:
+            tuple: (component_of, components) - номер компоненты каждой вершины
+                   (для вершин вне подграфа не определен) и списки вершин
+                   компонент в порядке обнаружения
+        """
+        node_count = len(self.names)
+        offsets = self.offsets
+        targets = self.targets
+        
+        if nodes is None:
+            discovery = [-1] * node_count
+            roots = range(node_count)
+        else:
+            # Вершины вне подграфа выглядят для обхода как уже обработанные
+            discovery = [-2] * node_count
+            roots = list(nodes)
+            for node in roots:
+                discovery[node] = -1
+        lowlink = [0] * node_count
+        on_stack = bytearray(node_count)
+        component_of = array('I', [0]) * node_count
+        components = []
+        stack = []
+        counter = 0
+        
+        for root in roots:
+            if discovery[root] != -1:
+                continue
+            
+            discovery[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            
+            while work:
+                frame = work[-1]
+                node, position = frame
+                
+                if position < offsets[node + 1]:
+                    frame[1] = position + 1
+                    successor = targets[position]
+                    
+                    if discovery[successor] == -1:
+                        discovery[successor] = lowlink[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = 1
+                        work.append([successor, offsets[successor]])
+                    elif on_stack[successor] and discovery[successor] < lowlink[node]:
+                        lowlink[node] = discovery[successor]
+                    continue
+                
+                # Все дуги вершины просмотрены - возврат к родителю
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                
+                if lowlink[node] == discovery[node]:
+                    component_id = len(components)
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component_of[member] = component_id
+                        members.append(member)
+                        if member == node:
+                            break
+                    members.reverse()
+                    components.append(members)
+        
+        return component_of, components
+    
+    def condensation(self):
+        """Построение графа конденсации (DAG компонент сильной связности)"""
+        component_of, components = self.strongly_connected_components()
+        return Condensation(self, component_of, components)
+    
+    def as_mapping(self):
+        """Представление графа в виде словаря {пакет: [зависимости]} только для чтения"""
+        return GraphView(self)
+    
+    def __getstate__(self):
+        # memoryview не сериализуется - восстанавливается из targets
+        return (self.names, self.offsets, self.targets)
+    
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+class Condensation:
+    """
+    Граф конденсации: компоненты сильной связности исходного графа, сжатые в вершины
+    
+    Номера компонент совпадают с порядком их завершения в алгоритме Тарьяна,
+    поэтому обход компонент по возрастанию номеров идет от зависимостей
+    к зависящим от них пакетам.
+    """
+    
+    def __init__(self, graph, component_of, components, adjacency=None):
+        """
+        Args:
+            graph (CompactGraph): Исходный граф
+            component_of (array): Номер компоненты каждой вершины
+            components (list): Списки вершин компонент
+            adjacency (list): Готовые упорядоченные списки соседей первых
+                компонент; для остальных строятся по дугам исходного графа
+        """
+        self.graph = graph
+        self.component_of = component_of
+        self.components = components
+        
+        adjacency = list(adjacency or ())
+        adjacency.extend(
+            self.component_successors(component_id)
+            for component_id in range(len(adjacency), len(components))
+        )
+        
+        self.dag = CompactGraph.from_adjacency(list(range(len(components))), adjacency)
+    
+    def __len__(self):
+        return len(self.components)
+    
+    def component_successors(self, component_id):
+        """Номера компонент, в которые ведут дуги из данной, по возрастанию"""
+        component_of = self.component_of
+        successors = set()
+        for node_id in self.components[component_id]:
+            for target in self.graph.successors(node_id):
+                successors.add(component_of[target])
+        successors.discard(component_id)
+        return sorted(successors)
+    
+    def is_cyclic(self, component_id):
+        """Проверка, образует ли компонента цикл (несколько вершин или петля)"""
+        members = self.components[component_id]
+        if len(members) > 1:
+            return True
+        return members[0] in self.graph.successors(members[0])
+    
+    def cyclic_components(self):
+        """Номера компонент, образующих циклы"""
+        return [component_id for component_id in range(len(self.components)) if self.is_cyclic(component_id)]
+    
+    def levels(self):
+        """
+        Уровни компонент для параллельной установки за O(V + E)
+        
+        Уровень компоненты без зависимостей равен 0, остальных - на единицу
+        больше наибольшего уровня зависимостей. Компоненты одного уровня
+        не зависят друг от друга.
+        
+        Returns:
+            array: Уровень каждой компоненты
+        """
+        dag = self.dag
+        levels = array('I', [0]) * len(self.components)
+        # Зависимости компоненты имеют меньшие номера и уже обработаны
+        for component_id in range(len(self.components)):
+            level = 0
+            for dependency in dag.successors(component_id):
+                if levels[dependency] >= level:
+                    level = levels[dependency] + 1
+            levels[component_id] = level
+        return levels
+    
+    def longest_path(self, weights):
+        """
+        Путь наибольшего суммарного веса в графе конденсации за O(V + E)
+        
+        При равном весе выбирается путь из большего числа компонент, поэтому
+        при нулевых весах (индекс без размеров) находится самая длинная цепочка.
+        
+        Args:
+            weights (list): Вес каждой компоненты (неотрицательный)
+        
+        Returns:
+            tuple: (суммарный вес, номера компонент пути от зависимостей к зависящим)
+        """
+        dag = self.dag
+        component_count = len(self.components)
+        if not component_count:
+            return 0, []
+        
+        # Для каждой компоненты - (вес, длина) лучшего пути, заканчивающегося в ней
+        best = [None] * component_count
+        following = [-1] * component_count
+        for component_id in range(component_count):
+            heaviest = (0, 0)
+            for dependency in dag.successors(component_id):
+                if best[dependency] > heaviest:
+                    heaviest = best[dependency]
+                    following[component_id] = dependency
+            best[component_id] = (weights[component_id] + heaviest[0], heaviest[1] + 1)
+        
+        end = max(range(component_count), key=best.__getitem__)
+        path = []
+        component_id = end
+        while component_id != -1:
+            path.append(component_id)
+            component_id = following[component_id]
+        path.reverse()
+        return best[end][0], path
+    
+    def representative_cycle(self, component_id):
+        """
+        Построение одного упорядоченного цикла внутри компоненты
+        
+        Поиск в ширину от первой обнаруженной вершины компоненты находит
+        кратчайший цикл, проходящий через нее.
+        
+        Args:
+            component_id (int): Номер циклической компоненты
+            
+        Returns:
+            list: Идентификаторы вершин цикла, первая вершина повторяется в конце
+        """
+        start = self.components[component_id][0]
+        parents = {start: None}
+        queue = deque([start])
+        
+        while queue:
+            node_id = queue.popleft()
+            for target in self.graph.successors(node_id):
+                if target == start:
+                    cycle = [start]
+                    while node_id != start:
+                        cycle.append(node_id)
+                        node_id = parents[node_id]
+                    cycle.append(start)
+                    cycle[1:-1] = reversed(cycle[1:-1])
+                    return cycle
+                
+                if target not in parents and self.component_of[target] == component_id:
+                    parents[target] = node_id
+                    queue.append(target)
+        
+        return [start]
+
+class GraphView(Mapping):
+    """Отображение CompactGraph в виде словаря {пакет: [зависимости]}"""
+    
+    def __init__(self, compact_graph):
+        self._graph = compact_graph
+    
+    def __getitem__(self, name):
+        node_id = self._graph.ids[name]
+        names = self._graph.names
+        return [names[target] for target in self._graph.successors(node_id)]
+    
+    def __contains__(self, name):
+        return name in self._graph.ids
+    
+    def __iter__(self):
+        return iter(self._graph.names)
+    
+    def __len__(self):
+        return len(self._graph.names)
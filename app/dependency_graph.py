@@ -1,16 +1,32 @@
+import sys
+from array import array
 from collections import deque
+from itertools import compress
+from compact_graph import CompactGraph, Condensation
+from closures import ClosureIndex, bits_from_ids, relocate_bits
+from footprint import FootprintIndex
+import instrumentation
 from exceptions import PackageNotFoundError, APKParseError
 
+# Количество строк ASCII-дерева, записываемых в поток за одну операцию
+TREE_WRITE_CHUNK = 1024
+
 class DependencyGraph:
     """Класс для построения графа зависимостей пакетов"""
     
     def __init__(self, apk_parser):
         self.apk_parser = apk_parser
-        self.graph = {}
+        self.compact = CompactGraph([], array('I', [0]), array('I'))
+        self.graph = self.compact.as_mapping()
         self.visited = set()
-        self.current_path = set()
-        self.cycles = []
+        self._condensation = None
+        self._cycles = None
+        self._closures = None
+        self._reverse_closures = None
+        self._footprint = None
+        self._dependents = None
     
+    @instrumentation.timed('graph_build')
     def build_dependency_graph(self, root_package):
         """
         Построение полного графа зависимостей с использованием DFS без рекурсии
@@ -19,56 +35,101 @@ class DependencyGraph:
             root_package (str): Корневой пакет для анализа
             
         Returns:
-            dict: Граф зависимостей в формате {пакет: [зависимости]}
+            Mapping: Граф зависимостей в формате {пакет: [зависимости]}
         """
-        self.graph = {}
         self.visited = set()
-        self.current_path = set()
-        self.cycles = []
+        
+        # Вершины получают идентификаторы в порядке обхода
+        names = []
+        rows = []
         
         # Используем стек для DFS без рекурсии
-        stack = [(root_package, False)]  # (package, is_backtrack)
+        stack = [root_package]
         
         while stack:
-            current_package, is_backtrack = stack.pop()
-            
-            if is_backtrack:
-                # Возвращаемся из рекурсивного вызова - удаляем из текущего пути
-                self.current_path.remove(current_package)
-                continue
+            current_package = stack.pop()
             
             if current_package in self.visited:
                 continue
-                
+            
             # Помечаем как посещенный
             self.visited.add(current_package)
-            self.current_path.add(current_package)
-            
-            # Добавляем маркер возврата в стек
-            stack.append((current_package, True))
             
             try:
                 # Получаем зависимости текущего пакета
                 dependencies = self.apk_parser.get_package_dependencies(current_package)
-                self.graph[current_package] = dependencies
                 
-                # Проверяем циклические зависимости
                 for dep in dependencies:
-                    if dep in self.current_path:
-                        # Найден цикл
-                        cycle_path = list(self.current_path) + [dep]
-                        self.cycles.append(cycle_path)
-                        print(f"Предупреждение: обнаружена циклическая зависимость: {' -> '.join(cycle_path)}")
-                    
                     if dep not in self.visited:
-                        stack.append((dep, False))
+                        stack.append(dep)
                         
             except (PackageNotFoundError, APKParseError) as e:
                 print(f"Предупреждение: не удалось получить зависимости для пакета '{current_package}': {e}")
-                self.graph[current_package] = []
+                dependencies = []
+            
+            names.append(current_package)
+            rows.append(dependencies)
         
+        # Циклы ищутся после построения графа по компонентам сильной связности
+        instrumentation.count('dependency_lookups', len(names))
+        self._freeze(names, rows)
         return self.graph
     
+    def _freeze(self, names, rows):
+        """
+        Перевод построенного графа в компактное представление
+        
+        Имена пакетов заменяются плотными целочисленными идентификаторами,
+        а смежность упаковывается в CSR-массивы.
+        
+        Args:
+            names (list): Имена пакетов в порядке обхода
+            rows (list): Для каждого пакета - список имен его зависимостей
+        """
+        ids = {name: node_id for node_id, name in enumerate(names)}
+        adjacency = ([ids[dep] for dep in dependencies] for dependencies in rows)
+        
+        self.compact = CompactGraph.from_adjacency(names, adjacency)
+        self.graph = self.compact.as_mapping()
+        instrumentation.count('nodes_visited', len(names))
+        instrumentation.count('edges_visited', self.compact.edge_count)
+        self._condensation = None
+        self._cycles = None
+        self._closures = None
+        self._reverse_closures = None
+        self._footprint = None
+        self._dependents = None
+    
+    def get_closure_index(self, reverse=False):
+        """
+        Получение индекса транзитивных замыканий по графу конденсации
+        
+        Args:
+            reverse (bool): Замыкания по обратным зависимостям
+            
+        Returns:
+            ClosureIndex: Индекс замыканий с запоминанием результатов по компонентам
+        """
+        if reverse:
+            if self._reverse_closures is None:
+                self._reverse_closures = ClosureIndex(self.get_condensation(), reverse=True)
+            return self._reverse_closures
+        
+        if self._closures is None:
+            self._closures = ClosureIndex(self.get_condensation())
+        return self._closures
+    
+    def get_footprint_index(self):
+        """
+        Получение индекса размеров пакетов и их наборов установки (S:, I:)
+        
+        Returns:
+            FootprintIndex: Индекс размеров по прямым замыканиям графа
+        """
+        if self._footprint is None:
+            self._footprint = FootprintIndex(self.compact.names, self.apk_parser.get_index(), self.get_closure_index())
+        return self._footprint
+    
     def get_transitive_dependencies(self, package_name):
         """
         Получение всех транзитивных зависимостей пакета
@@ -79,20 +140,337 @@ class DependencyGraph:
         Returns:
             set: Множество всех транзитивных зависимостей
         """
-        if package_name not in self.graph:
-            return set()
+        return set(self.get_closure(package_name))
+    
+    def get_closure(self, package_name, reverse=False):
+        """
+        Транзитивное замыкание пакета в порядке вершин графа
         
-        transitive_deps = set()
-        queue = deque(self.graph[package_name])
+        Args:
+            package_name (str): Имя пакета
+            reverse (bool): Замыкание по обратным зависимостям
+            
+        Returns:
+            list: Имена пакетов замыкания (без самого пакета)
+        """
+        node_id = self.compact.ids.get(package_name)
+        if node_id is None:
+            return []
         
-        while queue:
-            dep = queue.popleft()
-            if dep not in transitive_deps and dep != package_name:
-                transitive_deps.add(dep)
-                if dep in self.graph:
-                    queue.extend(self.graph[dep])
+        names = self.compact.names
+        return [names[dep_id] for dep_id in self.get_closure_index(reverse).closure_ids(node_id)]
+    
+    def get_closure_sizes(self, reverse=False):
+        """
+        Размеры транзитивных замыканий всех пакетов графа
+        
+        Args:
+            reverse (bool): Считать замыкания по обратным зависимостям
+            
+        Returns:
+            list: Пары (пакет, размер замыкания) по убыванию размера
+        """
+        closures = self.get_closure_index(reverse)
+        names = self.compact.names
+        sizes = [(names[node_id], closures.closure_size(node_id)) for node_id in range(len(names))]
+        sizes.sort(key=lambda item: (-item[1], item[0]))
+        return sizes
+    
+    @instrumentation.timed('graph_build')
+    def build_repository_graph(self):
+        """
+        Построение графа зависимостей всего репозитория
+        
+        В граф включаются все пакеты индекса, поэтому обратные зависимости
+        можно искать по всему репозиторию, а не только среди пакетов,
+        достижимых из анализируемого.
+        
+        Returns:
+            Mapping: Граф зависимостей в формате {пакет: [зависимости]}
+        """
+        names = list(self.apk_parser.get_index())
+        rows = []
+        missing = []
+        known = set(names)
+        
+        for package in names:
+            dependencies = self.apk_parser.get_package_dependencies(package)
+            for dep in dependencies:
+                if dep not in known:
+                    # Зависимость на пакет, отсутствующий в репозитории
+                    known.add(dep)
+                    missing.append(dep)
+            rows.append(dependencies)
+        
+        if missing:
+            print(f"Предупреждение: в репозитории отсутствуют пакеты: {', '.join(missing)}")
+            names.extend(missing)
+            rows.extend([] for _ in missing)
+        
+        self.visited = known
+        instrumentation.count('dependency_lookups', len(rows) - len(missing))
+        self._freeze(names, rows)
+        return self.graph
+    
+    def fork(self, apk_parser):
+        """
+        Копия графа для обновления по новому индексу
+        
+        Компактный граф, вычисленные замыкания и обратный индекс ссылок
+        не изменяются после построения, поэтому копия использует их
+        совместно с исходным графом.
+        Исходный граф остается пригодным для запросов во время обновления копии.
+        
+        Args:
+            apk_parser (APKParser): Парсер с новым индексом
+            
+        Returns:
+            DependencyGraph: Граф с теми же данными и новым парсером
+        """
+        graph = DependencyGraph(apk_parser)
+        graph.compact = self.compact
+        graph.graph = self.graph
+        graph.visited = set(self.visited)
+        graph._condensation = self._condensation
+        graph._cycles = self._cycles
+        graph._closures = self._closures
+        graph._reverse_closures = self._reverse_closures
+        graph._dependents = self._dependents
+        return graph
+    
+    @instrumentation.timed('apply_index_diff')
+    def apply_index_diff(self, diff):
+        """
+        Обновление графа всего репозитория по различиям версий индекса
+        
+        Зависимости заново разрешаются только у затронутых пакетов: измененных,
+        добавленных и ссылающихся на имена из diff.relinked. Сохранившиеся
+        вершины оставляют прежние идентификаторы, новые занимают освободившиеся,
+        а при уменьшении графа на свободные места переносятся последние
+        вершины. Дуги остальных пакетов копируются из прежних CSR-массивов,
+        обратная смежность строится заново за O(V + E).
+        
+        Компоненты сильной связности ищутся заново только среди пакетов,
+        из которых затронутый пакет достижим в прежнем или новом графе:
+        остальные компоненты, их дуги в графе конденсации и запомненные
+        замыкания переносятся без изменений. По тем же отметкам сравниваются
+        замыкания прежнего и нового графа.
+        
+        Args:
+            diff (IndexDiff): Различия между прежним и текущим индексом парсера
+        
+        Returns:
+            list: Пакеты, присутствующие в обеих версиях графа, транзитивное
+                замыкание которых изменилось
+        """
+        if diff.is_empty():
+            return []
+        
+        old = self.compact
+        old_closures = self.get_closure_index()
+        index = self.apk_parser.get_index()
+        removed = set(diff.removed)
+        dirty = self._find_dirty_packages(diff, index)
+        affected = dirty | removed
+        
+        rows = {name: self.apk_parser.get_package_dependencies(name) for name in index if name in dirty}
+        instrumentation.count('dependency_lookups', len(rows))
+        referenced = {}
+        for dependencies in rows.values():
+            referenced.update(dict.fromkeys(dependencies))
+        
+        # Пакет, которого нет в индексе, остается в графе заглушкой,
+        # пока на него ссылается хотя бы один пакет
+        old_names = old.names
+        deleted = [
+            old_id for old_id, name in enumerate(old_names)
+            if name not in index and name not in referenced
+            and all(old_names[source] in affected for source in old.predecessors(old_id))
+        ]
+        new_missing = [dep for dep in referenced if dep not in index and dep not in old.ids]
+        if new_missing:
+            print(f"Предупреждение: в репозитории отсутствуют пакеты: {', '.join(new_missing)}")
+        
+        fresh = [name for name in diff.added if name not in old.ids]
+        fresh.extend(new_missing)
+        names, relocated = _renumber(old_names, deleted, fresh)
+        moves = dict(relocated)
+        ids = {name: node_id for node_id, name in enumerate(names)}
+        
+        offsets = array('I', [0])
+        targets = array('I')
+        for name in names:
+            dependencies = rows.get(name)
+            if dependencies is not None:
+                targets.extend([ids[dep] for dep in dependencies])
+            elif name not in removed and name in old.ids:
+                old_id = old.ids[name]
+                row = old.targets[old.offsets[old_id]:old.offsets[old_id + 1]]
+                if moves and not moves.keys().isdisjoint(row):
+                    row = [moves.get(target, target) for target in row]
+                targets.extend(row)
+            offsets.append(len(targets))
+        
+        new = CompactGraph(names, offsets, targets)
+        old_upstream = _mark_upstream(old, [old.ids[name] for name in affected if name in old.ids])
+        new_upstream = _mark_upstream(new, [new.ids[name] for name in affected if name in new.ids])
+        
+        # Область пересчета: пакеты выше затронутых в любой из версий и новые
+        # вершины. Из остальных пакетов дуги в область не ведут
+        region = bytearray(new_upstream)
+        deleted_set = set(deleted)
+        for old_id in compress(range(len(old)), old_upstream):
+            if old_id not in deleted_set:
+                region[moves.get(old_id, old_id)] = 1
+        for name in fresh:
+            region[ids[name]] = 1
+        
+        condensation, kept = _update_condensation(
+            new, old_closures.condensation, old_upstream, region, deleted_set, moves
+        )
+        
+        self.compact = new
+        self.graph = new.as_mapping()
+        self.visited = set(names)
+        self._condensation = condensation
+        self._cycles = None
+        self._closures = ClosureIndex(condensation)
+        self._closures.inherit(old_closures, kept, relocated)
+        self._reverse_closures = None
+        self._footprint = None
+        return self._changed_closures(old, old_closures, old_upstream, new_upstream, deleted, relocated)
+    
+    def _find_dirty_packages(self, diff, index):
+        """
+        Пакеты, зависимости которых нужно разрешить заново
+        
+        Пакеты, ссылающиеся на имена из diff.relinked, находятся по обратному
+        индексу {имя из D:: пакеты}. Он строится полным проходом по индексу
+        при первом обновлении с relinked, а затем дополняется только записями
+        измененных и добавленных пакетов. Ссылки прежних версий записей
+        не вычищаются: лишний пакет лишь заново разрешается, а удаленные
+        пакеты отбрасываются проверкой по индексу.
+        """
+        dirty = set(diff.changed)
+        dirty.update(diff.added)
+        if self._dependents is None and not diff.relinked:
+            return dirty
+        
+        if self._dependents is None:
+            dependents = {}
+            for name, record in index.items():
+                for dep_name in _dependency_names(record):
+                    dependents.setdefault(dep_name, set()).add(name)
+        else:
+            # Индекс общий с графом, из которого сделана копия:
+            # множество копируется перед изменением
+            dependents = dict(self._dependents)
+            for name in dirty:
+                for dep_name in _dependency_names(index[name]):
+                    packages = dependents.get(dep_name)
+                    if packages is None:
+                        dependents[dep_name] = {name}
+                    elif name not in packages:
+                        dependents[dep_name] = packages | {name}
+        self._dependents = dependents
+        
+        for name in diff.relinked:
+            dirty.update(package for package in dependents.get(name, ()) if package in index)
+        return dirty
+    
+    def _changed_closures(self, old, old_closures, old_upstream, new_upstream, deleted, relocated):
+        """
+        Сравнение замыканий прежнего и текущего графа
+        
+        Сохранившиеся вершины имеют те же идентификаторы, кроме перенесенных
+        на освободившиеся места, поэтому битовые множества прежнего графа
+        переводятся в новую нумерацию переносом разрядов relocated.
+        Сравниваются только пакеты выше затронутых: замыкания остальных
+        не изменились.
+        
+        Args:
+            old (CompactGraph): Прежний граф
+            old_closures (ClosureIndex): Замыкания прежнего графа
+            old_upstream (bytearray): Отметки пакетов прежнего графа выше затронутых
+            new_upstream (bytearray): Отметки пакетов текущего графа выше затронутых
+            deleted (list): Идентификаторы прежнего графа, отсутствующие в новом
+            relocated (list): Пары (прежний, новый идентификатор) вершин, сменивших номер
+        
+        Returns:
+            list: Пакеты, замыкание которых изменилось, в порядке нового графа
+        """
+        new = self.compact
+        new_closures = self.get_closure_index()
+        old_condensation = old_closures.condensation
+        deleted_bits = bits_from_ids(deleted, len(old))
+        
+        translated = {}
+        changed = []
+        for node_id, name in enumerate(new.names):
+            old_id = old.ids.get(name)
+            if old_id is None or not (old_upstream[old_id] or new_upstream[node_id]):
+                continue
+            
+            component_id = old_condensation.component_of[old_id]
+            bits = translated.get(component_id)
+            if bits is None:
+                bits = old_closures.component_reach(component_id)
+                if old_condensation.is_cyclic(component_id):
+                    bits |= old_closures.member_bits(component_id)
+                # -1: замыкание содержало удаленный пакет и заведомо изменилось
+                bits = -1 if bits & deleted_bits else relocate_bits(bits, relocated)
+                if old_condensation.is_cyclic(component_id):
+                    # Общий результат для всех пакетов компоненты
+                    translated[component_id] = bits
+            
+            if bits < 0 or bits & ~(1 << node_id) != new_closures.closure_bits(node_id):
+                changed.append(name)
+        
+        return changed
+
+    @instrumentation.timed('constraints')
+    def get_constraint_problems(self, root_package=None):
+        """
+        Поиск нарушенных ограничений версий и конфликтов среди дуг графа
         
-        return transitive_deps
+        Ограничение версии нарушено, если выбранный поставщик зависимости
+        не удовлетворяет оператору (например, "foo>=2" при foo-1.5). Конфликт
+        "!foo" нарушен, если foo устанавливается вместе с пакетом: входит
+        в замыкание корневого пакета, а без корня - в замыкание самого пакета.
+        
+        Args:
+            root_package (str): Корневой пакет, определяющий набор устанавливаемых пакетов
+            
+        Returns:
+            list: Кортежи (пакет, Constraint, пакет-поставщик, вид), где вид -
+                'version' (ограничение версии не выполнено) или 'conflict'
+        """
+        ids = self.compact.ids
+        closures = None
+        installed = None
+        
+        root_id = ids.get(root_package) if root_package is not None else None
+        if root_id is not None:
+            installed = self.get_closure_index().closure_bits(root_id) | (1 << root_id)
+        
+        problems = []
+        for node_id, package in enumerate(self.compact.names):
+            for constraint, provider, kind in self.apk_parser.get_constraint_issues(package):
+                if kind == 'version':
+                    problems.append((package, constraint, provider, kind))
+                    continue
+                
+                target_id = ids.get(provider)
+                if target_id is None or target_id == node_id:
+                    continue
+                
+                if root_id is None:
+                    closures = closures or self.get_closure_index()
+                    installed = closures.closure_bits(node_id)
+                if installed >> target_id & 1:
+                    problems.append((package, constraint, provider, kind))
+        
+        return problems
     
     def get_reverse_dependencies(self, target_package):
         """
@@ -104,18 +482,19 @@ class DependencyGraph:
         Returns:
             list: Список пакетов, которые зависят от целевого пакета
         """
-        reverse_deps = []
-        
-        # Проходим по всем пакетам в графе и ищем те, которые зависят от target_package
-        for package, dependencies in self.graph.items():
-            if target_package in dependencies:
-                reverse_deps.append(package)
+        target_id = self.compact.ids.get(target_package)
+        if target_id is None:
+            return []
         
-        return reverse_deps
+        names = self.compact.names
+        return [names[node_id] for node_id in self.compact.predecessors(target_id)]
     
     def get_transitive_reverse_dependencies(self, target_package):
         """
-        Поиск транзитивных обратных зависимостей с использованием DFS без рекурсии
+        Поиск транзитивных обратных зависимостей
+        
+        Замыкания по обратной смежности вычисляются по графу конденсации
+        и запоминаются для каждой компоненты сильной связности.
         
         Args:
             target_package (str): Целевой пакет
@@ -123,22 +502,7 @@ class DependencyGraph:
         Returns:
             set: Множество всех пакетов, которые прямо или косвенно зависят от целевого пакета
         """
-        if target_package not in self.graph:
-            return set()
-        
-        transitive_reverse_deps = set()
-        stack = [target_package]
-        
-        while stack:
-            current_package = stack.pop()
-            
-            # Находим все пакеты, которые зависят от current_package
-            for package, dependencies in self.graph.items():
-                if current_package in dependencies and package not in transitive_reverse_deps:
-                    transitive_reverse_deps.add(package)
-                    stack.append(package)
-        
-        return transitive_reverse_deps
+        return set(self.get_closure(target_package, reverse=True))
     
     def print_reverse_dependencies(self, target_package):
         """
@@ -170,43 +534,358 @@ class DependencyGraph:
         print(f"  Прямые обратные зависимости: {len(direct_reverse)}")
         print(f"  Транзитивные обратные зависимости: {len(transitive_reverse)}")
     
-    def print_dependency_tree(self, root_package):
+    @instrumentation.timed('tree')
+    def print_dependency_tree(self, root_package, max_depth=None, out=None):
         """
         Вывод дерева зависимостей в ASCII-формате
         
+        Каждое поддерево раскрывается только один раз: повторные вхождения
+        пакета помечаются ссылкой на уже выведенное поддерево, поэтому размер
+        вывода линеен по числу вершин и дуг графа.
+        
         Args:
             root_package (str): Корневой пакет
+            max_depth (int): Максимальная глубина раскрытия (None - без ограничений)
+            out: Поток вывода (по умолчанию стандартный вывод)
         """
-        print(f"\nДерево зависимостей для пакета '{root_package}':")
-        self._print_tree_recursive(root_package, "", set())
+        out = out or sys.stdout
+        out.write(f"\nДерево зависимостей для пакета '{root_package}':\n")
+        
+        buffer = []
+        for line in self.iter_tree_lines(root_package, max_depth):
+            buffer.append(line)
+            if len(buffer) >= TREE_WRITE_CHUNK:
+                out.write('\n'.join(buffer) + '\n')
+                buffer = []
+        
+        if buffer:
+            out.write('\n'.join(buffer) + '\n')
+        out.flush()
     
-    def _print_tree_recursive(self, package, prefix, visited):
+    def iter_tree_lines(self, root_package, max_depth=None):
         """
-        Рекурсивный вывод дерева зависимостей
+        Построчная генерация ASCII-дерева зависимостей без рекурсии
+        
+        Поддерево пакета раскрывается один раз - при первом появлении пакета
+        на его минимальной глубине (расстоянии от корня). Благодаря этому
+        глубина дерева не превышает радиус графа даже при длинных цепочках,
+        а остальные вхождения пакета выводятся ссылками.
         
         Args:
-            package (str): Текущий пакет
-            prefix (str): Префикс для отступов
-            visited (set): Посещенные пакеты для обнаружения циклов
+            root_package (str): Корневой пакет
+            max_depth (int): Максимальная глубина раскрытия (None - без ограничений)
+            
+        Yields:
+            str: Строки дерева
         """
-        if package in visited:
-            print(f"{prefix}└── {package} (ЦИКЛ)")
+        root_id = self.compact.ids.get(root_package)
+        if root_id is None:
+            yield f"└── {root_package}"
             return
+        
+        names = self.compact.names
+        min_depth = self.distances_from(root_id)
+        expanded = bytearray(len(self.compact))
+        on_path = bytearray(len(self.compact))
+        
+        # Элементы стека: (вершина, префикс родителя, последний ли потомок, глубина)
+        # или (None, вершина) - маркер выхода из поддерева
+        stack = [(root_id, "", True, 0)]
+        
+        while stack:
+            frame = stack.pop()
+            if frame[0] is None:
+                on_path[frame[1]] = 0
+                continue
+            
+            node_id, parent_prefix, is_last, depth = frame
+            line_prefix = parent_prefix + ("└── " if is_last else "├── ")
+            package = names[node_id]
+            dependencies = self.compact.successors(node_id)
+            
+            if on_path[node_id]:
+                yield f"{line_prefix}{package} (ЦИКЛ)"
+                continue
+            
+            if len(dependencies):
+                if expanded[node_id]:
+                    yield f"{line_prefix}{package} (см. выше)"
+                    continue
+                
+                # Ссылка вниз - только если вхождение на минимальной глубине
+                # не обрезано ограничением глубины и его поддерево будет выведено
+                if depth > min_depth[node_id] and (max_depth is None or min_depth[node_id] < max_depth):
+                    yield f"{line_prefix}{package} (см. ниже)"
+                    continue
+                
+                if max_depth is not None and depth >= max_depth:
+                    yield f"{line_prefix}{package} (...)"
+                    continue
+            
+            yield f"{line_prefix}{package}"
+            expanded[node_id] = 1
+            on_path[node_id] = 1
+            stack.append((None, node_id))
             
-        visited.add(package)
-        print(f"{prefix}└── {package}")
+            # Потомки добавляются в обратном порядке, чтобы выводиться в прямом;
+            # префикс потомков общий и хранится в стеке один раз
+            child_prefix = parent_prefix + ("    " if is_last else "│   ")
+            last_index = len(dependencies) - 1
+            for index in range(last_index, -1, -1):
+                stack.append((dependencies[index], child_prefix, index == last_index, depth + 1))
+    
+    def distances_from(self, start_id):
+        """
+        Расстояния от вершины до всех достижимых вершин (поиск в ширину)
+        
+        Args:
+            start_id (int): Идентификатор начальной вершины
+            
+        Returns:
+            list: Расстояние для каждой вершины (-1 для недостижимых)
+        """
+        distances = [-1] * len(self.compact)
+        distances[start_id] = 0
+        queue = deque([start_id])
+        
+        while queue:
+            node_id = queue.popleft()
+            next_distance = distances[node_id] + 1
+            for dep_id in self.compact.successors(node_id):
+                if distances[dep_id] == -1:
+                    distances[dep_id] = next_distance
+                    queue.append(dep_id)
+        
+        return distances
+    
+    def get_condensation(self):
+        """
+        Получение графа конденсации (DAG компонент сильной связности)
         
-        if package in self.graph:
-            dependencies = self.graph[package]
-            for i, dep in enumerate(dependencies):
-                is_last = i == len(dependencies) - 1
-                new_prefix = prefix + ("    " if is_last else "│   ")
-                self._print_tree_recursive(dep, new_prefix, visited.copy())
+        Компоненты вычисляются алгоритмом Тарьяна за O(V + E) один раз
+        после построения графа.
+        
+        Returns:
+            Condensation: Граф конденсации
+        """
+        if self._condensation is None:
+            with instrumentation.phase('condensation'):
+                self._condensation = self.compact.condensation()
+        return self._condensation
+    
+    def get_strongly_connected_components(self):
+        """
+        Получение циклических компонент сильной связности
+        
+        Returns:
+            list: Списки пакетов каждой циклической компоненты
+        """
+        condensation = self.get_condensation()
+        names = self.compact.names
+        return [
+            [names[node_id] for node_id in condensation.components[component_id]]
+            for component_id in condensation.cyclic_components()
+        ]
     
     def get_cycles(self):
-        """Получение списка обнаруженных циклов"""
-        return self.cycles
+        """
+        Получение списка обнаруженных циклов
+        
+        Для каждой циклической компоненты сильной связности возвращается
+        один упорядоченный цикл, начинающийся и заканчивающийся одним пакетом.
+        
+        Returns:
+            list: Циклы в виде списков имен пакетов
+        """
+        if self._cycles is None:
+            condensation = self.get_condensation()
+            names = self.compact.names
+            self._cycles = [
+                [names[node_id] for node_id in condensation.representative_cycle(component_id)]
+                for component_id in condensation.cyclic_components()
+            ]
+        return self._cycles
+    
+    def get_install_waves(self):
+        """
+        Порядок установки пакетов в виде волн
+        
+        Циклы сворачиваются в группы (компоненты сильной связности), которые
+        устанавливаются вместе. Волна - набор групп, не зависящих друг от
+        друга: их можно устанавливать или собирать параллельно, после того
+        как установлены все предыдущие волны. Время работы O(V + E).
+        
+        Returns:
+            list: Волны - списки групп, группа - список имен пакетов
+        """
+        condensation = self.get_condensation()
+        names = self.compact.names
+        levels = condensation.levels()
+        
+        waves = [[] for _ in range(max(levels) + 1)] if len(levels) else []
+        for component_id, members in enumerate(condensation.components):
+            waves[levels[component_id]].append([names[node_id] for node_id in members])
+        return waves
+    
+    def get_critical_path(self, weight=None):
+        """
+        Критический путь: цепочка групп с наибольшим суммарным весом
+        
+        Группы пути устанавливаются строго последовательно, поэтому его вес
+        ограничивает снизу время параллельной установки или сборки.
+        
+        Args:
+            weight (str): Вес пакета - 'size' (S:, размер файла), 'installed_size'
+                (I:, размер после установки) или None (каждый пакет весит 1)
+        
+        Returns:
+            tuple: (суммарный вес, группы пути от зависимостей к зависящим пакетам)
+        """
+        condensation = self.get_condensation()
+        names = self.compact.names
+        index = self.apk_parser.get_index() if weight else None
+        
+        weights = []
+        for members in condensation.components:
+            if weight is None:
+                weights.append(len(members))
+                continue
+            total = 0
+            for node_id in members:
+                record = index.get(names[node_id])
+                if record is not None:
+                    total += getattr(record, weight)
+            weights.append(total)
+        
+        total, path = condensation.longest_path(weights)
+        return total, [[names[node_id] for node_id in condensation.components[component_id]] for component_id in path]
     
     def has_cycles(self):
         """Проверка наличия циклических зависимостей"""
-        return len(self.cycles) > 0
\ No newline at end of file
+        return len(self.get_condensation().cyclic_components()) > 0
+
+def _mark_upstream(compact, start_ids):
+    """
+    Отметка вершин, из которых достижима хотя бы одна из начальных
+    
+    Args:
+        compact (CompactGraph): Граф
+        start_ids (list): Идентификаторы начальных вершин
+    
+    Returns:
+        bytearray: Флаг для каждой вершины графа (начальные вершины отмечены)
+    """
+    marked = bytearray(len(compact))
+    queue = deque()
+    for node_id in start_ids:
+        if not marked[node_id]:
+            marked[node_id] = 1
+            queue.append(node_id)
+    
+    while queue:
+        node_id = queue.popleft()
+        for source in compact.predecessors(node_id):
+            if not marked[source]:
+                marked[source] = 1
+                queue.append(source)
+    
+    return marked
+
+def _renumber(old_names, deleted, fresh):
+    """
+    Нумерация вершин обновленного графа
+    
+    Сохранившиеся вершины оставляют прежние идентификаторы, новые вершины
+    занимают освободившиеся места по возрастанию, а оставшиеся сверх того
+    добавляются в конец. Если свободных мест больше, чем новых вершин,
+    на них переносятся вершины с наибольшими идентификаторами.
+    
+    Args:
+        old_names (list): Имена вершин прежнего графа
+        deleted (list): Идентификаторы удаляемых вершин по возрастанию
+        fresh (list): Имена новых вершин
+    
+    Returns:
+        tuple: (имена вершин нового графа, пары (прежний, новый идентификатор)
+               перенесенных вершин)
+    """
+    names = list(old_names)
+    for position, name in zip(deleted, fresh):
+        names[position] = name
+    names.extend(fresh[len(deleted):])
+    
+    vacant = deleted[len(fresh):]
+    if not vacant:
+        return names, []
+    
+    size = len(names) - len(vacant)
+    vacant_set = set(vacant)
+    tail = [node_id for node_id in range(size, len(names)) if node_id not in vacant_set]
+    relocated = list(zip(tail, [position for position in vacant if position < size]))
+    for source, target in relocated:
+        names[target] = names[source]
+    del names[size:]
+    return names, relocated
+
+def _update_condensation(new, old_condensation, old_upstream, region, deleted, moves):
+    """
+    Граф конденсации обновленного графа
+    
+    Компоненты вне области пересчета сохраняют состав и взаимный порядок
+    и получают младшие номера: дуги из них ведут только в такие же
+    компоненты. Компоненты области находятся алгоритмом Тарьяна на ее
+    подграфе и нумеруются следом, что сохраняет обратный топологический
+    порядок.
+    
+    Args:
+        new (CompactGraph): Обновленный граф
+        old_condensation (Condensation): Граф конденсации прежнего графа
+        old_upstream (bytearray): Отметки прежнего графа: вершины выше затронутых
+        region (bytearray): Отметки нового графа: вершины области пересчета
+        deleted (set): Идентификаторы прежнего графа, отсутствующие в новом
+        moves (dict): Новые идентификаторы перенесенных вершин прежнего графа
+    
+    Returns:
+        tuple: (Condensation, пары (прежний, новый номер) сохраненных компонент)
+    """
+    renumbered = [-1] * len(old_condensation)
+    kept = []
+    components = []
+    for old_component, members in enumerate(old_condensation.components):
+        first = members[0]
+        # Компоненты целиком либо входят в область, либо нет
+        if old_upstream[first] or first in deleted or region[moves.get(first, first)]:
+            continue
+        renumbered[old_component] = len(components)
+        kept.append((old_component, len(components)))
+        if moves and not moves.keys().isdisjoint(members):
+            members = [moves.get(member, member) for member in members]
+        components.append(members)
+    
+    old_dag = old_condensation.dag
+    adjacency = [
+        [renumbered[successor] for successor in old_dag.successors(old_component)]
+        for old_component, _ in kept
+    ]
+    
+    _, recomputed = new.strongly_connected_components(compress(range(len(new)), region))
+    components.extend(recomputed)
+    component_of = array('I', [0]) * len(new)
+    for component_id, members in enumerate(components):
+        for member in members:
+            component_of[member] = component_id
+    
+    condensation = Condensation(new, component_of, components, adjacency)
+    return condensation, kept
+
+def _dependency_names(record):
+    """Имена, на которые ссылаются зависимости записи индекса"""
+    # Разбор версий нужен только при обновлении индекса: запрос
+    # по снимку обходится без загрузки apk_version
+    from apk_version import parse_dependency
+    names = []
+    for atom in record.depends:
+        constraint = parse_dependency(atom)
+        if constraint is not None:
+            names.append(constraint.name)
+    return names
@@ -0,0 +1,228 @@
+import io
+import os
+import instrumentation
+from exceptions import ValidationError, GraphRenderError
+
+IMAGE_FORMATS = {'.png': 'png', '.jpg': 'jpg', '.jpeg': 'jpg', '.svg': 'svg', '.pdf': 'pdf'}
+DOT_EXTENSIONS = {'.dot', '.gv'}
+# Граф большего размера автоматически обрезается по глубине, чтобы раскладка оставалась выполнимой
+AUTO_PRUNE_NODES = 2000
+DEFAULT_DOT_TIMEOUT = 120
+
+def quote_id(name):
+    """Экранирование имени пакета для использования в качестве идентификатора DOT"""
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def select_nodes(graph_builder, root_package, max_depth=None, max_nodes=AUTO_PRUNE_NODES):
+    """
+    Выбор вершин для отрисовки с обрезкой по глубине
+    
+    Если глубина не задана, а граф больше max_nodes вершин, выбирается
+    наибольшая глубина, при которой число вершин не превышает max_nodes.
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф
+        root_package (str): Корневой пакет
+        max_depth (int): Максимальное расстояние от корня
+        max_nodes (int): Порог автоматической обрезки
+    
+    Returns:
+        tuple: (bytearray отметок выбранных вершин, примененная глубина или None)
+    """
+    node_count = len(graph_builder.compact)
+    root_id = graph_builder.compact.ids.get(root_package)
+    if root_id is None:
+        return bytearray(b'\x01') * node_count, None
+    
+    distances = graph_builder.distances_from(root_id)
+    
+    if max_depth is None and node_count > max_nodes:
+        per_depth = {}
+        for distance in distances:
+            if distance >= 0:
+                per_depth[distance] = per_depth.get(distance, 0) + 1
+        
+        total = 0
+        max_depth = 0
+        for depth in sorted(per_depth):
+            total += per_depth[depth]
+            if total > max_nodes:
+                break
+            max_depth = depth
+    
+    selected = bytearray(node_count)
+    for node_id, distance in enumerate(distances):
+        if distance >= 0 and (max_depth is None or distance <= max_depth):
+            selected[node_id] = 1
+    
+    return selected, max_depth
+
+def write_dot(graph_builder, out, root_package, max_depth=None, max_degree=None):
+    """
+    Потоковая запись графа зависимостей в формате Graphviz DOT
+    
+    Вершины и дуги пишутся в поток по одной прямо из CSR-массивов графа,
+    текст целиком в памяти не строится. Циклические компоненты сильной
+    связности выделяются в кластеры.
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф
+        out: Текстовый поток вывода
+        root_package (str): Корневой пакет
+        max_depth (int): Максимальное расстояние от корня
+        max_degree (int): Дуги к пакетам с большим числом входящих дуг не рисуются
+    
+    Returns:
+        dict: Статистика: количество вершин и дуг, примененная глубина, скрытые дуги
+    """
+    compact = graph_builder.compact
+    names = compact.names
+    selected, applied_depth = select_nodes(graph_builder, root_package, max_depth)
+    
+    hubs = bytearray(len(compact))
+    if max_degree is not None:
+        for node_id in range(len(compact)):
+            if len(compact.predecessors(node_id)) > max_degree:
+                hubs[node_id] = 1
+    
+    out.write('digraph dependencies {\n')
+    out.write('    rankdir=LR;\n')
+    out.write('    node [shape=box, style=rounded, fontname="Helvetica"];\n')
+    
+    condensation = graph_builder.get_condensation()
+    clustered = bytearray(len(compact))
+    for cluster_number, component_id in enumerate(condensation.cyclic_components(), 1):
+        members = [node_id for node_id in condensation.components[component_id] if selected[node_id]]
+        if not members:
+            continue
+        out.write(f'    subgraph cluster_{cluster_number} {{\n')
+        out.write(f'        label="Цикл {cluster_number}";\n')
+        out.write('        style=dashed;\n        color=red;\n')
+        for node_id in members:
+            clustered[node_id] = 1
+            out.write(f'        {_node_statement(names[node_id], node_id, root_package, hubs, compact)}\n')
+        out.write('    }\n')
+    
+    node_total = 0
+    for node_id in range(len(compact)):
+        if not selected[node_id]:
+            continue
+        node_total += 1
+        if not clustered[node_id]:
+            out.write(f'    {_node_statement(names[node_id], node_id, root_package, hubs, compact)}\n')
+    
+    edge_total = 0
+    hidden_edges = 0
+    for node_id in range(len(compact)):
+        if not selected[node_id]:
+            continue
+        source = quote_id(names[node_id])
+        for target in compact.successors(node_id):
+            if not selected[target]:
+                continue
+            if hubs[target]:
+                hidden_edges += 1
+                continue
+            edge_total += 1
+            out.write(f'    {source} -> {quote_id(names[target])};\n')
+    
+    out.write('}\n')
+    
+    return {
+        'nodes': node_total,
+        'edges': edge_total,
+        'depth': applied_depth,
+        'hidden_edges': hidden_edges
+    }
+
+def _node_statement(name, node_id, root_package, hubs, compact):
+    """Описание вершины DOT с выделением корня и пакетов со скрытыми входящими дугами"""
+    attributes = []
+    if name == root_package:
+        attributes.append('style="rounded,bold"')
+    if hubs[node_id]:
+        # Перевод строки \n в метке - escape-последовательность DOT, поэтому добавляется после экранирования
+        label = quote_id(name)[:-1] + f'\\n(зависят: {len(compact.predecessors(node_id))})"'
+        attributes.append(f'label={label}')
+        attributes.append('style="rounded,filled"')
+        attributes.append('fillcolor=lightgrey')
+    if attributes:
+        return f"{quote_id(name)} [{', '.join(attributes)}];"
+    return f"{quote_id(name)};"
+
+@instrumentation.timed('render_graph')
+def render_graph(graph_builder, output_path, root_package, max_depth=None, max_degree=None,
+                 timeout=DEFAULT_DOT_TIMEOUT):
+    """
+    Сохранение графа зависимостей в файл
+    
+    Для расширений .dot/.gv записывается только текст DOT (Graphviz не нужен).
+    Для изображений DOT передается потоком во внешнюю программу dot; если
+    она не установлена, рядом с выходным файлом сохраняется файл .dot,
+    а запрошенное изображение считается не созданным (GraphRenderError).
+    
+    Args:
+        graph_builder (DependencyGraph): Построенный граф
+        output_path (str): Путь к выходному файлу
+        root_package (str): Корневой пакет
+        max_depth (int): Максимальное расстояние от корня
+        max_degree (int): Порог входящих дуг для скрытия дуг к пакету
+        timeout (int): Ограничение времени работы dot в секундах
+    
+    Returns:
+        tuple: (путь к созданному файлу, статистика записи)
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    
+    if extension in DOT_EXTENSIONS:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            stats = write_dot(graph_builder, f, root_package, max_depth, max_degree)
+        return output_path, stats
+    
+    image_format = IMAGE_FORMATS.get(extension)
+    if image_format is None:
+        raise ValidationError(f"Неподдерживаемое расширение файла: {extension}")
+    
+    # Модули запуска Graphviz нужны только для изображений
+    import shutil
+    import subprocess
+    import tempfile
+    
+    dot_binary = shutil.which('dot')
+    if dot_binary is None:
+        dot_path = os.path.splitext(output_path)[0] + '.dot'
+        with open(dot_path, 'w', encoding='utf-8') as f:
+            write_dot(graph_builder, f, root_package, max_depth, max_degree)
+        raise GraphRenderError(
+            f"Graphviz (dot) не найден, изображение {output_path} не создано; "
+            f"граф сохранен в формате DOT: {dot_path}"
+        )
+    
+    stats = None
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            [dot_binary, f'-T{image_format}', '-o', output_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=errors
+        )
+        try:
+            with io.TextIOWrapper(process.stdin, encoding='utf-8') as stdin:
+                stats = write_dot(graph_builder, stdin, root_package, max_depth, max_degree)
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise GraphRenderError(f"Graphviz не завершил раскладку графа за {timeout} с")
+        except BrokenPipeError:
+            process.wait()
+        
+        if process.returncode != 0:
+            errors.seek(0)
+            message = errors.read().decode('utf-8', 'replace').strip()
+            raise GraphRenderError(f"Ошибка Graphviz (код {process.returncode}): {message}")
+    
+    if not os.path.exists(output_path):
+        raise GraphRenderError(f"Graphviz не создал файл: {output_path}")
+    
+    return output_path, stats
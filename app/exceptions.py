@@ -12,4 +12,8 @@ class PackageNotFoundError(Exception):
 
 class APKParseError(Exception):
     """Ошибка парсинга APK данных"""
+    pass
+
+class GraphRenderError(Exception):
+    """Ошибка сохранения изображения графа"""
     pass
\ No newline at end of file
@@ -0,0 +1,159 @@
+import sys
+from array import array
+from closures import count_bits, ids_from_bits
+
+# Множества меньше этого размера суммируются по идентификаторам пакетов,
+# большие - по битовым плоскостям размеров
+PLANE_MIN_PACKAGES = 64
+
+# Таблицы перевода байта в ASCII-цифру '1'/'0' по значению каждого из его битов
+_BIT_DIGITS = tuple(bytes(0x31 if value >> bit & 1 else 0x30 for value in range(256)) for bit in range(8))
+
+def totals_record(totals):
+    """Итоги FootprintIndex (количество, S:, I:) в виде объекта JSON"""
+    count, size, installed_size = totals
+    return {'packages': count, 'size': size, 'installed_size': installed_size}
+
+def weight_planes(weights):
+    """
+    Битовые плоскости весов: плоскость j - битовое множество вершин,
+    у веса которых установлен разряд j
+    
+    Плоскости строятся без цикла по вершинам: из байтового представления
+    массива срезом выбирается нужный байт каждого веса, который переводится
+    таблицей в двоичную запись числа.
+    
+    Args:
+        weights (array): Веса вершин (array('Q'))
+    
+    Returns:
+        list: Битовые множества плоскостей, начиная с младшего разряда
+    """
+    raw = weights.tobytes()
+    planes = []
+    for bit in range(max(weights, default=0).bit_length()):
+        byte = bit >> 3
+        if sys.byteorder == 'big':
+            byte = weights.itemsize - 1 - byte
+        digits = raw[byte::weights.itemsize].translate(_BIT_DIGITS[bit & 7])
+        planes.append(int(digits[::-1] or b'0', 2))
+    return planes
+
+class FootprintIndex:
+    """
+    Размеры пакетов и их наборов установки
+    
+    Размеры берутся из полей S: (размер файла пакета) и I: (размер после
+    установки) индекса. Набор установки пакета - сам пакет и его транзитивное
+    замыкание. Суммы считаются по битовым множествам ClosureIndex, поэтому
+    граф повторно не обходится, а итоги наборов установки запоминаются
+    для каждой компоненты сильной связности.
+    
+    Сумма размеров большого множества вычисляется по битовым плоскостям:
+    sum(2**j * |множество & плоскость j|). Время не зависит от количества
+    пакетов множества - несколько десятков операций над целыми числами.
+    """
+    
+    def __init__(self, names, index, closures):
+        """
+        Args:
+            names (list): Имена пакетов по идентификаторам вершин
+            index (dict): Индекс в формате {пакет: PackageRecord}
+            closures (ClosureIndex): Индекс прямых замыканий того же графа
+        """
+        self.closures = closures
+        self.sizes = array('Q')
+        self.installed_sizes = array('Q')
+        for name in names:
+            record = index.get(name)
+            self.sizes.append(record.size if record is not None else 0)
+            self.installed_sizes.append(record.installed_size if record is not None else 0)
+        self._size_planes = weight_planes(self.sizes)
+        self._installed_planes = weight_planes(self.installed_sizes)
+        self._component_totals = [None] * len(closures.condensation)
+    
+    def install_bits(self, node_id):
+        """
+        Набор установки пакета: сам пакет и его транзитивное замыкание
+        
+        Пакет вне цикла - единственный пакет своей компоненты, а пакет цикла
+        достигает всех пакетов компоненты, поэтому в обоих случаях набор
+        состоит из пакетов компоненты и достижимых из нее пакетов.
+        
+        Args:
+            node_id (int): Идентификатор пакета
+        
+        Returns:
+            int: Битовое множество пакетов
+        """
+        component_id = self.closures.condensation.component_of[node_id]
+        return self.closures.component_reach(component_id) | self.closures.member_bits(component_id)
+    
+    def union_bits(self, node_ids):
+        """Объединение наборов установки нескольких пакетов"""
+        bits = 0
+        for node_id in node_ids:
+            bits |= self.install_bits(node_id)
+        return bits
+    
+    def totals(self, bits):
+        """
+        Суммарные размеры пакетов битового множества
+        
+        Args:
+            bits (int): Битовое множество пакетов
+        
+        Returns:
+            tuple: (количество пакетов, сумма S:, сумма I:)
+        """
+        count = count_bits(bits)
+        if count < PLANE_MIN_PACKAGES:
+            ids = ids_from_bits(bits)
+            return (
+                count,
+                sum(map(self.sizes.__getitem__, ids)),
+                sum(map(self.installed_sizes.__getitem__, ids))
+            )
+        
+        return (
+            count,
+            _plane_sum(bits, self._size_planes),
+            _plane_sum(bits, self._installed_planes)
+        )
+    
+    def install_totals(self, node_id):
+        """
+        Размеры набора установки пакета (запоминаются по компонентам)
+        
+        Args:
+            node_id (int): Идентификатор пакета
+        
+        Returns:
+            tuple: (количество пакетов, сумма S:, сумма I:)
+        """
+        component_id = self.closures.condensation.component_of[node_id]
+        totals = self._component_totals[component_id]
+        if totals is None:
+            totals = self.totals(self.install_bits(node_id))
+            self._component_totals[component_id] = totals
+        return totals
+    
+    def marginal_totals(self, node_id, installed_bits):
+        """
+        Размеры пакетов, которые добавит установка пакета к уже установленным
+        
+        Args:
+            node_id (int): Идентификатор пакета
+            installed_bits (int): Битовое множество установленных пакетов
+                (например, union_bits от пакетов базового образа)
+        
+        Returns:
+            tuple: (количество пакетов, сумма S:, сумма I:)
+        """
+        if not installed_bits:
+            return self.install_totals(node_id)
+        return self.totals(self.install_bits(node_id) & ~installed_bits)
+
+def _plane_sum(bits, planes):
+    """Сумма весов вершин множества по битовым плоскостям весов"""
+    return sum(count_bits(bits & plane) << bit for bit, plane in enumerate(planes))
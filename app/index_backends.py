@@ -0,0 +1,412 @@
+import codecs
+import io
+import json
+import re
+import instrumentation
+from apkindex import PackageRecord, iter_stanzas
+from exceptions import APKParseError
+
+# Размер блока, читаемого из потока JSON за одну операцию
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Количество байт начала потока, по которым определяется формат индекса
+SNIFF_SIZE = 512
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Остаток буфера, которым может продолжаться разобранное число ("1." + "5", "1.5e" + "10")
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+# Наибольшее расстояние от конца буфера до позиции ошибки разбора, когда значение
+# лишь обрезано границей буфера: незаконченный литерал ("fals") или \u-escape
+# суррогатной пары ("\ud83d\ude0"). Ошибка раньше этой позиции - синтаксическая
+_TRUNCATION_MARGIN = 12
+
+class IndexBackend:
+    """
+    Формат индекса репозитория
+    
+    Каждый формат разбирает поток в один и тот же индекс {пакет: PackageRecord},
+    поэтому DependencyGraph и остальные модули не зависят от формата источника.
+    """
+    
+    name = None
+    
+    def detect(self, head):
+        """
+        Проверка, записан ли поток в этом формате
+        
+        Args:
+            head (bytes): Начало потока без ведущих пробельных символов
+        """
+        raise NotImplementedError
+    
+    def parse(self, stream):
+        """
+        Разбор бинарного потока в индекс пакетов
+        
+        Args:
+            stream: Бинарный файловый объект
+        
+        Returns:
+            dict: Индекс в формате {пакет: PackageRecord}
+        """
+        raise NotImplementedError
+
+class ApkIndexBackend(IndexBackend):
+    """Текстовый формат APKINDEX Alpine Linux"""
+    
+    name = 'apkindex'
+    
+    def detect(self, head):
+        return head[:2] in (b'C:', b'P:')
+    
+    def parse(self, stream):
+        stanzas = iter_stanzas(stream)
+        recorder = instrumentation.active()
+        if recorder is not None:
+            stanzas = recorder.counted(stanzas, 'stanzas_parsed')
+        return self._build_index(stanzas)
+    
+    def _build_index(self, stanzas):
+        """
+        Построение индекса пакетов из потока секций APKINDEX
+        
+        Args:
+            stanzas (iterable): Секции в формате {поле: значение}
+        
+        Returns:
+            dict: Индекс в формате {пакет: PackageRecord}
+        """
+        index = {}
+        
+        for stanza in stanzas:
+            package_name = stanza.get('P')
+            if not package_name or package_name in index:
+                continue
+            
+            index[package_name] = PackageRecord(
+                package_name,
+                stanza.get('V'),
+                self._extract_dependencies(stanza.get('D')),
+                tuple(stanza.get('p', '').split()),
+                _parse_integer(stanza.get('k')),
+                stanza.get('C'),
+                _parse_integer(stanza.get('S')),
+                _parse_integer(stanza.get('I'))
+            )
+        
+        return index
+    
+    def _extract_dependencies(self, deps_line):
+        """
+        Извлечение зависимостей из строки D: секции пакета
+        
+        Атомы сохраняются как есть, вместе с операторами версий и маркерами
+        конфликтов "!": они разбираются в ограничения функцией parse_dependency
+        (один раз на каждую уникальную строку). Виртуальные имена с префиксами
+        so: (библиотеки), pc: (pkg-config) и cmd: (команды) разрешаются через индекс p:.
+        
+        Args:
+            deps_line (str): Значение поля D: или None
+        
+        Returns:
+            tuple: Атомы зависимостей пакета
+        """
+        if not deps_line:
+            return ()
+        
+        # Разделяем зависимости по пробелам, повторы отбрасываем
+        return tuple(dict.fromkeys(deps_line.split()))
+
+class JsonIndexBackend(IndexBackend):
+    """
+    Репозиторий в формате JSON
+    
+    Пакеты описываются в разделе "packages" - объектом {имя: пакет} или
+    списком пакетов, либо весь документ является списком пакетов. Поля пакета: name, version, dependencies (атомы в
+    синтаксисе apk, например "numpy" или "numpy>=1.24"), а также
+    необязательные provides, provider_priority, checksum, size и installed_size
+    (размеры в байтах, как S: и I: в APKINDEX). Остальные поля
+    и разделы документа пропускаются.
+    
+    Документ читается по частям: в памяти одновременно находится только
+    один пакет, поэтому размер дампа ограничен диском, а не памятью.
+    """
+    
+    name = 'json'
+    
+    def detect(self, head):
+        return head[:1] in (b'{', b'[')
+    
+    def parse(self, stream):
+        index = {}
+        packages = _iter_json_packages(_JsonStream(stream))
+        recorder = instrumentation.active()
+        if recorder is not None:
+            packages = recorder.counted(packages, 'stanzas_parsed')
+        
+        for key, package in packages:
+            record = _record_from_json(key, package)
+            if record is not None and record.name not in index:
+                index[record.name] = record
+        
+        return index
+
+# Форматы в порядке проверки; APKINDEX используется, если формат не распознан
+INDEX_BACKENDS = (JsonIndexBackend(), ApkIndexBackend())
+
+def detect_backend(stream):
+    """
+    Определение формата индекса по началу потока
+    
+    Args:
+        stream: Бинарный файловый объект с поддержкой peek (io.BufferedReader)
+    
+    Returns:
+        IndexBackend: Формат индекса
+    """
+    head = stream.peek(SNIFF_SIZE)[:SNIFF_SIZE]
+    head = head.lstrip(codecs.BOM_UTF8).lstrip()
+    for backend in INDEX_BACKENDS:
+        if backend.detect(head):
+            return backend
+    return INDEX_BACKENDS[-1]
+
+def parse_index_stream(stream):
+    """
+    Разбор потока индекса в формате, определенном по его содержимому
+    
+    Args:
+        stream: Бинарный файловый объект
+    
+    Returns:
+        dict: Индекс в формате {пакет: PackageRecord}
+    """
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    return detect_backend(stream).parse(stream)
+
+def _parse_integer(value):
+    """Разбор целочисленного поля (k:, S:, I:), по умолчанию 0"""
+    try:
+        return int(value) if value else 0
+    except (TypeError, ValueError):
+        return 0
+
+def _record_from_json(key, package):
+    """
+    Запись индекса для пакета из документа JSON
+    
+    Args:
+        key (str): Ключ пакета в разделе packages или None для списка
+        package (dict): Описание пакета
+    
+    Returns:
+        PackageRecord: Запись о пакете или None, если у пакета нет имени
+    """
+    if not isinstance(package, dict):
+        raise APKParseError("Описание пакета в репозитории JSON должно быть объектом")
+    
+    name = package.get('name') or key
+    if not isinstance(name, str) or not name:
+        return None
+    
+    dependencies = package.get('dependencies') or []
+    provides = package.get('provides') or []
+    if not isinstance(dependencies, list) or not isinstance(provides, list):
+        raise APKParseError(f"Поля dependencies и provides пакета {name} должны быть списками")
+    
+    version = package.get('version')
+    checksum = package.get('checksum')
+    return PackageRecord(
+        name,
+        str(version) if version is not None else None,
+        tuple(dict.fromkeys(str(atom) for atom in dependencies)),
+        tuple(str(entry) for entry in provides),
+        _parse_integer(package.get('provider_priority')),
+        str(checksum) if checksum is not None else None,
+        _parse_integer(package.get('size')),
+        _parse_integer(package.get('installed_size'))
+    )
+
+def _iter_json_packages(reader):
+    """
+    Перечисление пакетов раздела packages документа JSON
+    
+    Args:
+        reader (_JsonStream): Поток документа
+    
+    Yields:
+        tuple: (ключ пакета или None, описание пакета)
+    """
+    document = reader.next_char()
+    if document == '[':
+        for _ in reader.iter_array():
+            yield None, reader.read_value()
+        return
+    if document != '{':
+        raise APKParseError("Репозиторий JSON должен быть объектом или списком пакетов")
+    
+    for key in reader.iter_object_keys():
+        if key != 'packages':
+            reader.skip_value()
+            continue
+        
+        container = reader.next_char()
+        if container == '{':
+            for name in reader.iter_object_keys():
+                yield name, reader.read_value()
+        elif container == '[':
+            for _ in reader.iter_array():
+                yield None, reader.read_value()
+        else:
+            raise APKParseError("Раздел packages должен быть объектом или списком")
+
+class _JsonStream:
+    """
+    Чтение документа JSON из бинарного потока по частям
+    
+    Контейнеры верхних уровней обходятся по одному элементу, а элементы
+    (описания пакетов) разбираются json.JSONDecoder из буфера, который
+    дочитывается, пока элемент не поместится в него целиком.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self, size=JSON_CHUNK_SIZE):
+        """Дочитывание потока в буфер; False, если данные закончились"""
+        if self._eof:
+            return False
+        
+        data = self._stream.read(size)
+        text = self._decoder.decode(data, final=not data)
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        if not data:
+            self._eof = True
+        return True
+    
+    def _skip_whitespace(self):
+        """Пропуск пробельных символов; False, если документ закончился"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return True
+            if not self._fill():
+                return False
+    
+    def peek_char(self):
+        """Следующий значимый символ без его извлечения ('' в конце документа)"""
+        if not self._skip_whitespace():
+            return ''
+        return self._buffer[self._pos]
+    
+    def next_char(self):
+        """Извлечение следующего значимого символа"""
+        char = self.peek_char()
+        if not char:
+            raise APKParseError("Неожиданный конец документа JSON")
+        self._pos += 1
+        return char
+    
+    def read_value(self):
+        """Разбор следующего значения целиком"""
+        self._skip_whitespace()
+        size = JSON_CHUNK_SIZE
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Значение могло не поместиться в буфер; синтаксическая ошибка
+                # в середине буфера сообщается сразу, без чтения остатка потока
+                if self._is_truncated(e) and self._fill(size):
+                    size *= 2
+                    continue
+                raise APKParseError(f"Ошибка разбора JSON репозитория: {e.msg}")
+            
+            # Значение на границе буфера может продолжаться в следующем блоке:
+            # число, обрезанное после "1." или "1.5e", разбирается как более
+            # короткое, и за ним в буфере остается начало его продолжения
+            if self._may_continue(value, end) and self._fill(size):
+                size *= 2
+                continue
+            
+            self._pos = end
+            return value
+    
+    def _is_truncated(self, error):
+        """Проверка, вызвана ли ошибка разбора концом буфера, а не синтаксисом документа"""
+        if error.msg.startswith('Unterminated string'):
+            # Позиция ошибки - начало строки, которая продолжается за концом буфера
+            return True
+        return error.pos >= len(self._buffer) - _TRUNCATION_MARGIN
+    
+    def _may_continue(self, value, end):
+        """Проверка, может ли значение, разобранное до позиции end, продолжаться за концом буфера"""
+        if end == len(self._buffer):
+            return True
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return _NUMBER_TAIL.match(self._buffer, end) is not None
+        return False
+    
+    def skip_value(self):
+        """Пропуск следующего значения без построения вложенных контейнеров целиком"""
+        char = self.peek_char()
+        if char == '{':
+            self._pos += 1
+            for _ in self.iter_object_keys():
+                self.skip_value()
+        elif char == '[':
+            self._pos += 1
+            for _ in self.iter_array():
+                self.skip_value()
+        else:
+            self.read_value()
+    
+    def iter_object_keys(self):
+        """
+        Перечисление ключей объекта, открывающая скобка которого уже прочитана
+        
+        После каждого ключа вызывающий код должен прочитать или пропустить значение.
+        """
+        if self.peek_char() == '}':
+            self._pos += 1
+            return
+        
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str) or self.next_char() != ':':
+                raise APKParseError("Ошибка разбора JSON репозитория: ожидался ключ объекта")
+            yield key
+            
+            separator = self.next_char()
+            if separator == '}':
+                return
+            if separator != ',':
+                raise APKParseError("Ошибка разбора JSON репозитория: ожидалась ',' или '}'")
+    
+    def iter_array(self):
+        """
+        Перечисление элементов списка, открывающая скобка которого уже прочитана
+        
+        На каждом шаге вызывающий код должен прочитать или пропустить элемент.
+        """
+        if self.peek_char() == ']':
+            self._pos += 1
+            return
+        
+        while True:
+            yield
+            
+            separator = self.next_char()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise APKParseError("Ошибка разбора JSON репозитория: ожидалась ',' или ']'")
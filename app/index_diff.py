@@ -0,0 +1,57 @@
+class IndexDiff:
+    """
+    Различия между двумя версиями индекса репозитория
+    
+    added - пакеты, появившиеся в новом индексе, removed - удаленные,
+    changed - пакеты с изменившейся записью (другая контрольная сумма C:),
+    relinked - имена (пакетов и виртуальные), которые теперь разрешаются
+    в другой пакет: зависимости на них нужно разрешить заново.
+    """
+    
+    def __init__(self, added=(), removed=(), changed=(), relinked=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+        self.relinked = set(relinked)
+    
+    def is_empty(self):
+        """Проверка отсутствия изменений"""
+        return not (self.added or self.removed or self.changed or self.relinked)
+    
+    def __repr__(self):
+        return (
+            f"IndexDiff(added={len(self.added)}, removed={len(self.removed)}, "
+            f"changed={len(self.changed)}, relinked={len(self.relinked)})"
+        )
+
+def diff_indexes(old_index, new_index, old_providers, new_providers):
+    """
+    Сравнение двух версий индекса по контрольным суммам секций
+    
+    Args:
+        old_index (dict): Прежний индекс {пакет: PackageRecord}
+        new_index (dict): Новый индекс {пакет: PackageRecord}
+        old_providers (dict): Прежний индекс {виртуальное имя: пакет-поставщик}
+        new_providers (dict): Новый индекс {виртуальное имя: пакет-поставщик}
+    
+    Returns:
+        IndexDiff: Различия между индексами
+    """
+    added = [name for name in new_index if name not in old_index]
+    removed = [name for name in old_index if name not in new_index]
+    changed = [
+        name for name, record in new_index.items()
+        if name in old_index and not record.same_as(old_index[name])
+    ]
+    
+    # Появление или исчезновение настоящего пакета меняет разрешение его имени
+    relinked = set(added)
+    relinked.update(removed)
+    for name, provider in new_providers.items():
+        if old_providers.get(name) != provider:
+            relinked.add(name)
+    for name in old_providers:
+        if name not in new_providers:
+            relinked.add(name)
+    
+    return IndexDiff(added, removed, changed, relinked)
@@ -0,0 +1,77 @@
+import csv
+import json
+import sys
+
+# Столбцы CSV: номер волны, номер группы, пакет, входит ли группа в критический путь
+CSV_FIELDS = ('wave', 'group', 'package', 'critical')
+
+# Единицы веса критического пути для текстового вывода
+WEIGHT_UNITS = {
+    'size': 'байт (S:)',
+    'installed_size': 'байт (I:)',
+    None: 'пакетов',
+}
+
+def write_install_plan(waves, critical_total, critical_path, weight=None, output_format='text', out=None):
+    """
+    Вывод порядка установки: волн и критического пути
+    
+    Args:
+        waves (list): Волны - списки групп пакетов (DependencyGraph.get_install_waves)
+        critical_total (int): Вес критического пути
+        critical_path (list): Группы критического пути от зависимостей к зависящим
+        weight (str): Вес пакета - 'size', 'installed_size' или None (количество пакетов)
+        output_format (str): text, json, ndjson или csv
+        out: Поток вывода (по умолчанию стандартный вывод)
+    """
+    out = out or sys.stdout
+    writers = {
+        'text': _write_text,
+        'json': _write_json,
+        'ndjson': _write_ndjson,
+        'csv': _write_csv,
+    }
+    writers[output_format](out, waves, critical_total, critical_path, weight)
+    out.flush()
+
+def _critical_summary(critical_total, critical_path, weight):
+    return {'weight': weight or 'count', 'total': critical_total, 'groups': critical_path}
+
+def _write_text(out, waves, critical_total, critical_path, weight):
+    package_count = sum(len(group) for wave in waves for group in wave)
+    out.write(f"Порядок установки: волн {len(waves)}, пакетов {package_count}\n")
+    
+    for number, wave in enumerate(waves, 1):
+        items = [group[0] if len(group) == 1 else f"[{', '.join(group)}]" for group in wave]
+        out.write(f"  Волна {number} ({len(wave)}): {', '.join(items)}\n")
+    
+    out.write(f"\nКритический путь: {critical_total} {WEIGHT_UNITS[weight]}, групп {len(critical_path)}\n")
+    chain = [group[0] if len(group) == 1 else f"[{', '.join(group)}]" for group in critical_path]
+    out.write(f"  {' -> '.join(chain)}\n")
+
+def _write_json(out, waves, critical_total, critical_path, weight):
+    document = {'waves': waves, 'critical_path': _critical_summary(critical_total, critical_path, weight)}
+    out.write(json.dumps(document, ensure_ascii=False))
+    out.write('\n')
+
+def _write_ndjson(out, waves, critical_total, critical_path, weight):
+    # Волны выводятся по одной в строке: планировщик может начинать работу до конца вывода
+    for number, wave in enumerate(waves, 1):
+        out.write(json.dumps({'wave': number, 'groups': wave}, ensure_ascii=False))
+        out.write('\n')
+    out.write(json.dumps({'critical_path': _critical_summary(critical_total, critical_path, weight)}, ensure_ascii=False))
+    out.write('\n')
+
+def _write_csv(out, waves, critical_total, critical_path, weight):
+    critical = {package for group in critical_path for package in group}
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(CSV_FIELDS)
+    
+    group_number = 0
+    for wave_number, wave in enumerate(waves, 1):
+        for group in wave:
+            group_number += 1
+            writer.writerows(
+                (wave_number, group_number, package, int(package in critical))
+                for package in group
+            )
@@ -0,0 +1,168 @@
+import _thread
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# Общий пустой контекст этапа: при выключенных замерах этапы ничего не делают
+_NO_PHASE = nullcontext()
+
+# Текущий сборщик замеров или None, если замеры выключены
+_current = None
+
+class Instrumentation:
+    """
+    Счетчики и таймеры этапов работы приложения
+    
+    Время этапа включает вложенные этапы. Этапы могут выполняться
+    в нескольких потоках (параллельная загрузка репозиториев), поэтому
+    изменения общих данных выполняются под блокировкой.
+    """
+    
+    def __init__(self, trace=False):
+        self.counters = {}
+        # Таймеры этапов {этап: [количество, суммарное время в секундах]}
+        self.timers = {}
+        # События для Chrome trace собираются только по запросу
+        self.events = [] if trace else None
+        self._lock = _thread.allocate_lock()
+        self._origin = time.perf_counter()
+    
+    def count(self, name, value=1):
+        """Увеличение счетчика"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def add_time(self, name, seconds, calls=1):
+        """Добавление времени, замеренного вне контекста phase"""
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+    
+    @contextmanager
+    def phase(self, name):
+        """Замер времени этапа"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                timer = self.timers.setdefault(name, [0, 0.0])
+                timer[0] += 1
+                timer[1] += end - start
+                if self.events is not None:
+                    self.events.append({
+                        'name': name,
+                        'ph': 'X',
+                        'ts': (start - self._origin) * 1e6,
+                        'dur': (end - start) * 1e6,
+                        'pid': os.getpid(),
+                        'tid': _thread.get_ident()
+                    })
+    
+    def counted(self, items, name):
+        """
+        Подсчет элементов итератора по мере их выдачи
+        
+        Args:
+            items (iterable): Исходные элементы
+            name (str): Имя счетчика
+        
+        Yields:
+            Элементы исходного итератора
+        """
+        total = 0
+        try:
+            for item in items:
+                total += 1
+                yield item
+        finally:
+            self.count(name, total)
+    
+    def report(self, out=None):
+        """Вывод таймеров и счетчиков"""
+        out = out or sys.stderr
+        out.write("\nСтатистика выполнения:\n")
+        for name, (calls, seconds) in self.timers.items():
+            out.write(f"  {name:<24} {seconds:10.4f} с  вызовов: {calls}\n")
+        for name, value in self.counters.items():
+            out.write(f"  {name:<24} {value}\n")
+        out.flush()
+    
+    def write_chrome_trace(self, path):
+        """
+        Сохранение этапов в формате Chrome trace (chrome://tracing, Perfetto)
+        
+        Args:
+            path (str): Путь к файлу JSON
+        """
+        with self._lock:
+            events = list(self.events or ())
+            counters = dict(self.counters)
+        
+        pid = os.getpid()
+        end = (time.perf_counter() - self._origin) * 1e6
+        # Итоговые значения счетчиков - событие типа C в конце трассы
+        if counters:
+            events.append({'name': 'counters', 'ph': 'C', 'ts': end, 'pid': pid, 'args': counters})
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+def enable(trace=False):
+    """
+    Включение замеров
+    
+    Args:
+        trace (bool): Собирать события этапов для Chrome trace
+    
+    Returns:
+        Instrumentation: Сборщик замеров
+    """
+    global _current
+    _current = Instrumentation(trace)
+    return _current
+
+def disable():
+    """Выключение замеров"""
+    global _current
+    _current = None
+
+def active():
+    """Текущий сборщик замеров или None, если замеры выключены"""
+    return _current
+
+def phase(name):
+    """Контекст замера этапа (пустой, если замеры выключены)"""
+    if _current is None:
+        return _NO_PHASE
+    return _current.phase(name)
+
+def timed(name):
+    """
+    Декоратор замера времени функции как этапа
+    
+    Используется для крупных операций (разбор индекса, построение графа),
+    поэтому проверка включенности замеров при вызове не заметна.
+    
+    Args:
+        name (str): Имя этапа
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current is None:
+                return func(*args, **kwargs)
+            with _current.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1):
+    """Увеличение счетчика (ничего не делает, если замеры выключены)"""
+    if _current is not None:
+        _current.count(name, value)
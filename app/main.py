@@ -2,32 +2,64 @@
 
 import sys
 import os
+from contextlib import redirect_stdout
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from cli import setup_arg_parser, validate_arguments, print_configuration
-from repository import RepositoryManager
-from apk_parser import APKParser
-from dependency_graph import DependencyGraph
-from exceptions import ValidationError, RepositoryError, PackageNotFoundError, APKParseError
+# Модули режимов (разбор индекса, сеть, рендеринг, сервер, пул процессов)
+# импортируются в функциях режимов: короткий запуск загружает только нужные
+from cli import setup_arg_parser, validate_arguments, print_configuration, is_batch_mode
+import instrumentation
+from exceptions import ValidationError, RepositoryError, PackageNotFoundError, APKParseError, GraphRenderError
 
 def main():
     parser = setup_arg_parser()
+    args = None
+    profiler = None
     
     try:
         args = parser.parse_args()
         
         validate_arguments(args)
         
+        profiler = start_instrumentation(args)
+        
+        if args.serve:
+            run_server_mode(args)
+            return
+        
+        if args.arch:
+            run_multi_arch_mode(args)
+            return
+        
+        if args.install_order:
+            run_install_order_mode(args)
+            return
+        
+        if is_batch_mode(args):
+            run_batch_mode(args)
+            return
+        
+        if args.format != 'text':
+            run_structured_mode(args)
+            return
+        
         print_configuration(args)
         
-        repo_manager = RepositoryManager(args.repo, args.test_repo_mode)
+        from dependency_graph import DependencyGraph
+        from dot_export import render_graph
         
-        apk_parser = APKParser(repo_manager)
+        repository_manager = create_repository_manager(args)
+        snapshot = open_index_snapshot(args, repository_manager)
+        if snapshot is not None:
+            apk_parser = snapshot
+        else:
+            from apk_parser import APKParser
+            apk_parser = APKParser(repository_manager)
         
         dependencies = apk_parser.get_package_dependencies(args.package)
-        apk_parser.print_dependencies(args.package, dependencies)
+        print_dependencies(args.package, dependencies)
         
         print("\n" + "="*50)
         print("ПОСТРОЕНИЕ ПОЛНОГО ГРАФА ЗАВИСИМОСТЕЙ")
@@ -51,18 +83,47 @@ def main():
         else:
             print("Циклические зависимости не обнаружены")
         
+        problems = graph_builder.get_constraint_problems(args.package)
+        if problems:
+            print(f"Нарушенных ограничений зависимостей: {len(problems)}")
+            for package, constraint, provider, kind in problems:
+                if kind == 'conflict':
+                    print(f"  {package}: конфликт {constraint} с устанавливаемым пакетом {provider}")
+                else:
+                    version = apk_parser.get_provided_version(constraint.name)
+                    print(f"  {package}: {constraint} не удовлетворяется ({provider} {version or 'без версии'})")
+        
+        repository_graph = None
         if args.reverse:
             print("\n" + "="*50)
             print("АНАЛИЗ ОБРАТНЫХ ЗАВИСИМОСТЕЙ (ЭТАП 4)")
             print("="*50)
-            graph_builder.print_reverse_dependencies(args.package)
+            if args.whole_repo:
+                repository_graph = DependencyGraph(apk_parser)
+                repository_graph.build_repository_graph()
+                repository_graph.print_reverse_dependencies(args.package)
+            else:
+                graph_builder.print_reverse_dependencies(args.package)
         
         if args.ascii_tree:
-            graph_builder.print_dependency_tree(args.package)
+            graph_builder.print_dependency_tree(args.package, args.max_depth)
+        
+        output_path, stats = render_graph(
+            graph_builder, args.output, args.package,
+            args.max_depth, args.max_degree, args.dot_timeout
+        )
+        print(f"\nГраф сохранен в файл: {output_path}")
+        if stats['depth'] is not None and args.max_depth is None:
+            print(f"  Граф слишком велик, изображение ограничено глубиной {stats['depth']}")
+        if stats['hidden_edges']:
+            print(f"  Скрыто дуг к пакетам с большим числом зависящих: {stats['hidden_edges']}")
         
         print("\nПриложение успешно завершило работу!")
         
-    except (ValidationError, RepositoryError, PackageNotFoundError, APKParseError) as e:
+        if snapshot is None and args.snapshot:
+            save_index_snapshot(repository_manager, apk_parser, repository_graph)
+        
+    except (ValidationError, RepositoryError, PackageNotFoundError, APKParseError, GraphRenderError) as e:
         print(f"Ошибка: {e}", file=sys.stderr)
         sys.exit(1)
     except KeyboardInterrupt:
@@ -71,6 +132,320 @@ def main():
     except Exception as e:
         print(f"Неожиданная ошибка: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args is not None:
+            finish_instrumentation(args, profiler)
+
+def print_dependencies(package_name, dependencies):
+    """
+    Вывод прямых зависимостей пакета в консоль
+    
+    Args:
+        package_name (str): Имя пакета
+        dependencies (list): Список зависимостей
+    """
+    print(f"\nПрямые зависимости пакета '{package_name}':")
+    if dependencies:
+        for i, dep in enumerate(dependencies, 1):
+            print(f"  {i}. {dep}")
+    else:
+        print("  Пакет не имеет зависимостей")
+
+def start_instrumentation(args):
+    """
+    Включение замеров этапов (--stats, --profile)
+    
+    Без этих флагов замеры выключены, а модули профилирования не импортируются.
+    
+    Returns:
+        cProfile.Profile: Запущенный профилировщик или None
+    """
+    if not (args.stats or args.profile):
+        return None
+    
+    trace = bool(args.profile) and args.profile.endswith('.json')
+    instrumentation.enable(trace=trace)
+    if not args.profile or trace:
+        return None
+    
+    # cProfile учитывает только основной поток; этапы других потоков
+    # (параллельная загрузка репозиториев) видны в Chrome trace
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def finish_instrumentation(args, profiler):
+    """Сохранение профиля и вывод статистики по завершении работы"""
+    recorder = instrumentation.active()
+    if recorder is None:
+        return
+    instrumentation.disable()
+    
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"Профиль cProfile сохранен: {args.profile}", file=sys.stderr)
+    elif args.profile:
+        recorder.write_chrome_trace(args.profile)
+        print(f"Трасса Chrome сохранена: {args.profile}", file=sys.stderr)
+    
+    if args.stats:
+        recorder.report(sys.stderr)
+
+def create_repository_manager(args):
+    """Создание менеджера репозиториев с учетом настроек кэша"""
+    from repository import RepositoryManager
+    from cache import IndexCache
+    
+    cache = None if args.no_cache else IndexCache(args.cache_dir)
+    repository_manager = RepositoryManager(args.repo, args.test_repo_mode, cache, args.refresh)
+    repository_manager.validate = not args.cached
+    return repository_manager
+
+def run_batch_mode(args):
+    """
+    Пакетный режим: граф всего репозитория строится один раз,
+    а результаты по каждому пакету выводятся в формате NDJSON
+    """
+    from apk_parser import APKParser
+    from dependency_graph import DependencyGraph
+    from batch import read_package_list, run_batch, run_closure_ranking, run_changed_closures, run_footprint
+    
+    # Предупреждения выводятся в stderr, чтобы не нарушать формат NDJSON
+    with redirect_stdout(sys.stderr):
+        repository_manager = create_repository_manager(args)
+        if args.changed_closures:
+            # Для сравнения граф сначала строится по прежнему индексу из кэша
+            repository_manager.validate = False
+            repository_manager.refresh = False
+        apk_parser = APKParser(repository_manager)
+        graph_builder = DependencyGraph(apk_parser)
+        graph_builder.build_repository_graph()
+        
+        if args.changed_closures:
+            repository_manager.validate = True
+            repository_manager.refresh = args.refresh
+            diff = apk_parser.reload()
+            changed = graph_builder.apply_index_diff(diff)
+    
+    if args.changed_closures:
+        run_changed_closures(graph_builder, diff, changed)
+    
+    if args.closure_ranking:
+        run_closure_ranking(graph_builder, args.closure_ranking)
+    
+    packages = read_package_list(args.packages, args.packages_file)
+    if not packages:
+        return
+    
+    if args.footprint:
+        missing = run_footprint(graph_builder, packages, args.installed)
+    else:
+        missing = run_batch(graph_builder, packages)
+    if missing:
+        print(f"Предупреждение: не найдено пакетов в репозитории: {missing}", file=sys.stderr)
+
+def run_install_order_mode(args):
+    """
+    Порядок установки: волны групп пакетов и критический путь по графу
+    пакета (--package) или всего репозитория
+    """
+    from apk_parser import APKParser
+    from dependency_graph import DependencyGraph
+    from install_order import write_install_plan
+    
+    with redirect_stdout(sys.stderr):
+        apk_parser = APKParser(create_repository_manager(args))
+        graph_builder = DependencyGraph(apk_parser)
+        if args.package:
+            # Отсутствующий корневой пакет - ошибка, а не предупреждение построителя графа
+            apk_parser.get_package_dependencies(args.package)
+            graph_builder.build_dependency_graph(args.package)
+        else:
+            graph_builder.build_repository_graph()
+    
+    path_weight = args.path_weight or 'size'
+    weight = None if path_weight == 'count' else path_weight
+    waves = graph_builder.get_install_waves()
+    critical_total, critical_path = graph_builder.get_critical_path(weight)
+    write_install_plan(waves, critical_total, critical_path, weight, args.format)
+
+def run_multi_arch_mode(args):
+    """
+    Многоархитектурный режим: графы архитектур строятся параллельно
+    в пуле процессов, различия замыканий и циклов с первой архитектурой
+    выводятся в формате NDJSON
+    """
+    import time
+    from batch import read_package_list
+    from multi_arch import arch_pool, build_arch_graphs, run_arch_diff
+    
+    packages = read_package_list(args.packages, args.packages_file) or None
+    arches = list(dict.fromkeys(args.arch))
+    
+    with arch_pool(arches, args.jobs) as executor:
+        start = time.perf_counter()
+        results = build_arch_graphs(
+            executor, arches, args.repo, args.test_repo_mode,
+            cache_dir=args.cache_dir, use_cache=not args.no_cache, refresh=args.refresh
+        )
+        elapsed = time.perf_counter() - start
+        
+        for result in results:
+            print(f"{result.arch}: пакетов {len(result.names)}, дуг {result.edge_count}, "
+                  f"циклов {len(result.cycles)}, построение {result.seconds:.2f} с", file=sys.stderr)
+        print(f"Общее время построения: {elapsed:.2f} с", file=sys.stderr)
+        
+        # Замыкания вычисляются и сравниваются в рабочих процессах
+        run_arch_diff(results, packages, executor=executor)
+    
+    if packages:
+        known = set().union(*(result.names for result in results))
+        missing = sum(1 for package in packages if package not in known)
+        if missing:
+            print(f"Предупреждение: не найдено пакетов ни в одной архитектуре: {missing}", file=sys.stderr)
+
+def run_structured_mode(args):
+    """
+    Анализ пакета с выводом результатов в машиночитаемом формате (json, ndjson, csv)
+    
+    В стандартный вывод попадают только результаты, сообщения и
+    предупреждения выводятся в stderr.
+    
+    Быстрый путь: если в кэше есть снимок графа репозитория, построенный
+    по актуальным индексам, граф пакета строится по нему - без загрузки
+    индекса и модулей его разбора. Запрос без снимка отвечает по индексу,
+    с параметром --snapshot снимок сохраняется для следующих запросов.
+    """
+    from dependency_graph import DependencyGraph
+    from output import create_writer
+    
+    package = args.package
+    repository_manager = create_repository_manager(args)
+    snapshot = open_index_snapshot(args, repository_manager)
+    
+    with redirect_stdout(sys.stderr):
+        if snapshot is not None:
+            apk_parser = snapshot
+        else:
+            from apk_parser import APKParser
+            apk_parser = APKParser(repository_manager)
+        dependencies = apk_parser.get_package_dependencies(package)
+        
+        graph_builder = DependencyGraph(apk_parser)
+        graph_builder.build_dependency_graph(package)
+        
+        reverse_graph = graph_builder
+        if args.reverse and args.whole_repo:
+            reverse_graph = DependencyGraph(apk_parser)
+            reverse_graph.build_repository_graph()
+    
+    closure = graph_builder.get_closure(package)
+    cycles = graph_builder.get_cycles()
+    stats = {
+        'packages': len(graph_builder.graph),
+        'edges': graph_builder.compact.edge_count,
+        'dependencies': len(dependencies),
+        'transitive_dependencies': len(closure),
+        'cycles': len(cycles)
+    }
+    
+    writer = create_writer(args.format)
+    writer.begin(package)
+    writer.write_names('dependency', package, dependencies)
+    writer.write_names('transitive_dependency', package, closure)
+    
+    if args.reverse:
+        reverse_dependencies = reverse_graph.get_reverse_dependencies(package)
+        reverse_closure = reverse_graph.get_closure(package, reverse=True)
+        writer.write_names('reverse_dependency', package, reverse_dependencies)
+        writer.write_names('transitive_reverse_dependency', package, reverse_closure)
+        stats['reverse_dependencies'] = len(reverse_dependencies)
+        stats['transitive_reverse_dependencies'] = len(reverse_closure)
+    
+    writer.write_cycles(cycles)
+    writer.write_stats(package, stats)
+    writer.end()
+    
+    if args.output:
+        from dot_export import render_graph
+        output_path, _ = render_graph(
+            graph_builder, args.output, package,
+            args.max_depth, args.max_degree, args.dot_timeout
+        )
+        print(f"Граф сохранен в файл: {output_path}", file=sys.stderr)
+    
+    if snapshot is None and args.snapshot:
+        repository_graph = reverse_graph if args.reverse and args.whole_repo else None
+        save_index_snapshot(repository_manager, apk_parser, repository_graph)
+
+def open_index_snapshot(args, repository_manager):
+    """
+    Снимок графа репозитория, по которому можно ответить на запрос пакета
+    без загрузки индекса
+    
+    Обратные зависимости по всему репозиторию требуют индекса, поэтому
+    для них снимок не используется.
+    
+    Returns:
+        IndexSnapshot: Снимок, содержащий запрошенный пакет, или None
+    """
+    if repository_manager.cache is None or (args.reverse and args.whole_repo):
+        return None
+    
+    from snapshot import load_snapshot
+    snapshot = load_snapshot(repository_manager)
+    if snapshot is None or not snapshot.has_package(args.package):
+        return None
+    return snapshot
+
+def save_index_snapshot(repository_manager, apk_parser, repository_graph=None):
+    """
+    Сохранение снимка графа репозитория для следующих запросов
+    
+    Вызывается после ответа на запрос с параметром --snapshot, обслуженного
+    по индексу: если индексы всех репозиториев есть в кэше, а снимка по ним
+    еще нет, строится граф всего репозитория. Построение занимает время
+    порядка разбора индекса, поэтому без --snapshot снимок не сохраняется.
+    Предупреждения о пакетах вне графа запрошенного пакета не выводятся:
+    ответ на запрос уже выведен.
+    
+    Args:
+        repository_manager (RepositoryManager): Менеджер репозиториев
+        apk_parser (APKParser): Парсер, по которому обслуживался запрос
+        repository_graph (DependencyGraph): Уже построенный граф всего репозитория
+    """
+    from snapshot import needs_snapshot, store_snapshot
+    if repository_manager.cache is None or not needs_snapshot(repository_manager):
+        return
+    
+    if repository_graph is None:
+        from dependency_graph import DependencyGraph
+        repository_graph = DependencyGraph(apk_parser)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            repository_graph.build_repository_graph()
+    with redirect_stdout(sys.stderr):
+        store_snapshot(repository_manager, repository_graph)
+
+def run_server_mode(args):
+    """
+    Режим сервера: индекс загружается один раз и остается в памяти,
+    запросы обслуживаются до прерывания процесса
+    """
+    import asyncio
+    from server import QueryServer, parse_address
+    
+    parse_address(args.serve)
+    
+    server = QueryServer(create_repository_manager(args), args.refresh_interval)
+    with redirect_stdout(sys.stderr):
+        server.snapshot, _ = server.load()
+    
+    try:
+        asyncio.run(server.serve(args.serve))
+    except asyncio.CancelledError:
+        print("Сервер остановлен", file=sys.stderr)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
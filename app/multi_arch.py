@@ -0,0 +1,245 @@
+import json
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from repository import RepositoryManager
+from cache import IndexCache
+from apk_parser import APKParser
+from closures import ClosureIndex, ids_from_bits
+from dependency_graph import DependencyGraph
+
+# Подстановка архитектуры в адреса репозиториев
+ARCH_PLACEHOLDER = '{arch}'
+
+class ArchGraph:
+    """
+    Результат построения графа одной архитектуры в рабочем процессе
+    
+    Между процессами передается только граф в формате CSR (массивы array
+    сериализуются pickle одним блоком байт, имена пакетов - один раз
+    в таблице names) и циклические компоненты: объем данных пропорционален
+    размеру индекса. Замыкания не передаются - они вычисляются по графу
+    конденсации в процессе, сравнивающем архитектуры.
+    """
+    
+    def __init__(self, arch, compact, cycles, seconds):
+        self.arch = arch
+        self.compact = compact
+        self.cycles = cycles
+        self.seconds = seconds
+        self._closures = None
+    
+    def __reduce__(self):
+        # Запомненные замыкания не передаются между процессами
+        return (ArchGraph, (self.arch, self.compact, self.cycles, self.seconds))
+    
+    @property
+    def names(self):
+        return self.compact.names
+    
+    @property
+    def edge_count(self):
+        return self.compact.edge_count
+    
+    def closure_bits(self, package):
+        """
+        Транзитивное замыкание пакета в виде битового множества
+        
+        Args:
+            package (str): Имя пакета
+        
+        Returns:
+            int: Битовое множество идентификаторов или None, если пакета нет в графе
+        """
+        node_id = self.compact.ids.get(package)
+        if node_id is None:
+            return None
+        if self._closures is None:
+            self._closures = ClosureIndex(self.compact.condensation())
+        return self._closures.closure_bits(node_id)
+    
+    def closure_names(self, package):
+        """Замыкание пакета в виде множества имен или None"""
+        bits = self.closure_bits(package)
+        if bits is None:
+            return None
+        names = self.names
+        return frozenset(names[dep_id] for dep_id in ids_from_bits(bits))
+    
+    def cycle_groups(self):
+        """Циклические компоненты в виде множеств имен пакетов"""
+        return {frozenset(self.names[node_id] for node_id in cycle) for cycle in self.cycles}
+
+def arch_repositories(repo_urls, arch):
+    """Адреса репозиториев архитектуры: подстановка имени архитектуры вместо {arch}"""
+    return [repo_url.replace(ARCH_PLACEHOLDER, arch) for repo_url in repo_urls]
+
+def build_arch_graph(arch, repo_urls, test_repo_mode, cache_dir, use_cache, refresh):
+    """
+    Загрузка индекса и построение графа всего репозитория одной архитектуры
+    
+    Выполняется в рабочем процессе, поэтому принимает и возвращает
+    только сериализуемые значения.
+    
+    Args:
+        arch (str): Архитектура
+        repo_urls (list): Репозитории архитектуры в порядке убывания приоритета
+        test_repo_mode (bool): Режим тестового репозитория
+        cache_dir (str): Каталог кэша индексов
+        use_cache (bool): Использовать кэш индексов
+        refresh (bool): Загрузить индекс заново
+    
+    Returns:
+        ArchGraph: Граф в формате CSR и циклы
+    """
+    start = time.perf_counter()
+    cache = IndexCache(cache_dir) if use_cache else None
+    
+    # Предупреждения выводятся в stderr, чтобы не нарушать формат NDJSON
+    with redirect_stdout(sys.stderr):
+        graph_builder = DependencyGraph(APKParser(RepositoryManager(repo_urls, test_repo_mode, cache, refresh)))
+        graph_builder.build_repository_graph()
+    
+    condensation = graph_builder.get_condensation()
+    cycles = [array('I', condensation.components[component_id]) for component_id in condensation.cyclic_components()]
+    
+    return ArchGraph(arch, graph_builder.compact, cycles, time.perf_counter() - start)
+
+def arch_pool(arches, jobs=None):
+    """
+    Пул процессов для построения и сравнения графов архитектур
+    
+    Args:
+        arches (list): Архитектуры
+        jobs (int): Количество рабочих процессов (по умолчанию - по числу ядер)
+    """
+    return ProcessPoolExecutor(max_workers=min(len(arches), jobs or os.cpu_count() or 1))
+
+def build_arch_graphs(executor, arches, repo_urls, test_repo_mode, cache_dir=None, use_cache=True, refresh=False):
+    """
+    Параллельное построение графов нескольких архитектур в пуле процессов
+    
+    Args:
+        executor (ProcessPoolExecutor): Пул процессов
+        arches (list): Архитектуры
+        repo_urls (list): Адреса репозиториев с подстановкой {arch}
+    
+    Returns:
+        list: ArchGraph в порядке архитектур
+    """
+    futures = [
+        executor.submit(
+            build_arch_graph, arch, arch_repositories(repo_urls, arch),
+            test_repo_mode, cache_dir, use_cache, refresh
+        )
+        for arch in arches
+    ]
+    # Ошибки сообщаются в порядке архитектур
+    return [future.result() for future in futures]
+
+def diff_arch_graphs(baseline, result, packages=None):
+    """
+    Различия замыканий и циклов архитектуры с базовой
+    
+    Выполняется в рабочем процессе: туда передаются только графы двух
+    архитектур, а обратно - записи о различиях. Замыкания считаются по
+    графам конденсации и сравниваются как битовые множества, множества
+    имен строятся только для различающихся пакетов.
+    
+    Args:
+        baseline (ArchGraph): Базовая архитектура
+        result (ArchGraph): Сравниваемая архитектура
+        packages (list): Сравниваемые пакеты (None - все пакеты обеих архитектур)
+    
+    Returns:
+        list: Записи NDJSON (kind closure и cycles)
+    """
+    if packages is not None:
+        compared = packages
+    else:
+        compared = list(dict.fromkeys([*baseline.names, *result.names]))
+    
+    # При одинаковой таблице имен замыкания сравниваются по битовым множествам
+    # без построения множеств имен
+    same_names = result.names == baseline.names
+    
+    records = []
+    for package in compared:
+        if same_names and result.closure_bits(package) == baseline.closure_bits(package):
+            continue
+        
+        expected = baseline.closure_names(package)
+        actual = result.closure_names(package)
+        if expected == actual:
+            continue
+        
+        record = {
+            'kind': 'closure',
+            'package': package,
+            'arch': result.arch,
+            'baseline': baseline.arch,
+            'found': actual is not None,
+            'baseline_found': expected is not None
+        }
+        expected = expected or frozenset()
+        actual = actual or frozenset()
+        record['closure_size'] = len(actual)
+        record['added'] = sorted(actual - expected)
+        record['removed'] = sorted(expected - actual)
+        records.append(record)
+    
+    baseline_cycles = baseline.cycle_groups()
+    cycles = result.cycle_groups()
+    if cycles != baseline_cycles:
+        records.append({
+            'kind': 'cycles',
+            'arch': result.arch,
+            'baseline': baseline.arch,
+            'added': sorted(sorted(cycle) for cycle in cycles - baseline_cycles),
+            'removed': sorted(sorted(cycle) for cycle in baseline_cycles - cycles)
+        })
+    return records
+
+def run_arch_diff(results, packages=None, out=None, executor=None):
+    """
+    Вывод различий замыканий и циклов архитектур в формате NDJSON
+    
+    Первая архитектура - базовая: для каждой другой архитектуры выводятся
+    пакеты, замыкание которых отличается от замыкания в базовой (kind
+    closure, поля added/removed), и изменения циклических компонент
+    (kind cycles). Пакеты с одинаковыми замыканиями не выводятся.
+    
+    Args:
+        results (list): ArchGraph в порядке архитектур
+        packages (list): Сравниваемые пакеты (None - все пакеты всех архитектур)
+        out: Поток вывода (по умолчанию стандартный вывод)
+        executor (ProcessPoolExecutor): Пул процессов для сравнения архитектур
+            (None - сравнение в текущем процессе)
+    
+    Returns:
+        int: Количество выведенных различий
+    """
+    out = out or sys.stdout
+    baseline = results[0]
+    if executor is None or len(results) < 3:
+        # Одну пару архитектур выгоднее сравнить здесь, не передавая графы в пул
+        differences = (diff_arch_graphs(baseline, result, packages) for result in results[1:])
+    else:
+        futures = [executor.submit(diff_arch_graphs, baseline, result, packages) for result in results[1:]]
+        differences = (future.result() for future in futures)
+    
+    count = 0
+    for records in differences:
+        for record in records:
+            _write_record(out, record)
+        count += len(records)
+    
+    out.flush()
+    return count
+
+def _write_record(out, record):
+    out.write(json.dumps(record, ensure_ascii=False))
+    out.write('\n')
@@ -0,0 +1,198 @@
+import io
+import json
+import re
+import sys
+from itertools import islice
+from json.encoder import encode_basestring
+
+# Поля записей NDJSON и столбцы CSV
+FIELDS = ('kind', 'package', 'name', 'value')
+
+# Виды записей о списках пакетов и соответствующие разделы документа JSON
+LIST_SECTIONS = {
+    'dependency': 'dependencies',
+    'transitive_dependency': 'transitive_dependencies',
+    'reverse_dependency': 'reverse_dependencies',
+    'transitive_reverse_dependency': 'transitive_reverse_dependencies',
+}
+
+# Символы, при наличии которых значение CSV нужно заключать в кавычки
+CSV_SPECIAL = re.compile(r'[,"\r\n]')
+
+# Количество записей, накапливаемых перед одной операцией записи в поток
+WRITE_CHUNK = 1024
+
+class RecordWriter:
+    """
+    Потоковый вывод результатов анализа в машиночитаемом формате
+    
+    Записи накапливаются в буфере и выводятся в поток блоками по
+    WRITE_CHUNK, поэтому списки из десятков тысяч пакетов не требуют
+    отдельной операции записи на каждую строку.
+    """
+    
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._buffer = []
+    
+    def _emit(self, text):
+        self._buffer.append(text)
+        if len(self._buffer) >= WRITE_CHUNK:
+            self.flush()
+    
+    def flush(self):
+        """Вывод накопленных записей в поток"""
+        if self._buffer:
+            self.out.write(''.join(self._buffer))
+            self._buffer = []
+    
+    def begin(self, package):
+        """Начало вывода результатов по пакету"""
+    
+    def write_names(self, kind, package, names):
+        """
+        Вывод списка пакетов
+        
+        Args:
+            kind (str): Вид записей (ключ LIST_SECTIONS)
+            package (str): Анализируемый пакет
+            names (iterable): Имена пакетов
+        """
+        for name in names:
+            self._write_record(kind, package, name, None)
+    
+    def write_cycles(self, cycles):
+        """
+        Вывод циклов: каждая дуга цикла - запись вида cycle,
+        value - номер цикла (начиная с 1)
+        
+        Args:
+            cycles (list): Циклы в виде списков имен, первый пакет повторяется в конце
+        """
+        for number, cycle in enumerate(cycles, 1):
+            for position in range(len(cycle) - 1):
+                self._write_record('cycle', cycle[position], cycle[position + 1], number)
+    
+    def write_stats(self, package, stats):
+        """
+        Вывод статистики
+        
+        Args:
+            package (str): Анализируемый пакет
+            stats (dict): Показатели {имя: число}
+        """
+        for name, value in stats.items():
+            self._write_record('stat', package, name, value)
+    
+    def end(self):
+        """Завершение вывода"""
+        self.flush()
+        self.out.flush()
+    
+    def _write_record(self, kind, package, name, value):
+        raise NotImplementedError
+
+class NdjsonWriter(RecordWriter):
+    """Вывод в формате NDJSON: одна запись с полями FIELDS на строку"""
+    
+    def write_names(self, kind, package, names):
+        # Общая часть записей списка сериализуется один раз
+        prefix = '{"kind": ' + encode_basestring(kind) + ', "package": ' + encode_basestring(package) + ', "name": '
+        for name in names:
+            self._emit(prefix + encode_basestring(name) + ', "value": null}\n')
+    
+    def _write_record(self, kind, package, name, value):
+        self._emit(json.dumps(
+            {'kind': kind, 'package': package, 'name': name, 'value': value},
+            ensure_ascii=False
+        ) + '\n')
+
+class CsvWriter(RecordWriter):
+    """Вывод в формате CSV со строкой заголовка FIELDS"""
+    
+    def __init__(self, out=None):
+        super().__init__(out)
+        # Модуль csv нужен только этому формату
+        import csv
+        self._rows = io.StringIO()
+        self._csv = csv.writer(self._rows, lineterminator='\n')
+    
+    def _write_rows(self, rows):
+        # csv.writer отвечает за экранирование, результат попадает в общий буфер
+        self._csv.writerows(rows)
+        self._emit(self._rows.getvalue())
+        self._rows.seek(0)
+        self._rows.truncate()
+    
+    def begin(self, package):
+        self._write_rows([FIELDS])
+    
+    def write_names(self, kind, package, names):
+        prefix = kind + ',' + package + ','
+        names = iter(names)
+        while True:
+            chunk = list(islice(names, WRITE_CHUNK))
+            if not chunk:
+                break
+            if CSV_SPECIAL.search(kind + package + ''.join(chunk)):
+                self._write_rows([(kind, package, name, '') for name in chunk])
+            else:
+                # Имена пакетов обычно не требуют экранирования - строки собираются напрямую
+                self._emit(prefix + (',\n' + prefix).join(chunk) + ',\n')
+    
+    def _write_record(self, kind, package, name, value):
+        self._write_rows([(kind, package, name, '' if value is None else value)])
+
+class JsonWriter(RecordWriter):
+    """
+    Вывод одного документа JSON
+    
+    Документ формируется по частям: {"package": ..., "dependencies": [...],
+    ..., "cycles": [[...]], "stats": {...}} - списки пакетов не собираются
+    в памяти целиком.
+    """
+    
+    def begin(self, package):
+        self._emit('{"package": ' + json.dumps(package, ensure_ascii=False))
+    
+    def write_names(self, kind, package, names):
+        self._emit(', "' + LIST_SECTIONS[kind] + '": [')
+        separator = ''
+        names = iter(names)
+        while True:
+            chunk = list(islice(names, WRITE_CHUNK))
+            if not chunk:
+                break
+            # Элементы блока сериализуются одним вызовом, скобки списка отбрасываются
+            self._emit(separator + json.dumps(chunk, ensure_ascii=False)[1:-1])
+            separator = ', '
+        self._emit(']')
+    
+    def write_cycles(self, cycles):
+        self._emit(', "cycles": ' + json.dumps(cycles, ensure_ascii=False))
+    
+    def write_stats(self, package, stats):
+        self._emit(', "stats": ' + json.dumps(stats, ensure_ascii=False))
+    
+    def end(self):
+        self._emit('}\n')
+        super().end()
+
+WRITERS = {
+    'json': JsonWriter,
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+}
+
+def create_writer(output_format, out=None):
+    """
+    Создание потокового вывода для машиночитаемого формата
+    
+    Args:
+        output_format (str): json, ndjson или csv
+        out: Поток вывода (по умолчанию стандартный вывод)
+    
+    Returns:
+        RecordWriter: Объект вывода
+    """
+    return WRITERS[output_format](out)
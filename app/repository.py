@@ -1,66 +1,427 @@
-import urllib.request
-import urllib.error
-import tempfile
+import zlib
+import io
 import os
-from pathlib import Path
+import time
+from contextlib import contextmanager
+import instrumentation
 from exceptions import RepositoryError
 
+GZIP_MAGIC = b'\x1f\x8b'
+TAR_MAGIC = b'ustar'
+INDEX_MEMBER_NAME = 'APKINDEX'
+CHUNK_SIZE = 64 * 1024
+MAX_FETCH_WORKERS = 8
+# Ключи метаданных кэша, по которым проверяется актуальность индекса
+VALIDATOR_FIELDS = ('mtime', 'file_size', 'etag', 'last_modified')
+
 class RepositoryManager:
     """Менеджер для работы с репозиториями Alpine Linux"""
     
-    def __init__(self, repo_url, test_repo_mode=False):
-        self.repo_url = repo_url
+    def __init__(self, repo_urls, test_repo_mode=False, cache=None, refresh=False):
+        # Допускается как один репозиторий, так и список в порядке убывания приоритета
+        if isinstance(repo_urls, str):
+            repo_urls = [repo_urls]
+        self.repo_urls = list(repo_urls)
         self.test_repo_mode = test_repo_mode
-        self._temp_files = []
+        self.cache = cache
+        self.refresh = refresh
+        # False - использовать запись кэша без проверки актуальности (прежний снимок индекса)
+        self.validate = True
     
-    def __del__(self):
-        """Очистка временных файлов"""
-        for temp_file in self._temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except Exception:
-                pass
+    @property
+    def repo_url(self):
+        """Основной репозиторий (с наивысшим приоритетом)"""
+        return self.repo_urls[0]
+    
+    def load_indexes(self, parse):
+        """
+        Загрузка разобранных индексов всех репозиториев
+        
+        Репозитории загружаются параллельно, поэтому общее время
+        определяется самым медленным репозиторием, а не их суммой.
+        
+        Args:
+            parse (callable): Функция разбора потока APKINDEX в индекс
+            
+        Returns:
+            list: Индексы репозиториев в порядке убывания приоритета
+        """
+        if len(self.repo_urls) == 1:
+            return [self.load_index(self.repo_url, parse)]
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(len(self.repo_urls), MAX_FETCH_WORKERS)) as executor:
+            futures = [executor.submit(self.load_index, repo_url, parse) for repo_url in self.repo_urls]
+            # Ошибки сообщаются в порядке приоритета репозиториев
+            return [future.result() for future in futures]
+    
+    def load_index(self, repo_url, parse):
+        """
+        Загрузка разобранного индекса одного репозитория с использованием кэша
+        
+        Актуальность записи кэша проверяется по mtime и размеру файла
+        в тестовом режиме или условным HTTP-запросом (ETag/Last-Modified)
+        для удаленного репозитория.
+        
+        Args:
+            repo_url (str): URL репозитория или путь к файлу
+            parse (callable): Функция разбора потока APKINDEX в индекс
+            
+        Returns:
+            Индекс репозитория
+        """
+        with instrumentation.phase('load_index'):
+            if self.cache is None:
+                with self.open_repository_stream(repo_url) as stream:
+                    return parse(stream)
+            
+            if self.test_repo_mode:
+                return self._load_test_index(repo_url, parse)
+            return self._load_remote_index(repo_url, parse)
+    
+    def cache_key(self, repo_url):
+        """Ключ записи кэша индекса репозитория"""
+        return os.path.abspath(repo_url) if self.test_repo_mode else repo_url
+    
+    def cached_validators(self, repo_url):
+        """
+        Данные проверки актуальности записи кэша индекса репозитория
+        
+        Args:
+            repo_url (str): URL репозитория или путь к файлу
+        
+        Returns:
+            dict: {mtime, file_size} или {etag, last_modified} либо None, если записи нет
+        """
+        if self.cache is None:
+            return None
+        meta = self.cache.get_meta(self.cache_key(repo_url))
+        if meta is None:
+            return None
+        return {name: meta[name] for name in VALIDATOR_FIELDS if name in meta}
+    
+    def is_cache_current(self, repo_url, validators):
+        """
+        Проверка без сетевых запросов, что запись кэша индекса актуальна
+        
+        Локальный файл проверяется по mtime и размеру. Актуальность индекса
+        удаленного репозитория без запроса к серверу не проверить, поэтому
+        запись считается актуальной только при отключенной проверке
+        (validate = False).
+        
+        Args:
+            repo_url (str): URL репозитория или путь к файлу
+            validators (dict): Данные проверки записи кэша (cached_validators)
+        
+        Returns:
+            bool: Запись можно использовать без загрузки индекса
+        """
+        if self.refresh:
+            return False
+        if not self.validate:
+            return True
+        if not self.test_repo_mode:
+            return False
+        
+        try:
+            current = _file_validators(repo_url)
+        except OSError:
+            return False
+        return all(validators.get(name) == value for name, value in current.items())
+    
+    def _load_cached(self, key):
+        """Загрузка индекса из кэша с учетом попаданий в статистике"""
+        with instrumentation.phase('cache_load'):
+            index = self.cache.load(key)
+        if index is not None:
+            instrumentation.count('cache_hits')
+        return index
+    
+    def _store_cached(self, key, validators, index):
+        """Сохранение разобранного индекса в кэш с учетом промахов в статистике"""
+        instrumentation.count('cache_misses')
+        with instrumentation.phase('cache_store'):
+            self.cache.store(key, validators, index)
+    
+    def _load_test_index(self, repo_path, parse):
+        """Загрузка индекса локального файла с проверкой кэша по mtime и размеру"""
+        key = self.cache_key(repo_path)
+        
+        try:
+            validators = _file_validators(repo_path)
+        except OSError:
+            raise RepositoryError(f"Файл репозитория не существует: {repo_path}")
+        
+        meta = None if self.refresh else self.cache.get_meta(key)
+        if meta and (not self.validate or all(meta.get(name) == value for name, value in validators.items())):
+            index = self._load_cached(key)
+            if index is not None:
+                return index
+        
+        with self.open_repository_stream(repo_path) as stream:
+            index = parse(stream)
+        
+        self._store_cached(key, validators, index)
+        return index
+    
+    def _load_remote_index(self, repo_url, parse):
+        """Загрузка индекса удаленного репозитория с условным HTTP-запросом"""
+        key = self.cache_key(repo_url)
+        meta = None if self.refresh else self.cache.get_meta(key)
+        
+        if meta and not self.validate:
+            index = self._load_cached(key)
+            if index is not None:
+                return index
+        
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        response = self._handle_remote_repository(repo_url, headers)
+        if response is None:
+            # 304 Not Modified - индекс в кэше актуален
+            instrumentation.count('not_modified')
+            index = self._load_cached(key)
+            if index is not None:
+                return index
+            response = self._handle_remote_repository(repo_url)
+        
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        
+        with self._open_stream(response) as stream:
+            index = parse(stream)
+        
+        if validators['etag'] or validators['last_modified']:
+            self._store_cached(key, validators, index)
+        return index
     
-    def get_repository_content(self):
+    def open_repository_stream(self, repo_url=None):
         """
-        Получение содержимого репозитория
+        Открытие потока с содержимым индекса репозитория
+        
+        Архивы APKINDEX.tar.gz распаковываются на лету: данные читаются
+        блоками прямо из файла или HTTP-ответа, без временных файлов
+        и без полной копии индекса в памяти.
         
+        Args:
+            repo_url (str): URL репозитория или путь к файлу (по умолчанию основной репозиторий)
+            
         Returns:
-            str: Путь к локальному файлу с содержимым репозитория
+            Контекстный менеджер, возвращающий бинарный поток с текстом APKINDEX
         """
+        repo_url = repo_url or self.repo_url
+        
         if self.test_repo_mode:
-            return self._handle_test_repository()
+            raw = self._handle_test_repository(repo_url)
         else:
-            return self._handle_remote_repository()
+            raw = self._handle_remote_repository(repo_url)
+        
+        return self._open_stream(raw)
     
-    def _handle_test_repository(self):
-        """Обработка тестового репозитория (локальный файл)"""
-        if not os.path.exists(self.repo_url):
-            raise RepositoryError(f"Файл репозитория не существует: {self.repo_url}")
+    @contextmanager
+    def _open_stream(self, raw):
+        """Распаковка исходного потока с закрытием его по завершении работы"""
+        recorder = instrumentation.active()
+        if recorder is not None:
+            raw = _CountingStream(raw, recorder)
         
-        return self.repo_url
+        import tarfile
+        with raw:
+            try:
+                yield open_index_stream(raw)
+            except (zlib.error, tarfile.TarError, EOFError) as e:
+                raise RepositoryError(f"Ошибка распаковки индекса репозитория: {e}")
     
-    def _handle_remote_repository(self):
-        """Обработка удаленного репозитория"""
+    def _handle_test_repository(self, repo_path):
+        """Обработка тестового репозитория (локальный файл)"""
+        if not os.path.exists(repo_path):
+            raise RepositoryError(f"Файл репозитория не существует: {repo_path}")
+        
         try:
-            # Создаем временный файл для хранения содержимого
-            temp_file = tempfile.NamedTemporaryFile(mode='w+b', delete=False, suffix='.txt')
-            self._temp_files.append(temp_file.name)
+            return open(repo_path, 'rb')
+        except OSError as e:
+            raise RepositoryError(f"Ошибка чтения файла репозитория: {e}")
+    
+    def _handle_remote_repository(self, repo_url, headers=None):
+        """
+        Обработка удаленного репозитория
+        
+        Args:
+            repo_url (str): URL репозитория
+            headers (dict): Дополнительные заголовки запроса
             
-            # Загружаем содержимое репозитория
-            with urllib.request.urlopen(self.repo_url, timeout=30) as response:
-                if response.status != 200:
-                    raise RepositoryError(f"Ошибка загрузки репозитория: HTTP {response.status}")
-                
-                # Читаем и сохраняем данные
-                data = response.read()
-                temp_file.write(data)
-                temp_file.close()
-                
-                return temp_file.name
-                
+        Returns:
+            HTTP-ответ или None если сервер ответил 304 Not Modified
+        """
+        # Сетевые модули загружаются только при обращении к удаленному репозиторию
+        import urllib.request
+        import urllib.error
+        
+        request = urllib.request.Request(repo_url, headers=headers or {})
+        
+        try:
+            response = urllib.request.urlopen(request, timeout=30)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise RepositoryError(f"Ошибка загрузки репозитория: HTTP {e.code}")
         except urllib.error.URLError as e:
             raise RepositoryError(f"Ошибка подключения к репозиторию: {e}")
         except Exception as e:
-            raise RepositoryError(f"Ошибка при работе с репозиторием: {e}")
\ No newline at end of file
+            raise RepositoryError(f"Ошибка при работе с репозиторием: {e}")
+        
+        if response.status != 200:
+            response.close()
+            raise RepositoryError(f"Ошибка загрузки репозитория: HTTP {response.status}")
+        
+        return response
+
+def open_index_stream(raw):
+    """
+    Определение формата данных и построение потока с текстом APKINDEX
+    
+    Поддерживаются простой текст, gzip (в том числе несколько склеенных
+    gzip-потоков, как в APKINDEX.tar.gz) и tar-архивы.
+    
+    Args:
+        raw: Бинарный файловый объект с исходными данными
+    
+    Returns:
+        Бинарный файловый объект с текстом APKINDEX
+    """
+    import tarfile
+    head = _read_exact(raw, len(GZIP_MAGIC))
+    stream = io.BufferedReader(_PrefixedStream(head, raw), CHUNK_SIZE)
+    
+    if head == GZIP_MAGIC:
+        stream = io.BufferedReader(_GzipStream(stream), CHUNK_SIZE)
+    
+    # Сигнатура tar находится по смещению 257 в заголовке первого блока
+    head = _read_exact(stream, tarfile.BLOCKSIZE)
+    stream = io.BufferedReader(_PrefixedStream(head, stream), CHUNK_SIZE)
+    
+    if head[257:257 + len(TAR_MAGIC)] != TAR_MAGIC:
+        return stream
+    
+    # ignore_zeros: сегмент с подписью в APKINDEX.tar.gz может завершаться нулевыми блоками
+    archive = tarfile.open(fileobj=stream, mode='r|', ignore_zeros=True)
+    for member in archive:
+        if member.isfile() and os.path.basename(member.name) == INDEX_MEMBER_NAME:
+            return archive.extractfile(member)
+    
+    raise RepositoryError(f"В архиве репозитория отсутствует файл {INDEX_MEMBER_NAME}")
+
+def _file_validators(repo_path):
+    """Данные проверки актуальности локального файла репозитория (mtime и размер)"""
+    stat = os.stat(repo_path)
+    return {'mtime': stat.st_mtime_ns, 'file_size': stat.st_size}
+
+def _read_exact(stream, size):
+    """Чтение size байт из потока (меньше - только если данные закончились)"""
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+class _PrefixedStream(io.RawIOBase):
+    """Поток, который сначала отдает уже прочитанный префикс, а затем остаток исходного потока"""
+    
+    def __init__(self, prefix, fileobj):
+        self._prefix = prefix
+        self._fileobj = fileobj
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        
+        data = self._fileobj.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+class _CountingStream(io.RawIOBase):
+    """Поток, подсчитывающий объем и время чтения исходных данных (статистика загрузки)"""
+    
+    def __init__(self, fileobj, recorder):
+        self._fileobj = fileobj
+        self._recorder = recorder
+        self._bytes = 0
+        self._reads = 0
+        self._seconds = 0.0
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        start = time.perf_counter()
+        data = self._fileobj.read(len(buffer))
+        self._seconds += time.perf_counter() - start
+        self._reads += 1
+        self._bytes += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def close(self):
+        if not self.closed:
+            self._recorder.count('fetch_bytes', self._bytes)
+            self._recorder.add_time('fetch_read', self._seconds, self._reads)
+            self._fileobj.close()
+        super().close()
+
+class _GzipStream(io.RawIOBase):
+    """Потоковая распаковка gzip с поддержкой нескольких последовательных gzip-потоков"""
+    
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._decompressor = zlib.decompressobj(wbits=31)
+        self._input = b''
+        self._member_started = False
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while True:
+            if not self._input:
+                self._input = self._fileobj.read(CHUNK_SIZE)
+                if not self._input:
+                    if self._member_started:
+                        # Поток оборвался внутри gzip-потока: усеченный индекс не должен
+                        # разбираться (и сохраняться в кэш) как полный
+                        raise EOFError("Сжатые данные обрываются до конца gzip-потока")
+                    return 0
+            
+            if not self._member_started:
+                # Данные после последнего gzip-потока (например, выравнивание нулями) игнорируем
+                if not self._input.startswith(GZIP_MAGIC[:len(self._input)]):
+                    self._input = b''
+                    return 0
+                self._member_started = True
+            
+            data = self._decompressor.decompress(self._input, len(buffer))
+            self._input = self._decompressor.unconsumed_tail
+            
+            if self._decompressor.eof:
+                self._input = self._decompressor.unused_data + self._input
+                self._decompressor = zlib.decompressobj(wbits=31)
+                self._member_started = False
+            
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
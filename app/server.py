@@ -0,0 +1,378 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from apk_parser import APKParser
+from dependency_graph import DependencyGraph
+from footprint import totals_record
+from exceptions import ValidationError, RepositoryError, APKParseError
+
+# Максимальный размер строки запроса в байтах
+MAX_REQUEST_SIZE = 64 * 1024
+# Ограничение суммарного размера запомненных ответов одного снимка
+RESULT_CACHE_SIZE = 64 * 1024 * 1024
+# Операции, результаты которых запоминаются в сериализованном виде
+CACHED_OPERATIONS = frozenset({'closure', 'rclosure', 'cycles'})
+# Операции, вычисление которых может занимать заметное время (обход графа
+# конденсации, суммы по битовым множествам): выполняются в пуле потоков
+EXECUTOR_OPERATIONS = CACHED_OPERATIONS | {'footprint'}
+
+class Snapshot:
+    """Неизменяемый снимок индекса и графа, по которому обслуживаются запросы"""
+    
+    def __init__(self, apk_parser, graph_builder, generation):
+        self.apk_parser = apk_parser
+        self.graph_builder = graph_builder
+        self.generation = generation
+        self.loaded_at = time.time()
+        # Сериализованные результаты запросов {(операция, пакет): JSON}; замена
+        # снимка при обновлении индекса сбрасывает их вместе с ним
+        self._results = OrderedDict()
+        self._results_size = 0
+    
+    def get_result(self, key):
+        """
+        Запомненный сериализованный результат запроса
+        
+        Args:
+            key (tuple): Ключ запроса
+            
+        Returns:
+            bytes: Результат в формате JSON или None
+        """
+        data = self._results.get(key)
+        if data is not None:
+            self._results.move_to_end(key)
+        return data
+    
+    def store_result(self, key, data):
+        """
+        Запоминание сериализованного результата (LRU по размеру)
+        
+        Вызывается только из цикла событий, поэтому словарь результатов
+        не требует блокировки.
+        
+        Args:
+            key (tuple): Ключ запроса
+            data (bytes): Результат в формате JSON
+        """
+        if key in self._results:
+            return
+        self._results[key] = data
+        self._results_size += len(data)
+        while self._results_size > RESULT_CACHE_SIZE and len(self._results) > 1:
+            _, evicted = self._results.popitem(last=False)
+            self._results_size -= len(evicted)
+
+class QueryServer:
+    """
+    Сервер запросов к графу зависимостей с индексом, загруженным в память
+    
+    Запросы и ответы - строки JSON (по одной на строку) через Unix-сокет
+    или TCP. Запросы только читают текущий снимок. Короткие запросы и
+    запомненные результаты обслуживаются прямо в цикле событий, а замыкания,
+    циклы и размеры наборов установки вычисляются в пуле потоков, чтобы
+    обход большого графа не задерживал ответы другим клиентам. Обновление
+    индекса также выполняется в отдельном потоке и завершается атомарной
+    заменой ссылки на снимок: запрос, начатый до замены, дочитывает
+    прежний снимок.
+    
+    Замыкания компонент запоминаются в ClosureIndex только после вычисления
+    всех соседей, поэтому параллельные вычисления в нескольких потоках могут
+    повторить работу друг друга, но не видят неполных результатов.
+    """
+    
+    def __init__(self, repository_manager, refresh_interval=None):
+        self.repository_manager = repository_manager
+        self.refresh_interval = refresh_interval
+        self.snapshot = None
+        self._reload_lock = None
+        self._operations = {
+            'deps': self._query_dependencies,
+            'rdeps': self._query_reverse_dependencies,
+            'closure': self._query_closure,
+            'rclosure': self._query_reverse_closure,
+            'cycles': self._query_cycles,
+            'footprint': self._query_footprint,
+            'stats': self._query_stats,
+        }
+    
+    def load(self):
+        """
+        Загрузка индекса и построение графа всего репозитория
+        
+        При повторной загрузке граф обновляется по различиям индексов,
+        а не строится заново. Метод не изменяет текущий снимок и может
+        выполняться в отдельном потоке.
+        
+        Returns:
+            tuple: (новый снимок или None если индекс не изменился, число пакетов с изменившимся замыканием)
+        """
+        current = self.snapshot
+        apk_parser = APKParser(self.repository_manager)
+        
+        if current is None:
+            graph_builder = DependencyGraph(apk_parser)
+            graph_builder.build_repository_graph()
+            changed = len(graph_builder.graph)
+            generation = 1
+        else:
+            diff = apk_parser.diff_from(current.apk_parser)
+            if diff.is_empty():
+                return None, 0
+            
+            graph_builder = current.graph_builder.fork(apk_parser)
+            changed = len(graph_builder.apply_index_diff(diff))
+            generation = current.generation + 1
+        
+        # Компоненты сильной связности вычисляются до публикации снимка,
+        # чтобы первые запросы замыканий не ждали алгоритм Тарьяна
+        graph_builder.get_condensation()
+        return Snapshot(apk_parser, graph_builder, generation), changed
+    
+    async def reload(self):
+        """
+        Обновление индекса без остановки обслуживания запросов
+        
+        Returns:
+            dict: Результат обновления
+        """
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            snapshot, changed = await loop.run_in_executor(None, self.load)
+            if snapshot is not None:
+                # Атомарная замена: новые запросы сразу видят новый снимок
+                self.snapshot = snapshot
+            return {'reloaded': snapshot is not None, 'generation': self.snapshot.generation, 'changed_closures': changed}
+    
+    async def serve(self, address):
+        """
+        Запуск сервера
+        
+        Args:
+            address (str): "unix:/путь/к/сокету", путь к сокету или "хост:порт"
+        """
+        self._reload_lock = asyncio.Lock()
+        if self.snapshot is None:
+            self.snapshot, _ = self.load()
+        
+        host, port, path = parse_address(address)
+        try:
+            if path is not None:
+                server = await asyncio.start_unix_server(self._handle_client, path, limit=MAX_REQUEST_SIZE)
+            else:
+                server = await asyncio.start_server(self._handle_client, host, port, limit=MAX_REQUEST_SIZE)
+        except OSError as e:
+            raise ValidationError(f"Не удалось открыть адрес сервера {address}: {e.strerror or e}")
+        
+        print(f"Сервер запросов запущен: {address}", file=sys.stderr)
+        print(f"  Пакетов в графе: {len(self.snapshot.graph_builder.graph)}", file=sys.stderr)
+        
+        # SIGTERM завершает сервер штатно, с удалением файла сокета
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        
+        refresher = None
+        if self.refresh_interval:
+            refresher = asyncio.create_task(self._refresh_periodically())
+        
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if refresher is not None:
+                refresher.cancel()
+            if path is not None and os.path.exists(path):
+                os.unlink(path)
+    
+    async def _refresh_periodically(self):
+        """Периодическая проверка обновлений репозитория"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                result = await self.reload()
+            except (RepositoryError, APKParseError) as e:
+                print(f"Предупреждение: не удалось обновить индекс: {e}", file=sys.stderr)
+                continue
+            if result['reloaded']:
+                print(f"Индекс обновлен (поколение {result['generation']}), "
+                      f"изменилось замыканий: {result['changed_closures']}", file=sys.stderr)
+    
+    async def _handle_client(self, reader, writer):
+        """Обслуживание соединения: запросы обрабатываются по одному в порядке поступления"""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(encode_response({'ok': False, 'error': 'Слишком длинный запрос'}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                
+                writer.write(await self.handle_request(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def handle_request(self, line):
+        """
+        Обработка одного запроса
+        
+        Args:
+            line (bytes): Строка JSON вида {"op": "closure", "package": "busybox"}
+        
+        Returns:
+            bytes: Строка ответа {"ok": true, "result": ...} или {"ok": false, "error": ...}
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return encode_response({'ok': False, 'error': 'Некорректный JSON'})
+        if not isinstance(request, dict):
+            return encode_response({'ok': False, 'error': 'Запрос должен быть объектом JSON'})
+        
+        response = {'ok': True}
+        if 'id' in request:
+            response['id'] = request['id']
+        
+        operation = request.get('op')
+        snapshot = self.snapshot
+        try:
+            if not isinstance(operation, str):
+                raise ValueError("Поле op должно быть строкой")
+            if operation == 'reload':
+                result = encode_json(await self.reload())
+            elif operation in CACHED_OPERATIONS:
+                # Проверка пакета до обращения к кэшу: ошибки не запоминаются
+                package = self._get_package(snapshot, request) if operation != 'cycles' else None
+                result = snapshot.get_result((operation, package))
+                if result is None:
+                    result = await self._compute(snapshot, operation, request)
+                    snapshot.store_result((operation, package), result)
+            elif operation in EXECUTOR_OPERATIONS:
+                result = await self._compute(snapshot, operation, request)
+            elif operation in self._operations:
+                result = encode_json(self._operations[operation](snapshot, request))
+            else:
+                raise ValueError(f"Неизвестная операция: {operation}")
+        except (ValueError, RepositoryError, APKParseError) as e:
+            response['ok'] = False
+            response['error'] = str(e)
+            return encode_response(response)
+        except Exception as e:
+            # Ошибка одного запроса (например, поле неожиданного типа)
+            # не должна разрывать соединение клиента
+            response['ok'] = False
+            response['error'] = f"Ошибка обработки запроса: {type(e).__name__}: {e}"
+            return encode_response(response)
+        
+        return encode_response(response, result)
+    
+    async def _compute(self, snapshot, operation, request):
+        """Вычисление и сериализация результата операции в пуле потоков"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: encode_json(self._operations[operation](snapshot, request))
+        )
+    
+    def _get_package(self, snapshot, request):
+        """Имя пакета из запроса (пакет должен присутствовать в графе)"""
+        package = request.get('package')
+        if not isinstance(package, str) or package not in snapshot.graph_builder.graph:
+            raise ValueError(f"Пакет '{package}' не найден в репозитории")
+        return package
+    
+    def _query_dependencies(self, snapshot, request):
+        package = self._get_package(snapshot, request)
+        return list(snapshot.graph_builder.graph[package])
+    
+    def _query_reverse_dependencies(self, snapshot, request):
+        package = self._get_package(snapshot, request)
+        return snapshot.graph_builder.get_reverse_dependencies(package)
+    
+    def _query_closure(self, snapshot, request):
+        package = self._get_package(snapshot, request)
+        return snapshot.graph_builder.get_closure(package)
+    
+    def _query_reverse_closure(self, snapshot, request):
+        package = self._get_package(snapshot, request)
+        return snapshot.graph_builder.get_closure(package, reverse=True)
+    
+    def _query_cycles(self, snapshot, request):
+        return snapshot.graph_builder.get_cycles()
+    
+    def _query_footprint(self, snapshot, request):
+        package = self._get_package(snapshot, request)
+        graph_builder = snapshot.graph_builder
+        footprint = graph_builder.get_footprint_index()
+        node_id = graph_builder.compact.ids[package]
+        result = {
+            'size': footprint.sizes[node_id],
+            'installed_size': footprint.installed_sizes[node_id],
+            'install_set': totals_record(footprint.install_totals(node_id))
+        }
+        
+        installed = request.get('installed')
+        if installed is not None:
+            if not isinstance(installed, list) or not all(isinstance(name, str) for name in installed):
+                raise ValueError("Поле installed должно быть списком пакетов")
+            ids = graph_builder.compact.ids
+            installed_bits = footprint.union_bits(ids[name] for name in installed if name in ids)
+            result['marginal'] = totals_record(footprint.marginal_totals(node_id, installed_bits))
+        return result
+    
+    def _query_stats(self, snapshot, request):
+        compact = snapshot.graph_builder.compact
+        return {
+            'generation': snapshot.generation,
+            'loaded_at': snapshot.loaded_at,
+            'packages': len(compact),
+            'edges': compact.edge_count
+        }
+
+def encode_json(value):
+    """Сериализация значения в JSON (UTF-8)"""
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+def encode_response(response, result=None):
+    """
+    Сборка строки ответа
+    
+    Args:
+        response (dict): Поля ответа (ok, id, error)
+        result (bytes): Уже сериализованный результат или None
+        
+    Returns:
+        bytes: Строка JSON с переводом строки в конце
+    """
+    data = encode_json(response)
+    if result is not None:
+        data = data[:-1] + b', "result": ' + result + b'}'
+    return data + b'\n'
+
+def parse_address(address):
+    """
+    Разбор адреса сервера
+    
+    Args:
+        address (str): "unix:/путь", путь к сокету (содержит "/") или "хост:порт"
+    
+    Returns:
+        tuple: (хост, порт, путь к Unix-сокету) - путь None для TCP
+    """
+    if address.startswith('unix:'):
+        return None, None, address[len('unix:'):]
+    if '/' in address:
+        return None, None, address
+    
+    host, separator, port = address.rpartition(':')
+    if not separator or not port.isdigit():
+        raise ValidationError(f"Некорректный адрес сервера: {address}")
+    return host or '127.0.0.1', int(port), None
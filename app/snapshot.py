@@ -0,0 +1,271 @@
+from array import array
+from bisect import bisect_left
+from exceptions import PackageNotFoundError
+
+# Версия снимка: увеличивается при изменении структуры или правил разрешения зависимостей
+SNAPSHOT_VERSION = 2
+
+# Префикс ключа записи кэша со снимком
+SNAPSHOT_KEY_PREFIX = 'snapshot:'
+
+# Разделители полей и записей ограничений в упакованном виде
+# (имена пакетов и атомы зависимостей не содержат пробельных символов)
+ISSUE_FIELD_SEPARATOR = '\t'
+ISSUE_RECORD_SEPARATOR = '\n'
+
+class PackedStrings:
+    """
+    Последовательность строк, упакованная в один блок байт с массивом границ
+    
+    pickle сохраняет и загружает блок и массив целиком, без создания
+    объекта на каждую строку; строка декодируется только при обращении к ней.
+    """
+    
+    def __init__(self, data, offsets):
+        """
+        Args:
+            data (bytes): Строки в кодировке UTF-8 подряд
+            offsets (array): Границы строк в data (на одну больше количества строк)
+        """
+        self.data = data
+        self.offsets = offsets
+    
+    @classmethod
+    def pack(cls, strings):
+        """Упаковка последовательности строк"""
+        chunks = [string.encode('utf-8') for string in strings]
+        offsets = array('I', [0])
+        position = 0
+        for chunk in chunks:
+            position += len(chunk)
+            offsets.append(position)
+        return cls(b''.join(chunks), offsets)
+    
+    def __reduce__(self):
+        return (PackedStrings, (self.data, self.offsets))
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, position):
+        return self.data[self.offsets[position]:self.offsets[position + 1]].decode('utf-8')
+
+class IndexSnapshot:
+    """
+    Снимок разрешенных зависимостей всех пакетов индекса
+    
+    Хранит граф всего репозитория в формате CSR: зависимости пакетов уже
+    разрешены через провайдеров виртуальных имен, поэтому ответ на запрос
+    не требует загрузки индекса и модулей его разбора. При построении графа
+    пакета снимок заменяет APKParser (методы get_package_dependencies,
+    get_constraint_issues и get_provided_version).
+    
+    Имена пакетов и ограничения хранятся в виде PackedStrings: время загрузки
+    снимка определяется копированием нескольких блоков байт, а не созданием
+    объектов для всех пакетов индекса. Пакеты ищутся двоичным поиском
+    по отсортированным именам - запрос затрагивает лишь несколько пакетов.
+    Ограничения, которые нарушены или могут быть нарушены, вычисляются
+    при построении снимка; модуль разбора версий загружается лишь при
+    обращении к ним.
+    """
+    
+    def __init__(self, names, offsets, targets, package_count, issues, order, sorted_names):
+        """
+        Args:
+            names (PackedStrings): Имена пакетов: сначала пакеты индекса, затем отсутствующие в нем зависимости
+            offsets (array): Границы списков зависимостей в targets
+            targets (array): Идентификаторы зависимостей
+            package_count (int): Количество пакетов индекса
+            issues (PackedStrings): Ограничения пакетов индекса (записи _issue_record) по идентификаторам
+            order (array): Идентификаторы пакетов в порядке возрастания имен
+            sorted_names (PackedStrings): Имена пакетов в том же порядке
+        """
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.package_count = package_count
+        self.issues = issues
+        self.order = order
+        self.sorted_names = sorted_names
+        # Версии поставщиков из уже прочитанных ограничений версий
+        self._provided_versions = {}
+    
+    @classmethod
+    def from_graph(cls, graph_builder):
+        """
+        Снимок по графу всего репозитория
+        
+        Args:
+            graph_builder (DependencyGraph): Граф, построенный build_repository_graph
+        
+        Returns:
+            IndexSnapshot: Снимок графа
+        """
+        compact = graph_builder.compact
+        apk_parser = graph_builder.apk_parser
+        package_count = len(apk_parser.get_index())
+        names = compact.names
+        
+        issues = []
+        for node_id in range(package_count):
+            issues.append(ISSUE_RECORD_SEPARATOR.join(
+                _issue_record(constraint, provider, kind, apk_parser)
+                for constraint, provider, kind in apk_parser.get_constraint_issues(names[node_id])
+            ))
+        
+        order = array('I', sorted(range(len(names)), key=names.__getitem__))
+        return cls(
+            PackedStrings.pack(names), compact.offsets, compact.targets, package_count,
+            PackedStrings.pack(issues), order, PackedStrings.pack(names[node_id] for node_id in order)
+        )
+    
+    def __reduce__(self):
+        return (IndexSnapshot, (
+            self.names, self.offsets, self.targets, self.package_count,
+            self.issues, self.order, self.sorted_names
+        ))
+    
+    def has_package(self, package_name):
+        """Проверка наличия пакета в индексе"""
+        node_id = self._node_id(package_name)
+        return node_id is not None and node_id < self.package_count
+    
+    def get_package_dependencies(self, package_name):
+        """
+        Получение прямых зависимостей пакета
+        
+        Args:
+            package_name (str): Имя пакета
+        
+        Returns:
+            list: Список прямых зависимостей в порядке разрешения APKParser
+        """
+        if not self.has_package(package_name):
+            raise PackageNotFoundError(f"Пакет '{package_name}' не найден в репозитории")
+        
+        node_id = self._node_id(package_name)
+        names = self.names
+        return [names[dep_id] for dep_id in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]]
+    
+    def get_constraint_issues(self, package_name):
+        """
+        Ограничения пакета, которые нарушены или могут быть нарушены
+        
+        Returns:
+            list: Кортежи (Constraint, пакет-поставщик, вид), как в APKParser.get_constraint_issues
+        """
+        node_id = self._node_id(package_name)
+        if node_id is None or node_id >= self.package_count:
+            return []
+        records = self.issues[node_id]
+        if not records:
+            return []
+        
+        from apk_version import parse_dependency
+        issues = []
+        for record in records.split(ISSUE_RECORD_SEPARATOR):
+            atom, provider, kind, version = record.split(ISSUE_FIELD_SEPARATOR)
+            constraint = parse_dependency(atom)
+            if kind == 'version':
+                self._provided_versions[constraint.name] = version or None
+            issues.append((constraint, provider, kind))
+        return issues
+    
+    def get_provided_version(self, name):
+        """Версия поставщика имени из ограничения версии, полученного get_constraint_issues"""
+        return self._provided_versions.get(name)
+    
+    def _node_id(self, package_name):
+        """Идентификатор пакета или None"""
+        position = bisect_left(self.sorted_names, package_name)
+        if position < len(self.sorted_names) and self.sorted_names[position] == package_name:
+            return self.order[position]
+        return None
+
+def _issue_record(constraint, provider, kind, apk_parser):
+    """
+    Запись ограничения для снимка: атом, поставщик, вид и версия поставщика
+    (версия сохраняется только для ограничений версий)
+    """
+    version = apk_parser.get_provided_version(constraint.name) if kind == 'version' else None
+    return ISSUE_FIELD_SEPARATOR.join((str(constraint), provider, kind, version or ''))
+
+def snapshot_key(repository_manager):
+    """Ключ записи кэша со снимком набора репозиториев (порядок важен - это приоритет)"""
+    keys = [repository_manager.cache_key(repo_url) for repo_url in repository_manager.repo_urls]
+    return SNAPSHOT_KEY_PREFIX + '\n'.join(keys)
+
+def recorded_validators(repository_manager):
+    """
+    Данные проверки актуальности записей кэша индексов всех репозиториев
+    
+    Returns:
+        list: Данные проверки по репозиториям или None, если индекса
+            какого-либо репозитория нет в кэше
+    """
+    validators = []
+    for repo_url in repository_manager.repo_urls:
+        repo_validators = repository_manager.cached_validators(repo_url)
+        if repo_validators is None:
+            return None
+        validators.append(repo_validators)
+    return validators
+
+def load_snapshot(repository_manager):
+    """
+    Загрузка снимка, построенного по актуальным индексам из кэша
+    
+    Снимок используется, только если записи кэша индексов всех репозиториев
+    актуальны (проверка без сетевых запросов) и снимок построен именно по ним.
+    
+    Args:
+        repository_manager (RepositoryManager): Менеджер репозиториев с кэшем
+    
+    Returns:
+        IndexSnapshot: Снимок или None
+    """
+    validators = recorded_validators(repository_manager)
+    if validators is None:
+        return None
+    for repo_url, repo_validators in zip(repository_manager.repo_urls, validators):
+        if not repository_manager.is_cache_current(repo_url, repo_validators):
+            return None
+    
+    if not _matches(repository_manager, validators):
+        return None
+    snapshot = repository_manager.cache.load(snapshot_key(repository_manager))
+    return snapshot if isinstance(snapshot, IndexSnapshot) else None
+
+def store_snapshot(repository_manager, graph_builder):
+    """
+    Сохранение снимка графа всего репозитория в кэш
+    
+    Снимок привязывается к записям кэша индексов, по которым построен граф:
+    при обновлении любого из индексов он перестает использоваться.
+    
+    Args:
+        repository_manager (RepositoryManager): Менеджер репозиториев с кэшем
+        graph_builder (DependencyGraph): Граф, построенный build_repository_graph
+    """
+    validators = recorded_validators(repository_manager)
+    if validators is None:
+        return
+    
+    repository_manager.cache.store(
+        snapshot_key(repository_manager),
+        {'snapshot': SNAPSHOT_VERSION, 'repositories': validators},
+        IndexSnapshot.from_graph(graph_builder)
+    )
+
+def needs_snapshot(repository_manager):
+    """
+    Проверка, нужно ли построить снимок: индексы всех репозиториев есть
+    в кэше, а снимка по ним еще нет
+    """
+    validators = recorded_validators(repository_manager)
+    return validators is not None and not _matches(repository_manager, validators)
+
+def _matches(repository_manager, validators):
+    """Проверка, что снимок в кэше построен по индексам с данными проверки validators"""
+    meta = repository_manager.cache.get_meta(snapshot_key(repository_manager))
+    return meta is not None and meta.get('snapshot') == SNAPSHOT_VERSION and meta.get('repositories') == validators
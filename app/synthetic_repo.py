@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import random
+import tarfile
+
+# Виртуальное имя системной библиотеки C, которое предоставляет базовый пакет pkg0
+LIBC_SONAME = 'so:libc.musl-x86_64.so.1'
+# Количество групп альтернатив: виртуальных имен с несколькими поставщиками (k:)
+ALTERNATIVE_GROUPS = 10
+
+def generate_apkindex(path, package_count, fan_out=4, depth=8, cycle_density=0.01,
+                      provider_mix=0.3, seed=0):
+    """
+    Генерация синтетического файла APKINDEX, похожего на индекс Alpine
+    
+    Пакеты распределяются по слоям: слой 0 - базовые библиотеки, каждый
+    следующий слой зависит от нижележащих, поэтому глубина графа без циклов
+    не превышает depth. Обратные дуги в свой или вышележащий слой образуют
+    циклы. Часть зависимостей записывается через виртуальные имена so:/cmd:
+    и группы альтернатив с приоритетами k:, все пакеты зависят от so:-имени
+    библиотеки C, как в настоящем репозитории.
+    
+    Args:
+        path (str): Путь к создаваемому файлу
+        package_count (int): Количество пакетов
+        fan_out (int): Среднее количество зависимостей у пакета
+        depth (int): Количество слоев (глубина графа без учета циклов)
+        cycle_density (float): Доля пакетов с обратной дугой, образующей цикл
+        provider_mix (float): Доля зависимостей, записанных через виртуальные имена
+        seed (int): Начальное значение генератора случайных чисел
+    """
+    rng = random.Random(seed)
+    depth = max(1, min(depth, package_count))
+    layer_starts = _layer_starts(package_count, depth)
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        for layer in range(depth):
+            for i in range(layer_starts[layer], layer_starts[layer + 1]):
+                version = f"1.{i % 100}.{i}-r0"
+                targets = _pick_targets(rng, i, layer, layer_starts, fan_out, cycle_density)
+                
+                atoms = [_dependency_atom(rng, target, provider_mix) for target in targets]
+                if i % 50 == 0 and package_count > 1:
+                    # Конфликт с произвольным пакетом
+                    atoms.append(f"!pkg{rng.randrange(package_count)}")
+                if i != 0:
+                    atoms.append(LIBC_SONAME)
+                
+                provides = [f"so:libpkg{i}.so.1={version}", f"cmd:pkg{i}={version}"]
+                if i == 0:
+                    provides.append(f"{LIBC_SONAME}=1")
+                priority = ''
+                if i % 50 == 1:
+                    provides.append(f"alt{i // 50 % ALTERNATIVE_GROUPS}")
+                    priority = f"k:{rng.randrange(100)}\n"
+                
+                f.write(
+                    f"C:Q1{i:027d}=\n"
+                    f"P:pkg{i}\n"
+                    f"V:{version}\n"
+                    f"A:x86_64\n"
+                    f"S:{rng.randrange(1000, 1000000)}\n"
+                    f"I:{rng.randrange(4096, 4000000)}\n"
+                    f"T:Synthetic package number {i}\n"
+                    f"U:https://example.com/pkg{i}\n"
+                    f"L:MIT\n"
+                    f"o:pkg{i}\n"
+                    f"m:Benchmark <bench@example.com>\n"
+                    f"t:1706099644\n"
+                    f"D:{' '.join(atoms)}\n"
+                    f"p:{' '.join(provides)}\n"
+                    f"{priority}"
+                    f"\n"
+                )
+
+def _layer_starts(package_count, depth):
+    """
+    Границы слоев: слой k занимает пакеты layer_starts[k]..layer_starts[k + 1] - 1
+    
+    Базовый слой небольшой (около 1% пакетов), остальные пакеты
+    распределяются по слоям поровну.
+    """
+    base = max(1, package_count // 100) if depth > 1 else package_count
+    starts = [0, base]
+    rest = package_count - base
+    for layer in range(1, depth):
+        starts.append(base + rest * layer // (depth - 1))
+    starts[-1] = package_count
+    return starts
+
+def _pick_targets(rng, package_id, layer, layer_starts, fan_out, cycle_density):
+    """Выбор зависимостей пакета: из нижележащих слоев и, изредка, обратная дуга"""
+    targets = []
+    
+    if layer > 0:
+        count = rng.randint(0, 2 * fan_out)
+        for _ in range(count):
+            # Половина зависимостей - на соседний нижний слой, остальные - на любой нижний
+            target_layer = layer - 1 if rng.random() < 0.5 else rng.randrange(layer)
+            start, end = layer_starts[target_layer], layer_starts[target_layer + 1]
+            if end > start:
+                targets.append(rng.randrange(start, end))
+    
+    if rng.random() < cycle_density:
+        # Обратная дуга в свой или вышележащий слой замыкает цикл
+        start = layer_starts[layer]
+        end = layer_starts[-1]
+        target = rng.randrange(start, end)
+        if target != package_id:
+            targets.append(target)
+    
+    return list(dict.fromkeys(targets))
+
+def _dependency_atom(rng, target, provider_mix):
+    """Запись зависимости на пакет: по имени или через виртуальное имя, иногда с ограничением версии"""
+    roll = rng.random()
+    if roll < provider_mix * 0.7:
+        return f"so:libpkg{target}.so.1"
+    if roll < provider_mix * 0.9:
+        return f"cmd:pkg{target}"
+    if roll < provider_mix:
+        return f"alt{target % ALTERNATIVE_GROUPS}"
+    return f"pkg{target}" + rng.choice(('', '', '>=1.0', '<1.50', '~1'))
+
+def pack_apkindex(index_path, archive_path):
+    """
+    Упаковка APKINDEX в архив формата APKINDEX.tar.gz
+    
+    Как и в настоящих зеркалах Alpine, архив состоит из двух склеенных
+    gzip-потоков: подписи и самого индекса.
+    
+    Args:
+        index_path (str): Путь к текстовому APKINDEX
+        archive_path (str): Путь к создаваемому архиву
+    """
+    with open(archive_path, 'wb') as archive:
+        # Сегмент подписи записывается без завершающих нулевых блоков tar
+        data = b'synthetic-signature'
+        info = tarfile.TarInfo('.SIGN.RSA.benchmark.rsa.pub')
+        info.size = len(data)
+        padding = b'\0' * (-len(data) % tarfile.BLOCKSIZE)
+        signature = info.tobuf(format=tarfile.USTAR_FORMAT) + data + padding
+        archive.write(gzip.compress(signature))
+        
+        with gzip.GzipFile(fileobj=archive, mode='wb') as gz:
+            with tarfile.open(fileobj=gz, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+                tar.add(index_path, arcname='APKINDEX')
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация синтетического репозитория Alpine')
+    parser.add_argument('path', help='Путь к создаваемому файлу APKINDEX (.tar.gz - архив)')
+    parser.add_argument('--packages', '-n', type=int, default=10000, help='Количество пакетов')
+    parser.add_argument('--fan-out', type=int, default=4, help='Среднее количество зависимостей у пакета')
+    parser.add_argument('--depth', type=int, default=8, help='Количество слоев графа')
+    parser.add_argument('--cycle-density', type=float, default=0.01, help='Доля пакетов с обратной дугой')
+    parser.add_argument('--provider-mix', type=float, default=0.3, help='Доля зависимостей через виртуальные имена')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    args = parser.parse_args()
+    
+    if args.path.endswith('.tar.gz'):
+        index_path = args.path[:-len('.tar.gz')]
+        generate_apkindex(index_path, args.packages, args.fan_out, args.depth,
+                          args.cycle_density, args.provider_mix, args.seed)
+        pack_apkindex(index_path, args.path)
+    else:
+        generate_apkindex(args.path, args.packages, args.fan_out, args.depth,
+                          args.cycle_density, args.provider_mix, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+import pytest
+
+# Модули приложения импортируются как модули верхнего уровня (как при запуске app/main.py)
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+def write_index(path, dependencies):
+    """Запись индекса APKINDEX по словарю {пакет: [зависимости]} в порядке словаря"""
+    with open(path, 'w') as f:
+        for package, depends in dependencies.items():
+            f.write(f"P:{package}\nV:1.0-r0\n")
+            if depends:
+                f.write(f"D:{' '.join(depends)}\n")
+            f.write("\n")
+
+def repository_graph(path):
+    """Граф всего репозитория по файлу индекса"""
+    from apk_parser import APKParser
+    from dependency_graph import DependencyGraph
+    from repository import RepositoryManager
+    
+    graph = DependencyGraph(APKParser(RepositoryManager(path, test_repo_mode=True)))
+    # Предупреждения об отсутствующих пакетах не нужны проверкам
+    with redirect_stdout(io.StringIO()):
+        graph.build_repository_graph()
+    return graph
+
+@pytest.fixture
+def package_graph(tmp_path):
+    """Фабрика графов всего репозитория по словарю {пакет: [зависимости]}"""
+    def build(dependencies):
+        path = str(tmp_path / f'APKINDEX.{len(os.listdir(tmp_path))}')
+        write_index(path, dependencies)
+        return repository_graph(path)
+    return build
+
+@pytest.fixture(scope='session')
+def synthetic_graph(tmp_path_factory):
+    """
+    Фабрика графов синтетического репозитория (synthetic_repo.generate_apkindex)
+    
+    Фабрика принимает количество пакетов и параметры generate_apkindex,
+    а также функцию edit(path), изменяющую файл индекса перед разбором.
+    Каждый вызов создает отдельный индекс, поэтому графы можно изменять.
+    """
+    from synthetic_repo import generate_apkindex
+    
+    def build(package_count, edit=None, **options):
+        path = str(tmp_path_factory.mktemp('synthetic') / 'APKINDEX')
+        generate_apkindex(path, package_count, **options)
+        if edit is not None:
+            edit(path)
+        return repository_graph(path)
+    return build
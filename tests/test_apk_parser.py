@@ -0,0 +1,66 @@
+import os
+import pytest
+from apk_parser import APKParser
+from repository import RepositoryManager
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'content')
+TEST_PROVIDES = os.path.join(CONTENT_DIR, 'test_provides.txt')
+
+@pytest.fixture(scope='module')
+def provides_parser():
+    return APKParser(RepositoryManager(TEST_PROVIDES, test_repo_mode=True))
+
+@pytest.mark.parametrize('dependency, provider', [
+    # k: важнее версии: libfoo (k:10, 1.0.0) против libfoo-new (2.0.0)
+    ('so:libfoo.so.1', 'libfoo'),
+    # При равном k: - наибольшая предоставляемая версия
+    ('cmd:tool', 'tool-new'),
+    # При равных k: и версии - первый в индексе
+    ('pc:bar', 'bar-first'),
+    # Настоящий пакет важнее виртуального имени с любым приоритетом
+    ('libreal', 'libreal'),
+    ('so:libc.musl-x86_64.so.1', 'musl'),
+    # Виртуальное имя без поставщика пропускается, отсутствующий пакет сохраняется
+    ('so:libmissing.so.2', None),
+    ('no-such-package', 'no-such-package'),
+])
+def test_provider_selection(provides_parser, dependency, provider):
+    assert provides_parser.resolve_dependency(dependency) == provider
+
+def test_virtual_dependencies_become_edges(provides_parser):
+    assert provides_parser.get_package_dependencies('app') == ['libfoo', 'tool-new', 'bar-first', 'libreal']
+    assert provides_parser.get_package_dependencies('alpine-baselayout') == ['musl']
+    assert provides_parser.get_provided_version('cmd:tool') == '1.5.0-r0'
+
+def write_repository(path, packages):
+    """Индекс APKINDEX из записей (имя, версия, зависимости, p:)"""
+    with open(path, 'w') as f:
+        for name, version, depends, provides in packages:
+            f.write(f"P:{name}\nV:{version}\nD:{depends}\np:{provides}\n\n")
+    return str(path)
+
+def test_multiple_repositories_priority(tmp_path):
+    main = write_repository(tmp_path / 'main.txt', [
+        ('app', '2.0-r0', 'so:libz.so.1 shared', ''),
+        ('shared', '2.0-r0', '', ''),
+        ('zlib-main', '1.0-r0', '', 'so:libz.so.1=1'),
+    ])
+    community = write_repository(tmp_path / 'community.txt', [
+        ('zlib-community', '1.0-r0', '', 'so:libz.so.1=1'),
+        ('shared', '9.0-r0', '', ''),
+        ('extra', '1.0-r0', 'shared', ''),
+    ])
+    
+    apk_parser = APKParser(RepositoryManager([main, community], test_repo_mode=True))
+    index = apk_parser.get_index()
+    
+    # Запись пакета - из репозитория, указанного раньше, даже с меньшей версией
+    assert index['shared'].version == '2.0-r0'
+    assert list(index) == ['app', 'shared', 'zlib-main', 'zlib-community', 'extra']
+    # При равных k: и версии поставщик берется из репозитория с более высоким приоритетом
+    assert apk_parser.resolve_dependency('so:libz.so.1') == 'zlib-main'
+    assert apk_parser.get_package_dependencies('extra') == ['shared']
+    
+    reversed_parser = APKParser(RepositoryManager([community, main], test_repo_mode=True))
+    assert reversed_parser.get_index()['shared'].version == '9.0-r0'
+    assert reversed_parser.resolve_dependency('so:libz.so.1') == 'zlib-community'
@@ -0,0 +1,62 @@
+import pytest
+from apk_version import compare_versions, parse_dependency, version_key
+
+@pytest.mark.parametrize('left, right', [
+    ('1.0', '1.1'),
+    ('1.9', '1.10'),
+    ('1.2', '1.2.1'),
+    ('1.2', '1.2a'),
+    ('1.2a', '1.2b'),
+    ('1.2_alpha', '1.2_beta'),
+    ('1.2_beta', '1.2_pre'),
+    ('1.2_pre', '1.2_rc'),
+    ('1.2_rc1', '1.2_rc2'),
+    ('1.2_rc', '1.2'),
+    ('1.2', '1.2_cvs'),
+    ('1.2_git', '1.2_p1'),
+    ('1.2_p1', '1.2_p2'),
+    ('1.2-r0', '1.2-r1'),
+    ('1.2-r9', '1.2-r10'),
+    ('1.2-r5', '1.2.1-r0'),
+    ('invalid', '0'),
+])
+def test_version_order(left, right):
+    assert compare_versions(left, right) == -1
+    assert compare_versions(right, left) == 1
+
+def test_equal_versions():
+    assert compare_versions('1.2.3-r0', '1.2.3') == 0
+    assert version_key('1.2.3-r4') == version_key('1.2.3-r4')
+
+@pytest.mark.parametrize('atom, version, expected', [
+    ('foo', None, True),
+    ('foo', '1.0', True),
+    ('foo=1.2-r0', '1.2-r0', True),
+    ('foo=1.2-r0', '1.2-r1', False),
+    ('foo<2', '1.9', True),
+    ('foo<2', '2', False),
+    ('foo<=2', '2', True),
+    ('foo>1.2', '1.2_p1', True),
+    ('foo>1.2', '1.2_rc1', False),
+    ('foo>=1.2', '1.2', True),
+    ('foo>=1.2', '1.1', False),
+    ('foo>=1.2', None, False),
+    ('foo~1.2', '1.2.5-r3', True),
+    ('foo~1.2', '1.20', False),
+    ('foo=~1.2', '1.2', True),
+    ('foo>~1.2', '1.3', True),
+    ('foo<~1.2', '1.2.9', True),
+    ('foo<~1.2', '1.3', False),
+])
+def test_constraint_matches(atom, version, expected):
+    assert parse_dependency(atom).matches(version) is expected
+
+def test_parse_dependency():
+    constraint = parse_dependency('!so:libc.musl-x86_64.so.1>=1.2')
+    assert constraint.conflict
+    assert constraint.name == 'so:libc.musl-x86_64.so.1'
+    assert (constraint.operator, constraint.version) == ('>=', '1.2')
+    assert str(constraint) == '!so:libc.musl-x86_64.so.1>=1.2'
+    
+    assert parse_dependency('bar=>1') is None
+    assert parse_dependency('baz') is parse_dependency('baz')
@@ -0,0 +1,189 @@
+import itertools
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import cache as cache_module
+from cache import IndexCache
+from index_backends import parse_index_stream
+from repository import RepositoryManager
+
+INDEX = b"P:busybox\nV:1.36.1-r0\nD:musl\n\nP:musl\nV:1.2.4-r0\n\n"
+LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+class IndexServer:
+    """Локальный HTTP-сервер индекса с ответом 304 на условные запросы"""
+    
+    def __init__(self):
+        self.body = INDEX
+        self.etag = '"v1"'
+        self.requests = []
+        self.statuses = []
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if self.headers.get('If-None-Match') == server.etag:
+                    server.statuses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                server.statuses.append(200)
+                self.send_response(200)
+                self.send_header('ETag', server.etag)
+                self.send_header('Last-Modified', LAST_MODIFIED)
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/APKINDEX"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+    
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+@pytest.fixture
+def index_server():
+    server = IndexServer()
+    yield server
+    server.close()
+
+class CountingParse:
+    """Функция разбора индекса с подсчетом вызовов (промахов кэша)"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, stream):
+        self.calls += 1
+        return parse_index_stream(stream)
+
+def load(repo_url, cache=None, refresh=False, test_repo_mode=False, parse=parse_index_stream):
+    manager = RepositoryManager(repo_url, test_repo_mode, cache, refresh)
+    return manager.load_index(repo_url, parse)
+
+def test_first_fetch_stores_entry(index_server, tmp_path):
+    cache = IndexCache(str(tmp_path))
+    index = load(index_server.url, cache)
+    
+    assert sorted(index) == ['busybox', 'musl']
+    meta = cache.get_meta(index_server.url)
+    assert meta['etag'] == '"v1"'
+    assert meta['last_modified'] == LAST_MODIFIED
+    assert 'If-None-Match' not in index_server.requests[0]
+
+def test_not_modified_reuses_entry(index_server, tmp_path):
+    cache = IndexCache(str(tmp_path))
+    load(index_server.url, cache)
+    
+    parse = CountingParse()
+    index = load(index_server.url, IndexCache(str(tmp_path)), parse=parse)
+    
+    headers = index_server.requests[-1]
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == LAST_MODIFIED
+    assert index_server.statuses == [200, 304]
+    assert parse.calls == 0
+    assert index['busybox'].depends == ('musl',)
+
+def test_changed_index_is_fetched_again(index_server, tmp_path):
+    cache = IndexCache(str(tmp_path))
+    load(index_server.url, cache)
+    
+    index_server.body = INDEX + b"P:zlib\nV:1.3-r0\n\n"
+    index_server.etag = '"v2"'
+    index = load(index_server.url, cache)
+    
+    assert 'zlib' in index
+    assert index_server.statuses == [200, 200]
+    assert cache.get_meta(index_server.url)['etag'] == '"v2"'
+
+def test_refresh_skips_conditional_request(index_server, tmp_path):
+    cache = IndexCache(str(tmp_path))
+    load(index_server.url, cache)
+    
+    parse = CountingParse()
+    load(index_server.url, cache, refresh=True, parse=parse)
+    
+    assert 'If-None-Match' not in index_server.requests[-1]
+    assert index_server.statuses == [200, 200]
+    assert parse.calls == 1
+
+def test_no_cache(index_server, tmp_path):
+    load(index_server.url)
+    load(index_server.url)
+    
+    assert index_server.statuses == [200, 200]
+    assert all('If-None-Match' not in headers for headers in index_server.requests)
+
+def test_local_file_invalidated_by_mtime_and_size(tmp_path):
+    repo_path = tmp_path / 'APKINDEX'
+    repo_path.write_bytes(INDEX)
+    cache = IndexCache(str(tmp_path / 'cache'))
+    parse = CountingParse()
+    
+    load(str(repo_path), cache, test_repo_mode=True, parse=parse)
+    load(str(repo_path), cache, test_repo_mode=True, parse=parse)
+    assert parse.calls == 1
+    
+    # Тот же размер, другое время изменения
+    stat = os.stat(repo_path)
+    os.utime(repo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load(str(repo_path), cache, test_repo_mode=True, parse=parse)
+    assert parse.calls == 2
+    
+    # Другой размер при прежнем времени изменения
+    stat = os.stat(repo_path)
+    repo_path.write_bytes(INDEX + b"P:zlib\n\n")
+    os.utime(repo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    index = load(str(repo_path), cache, test_repo_mode=True, parse=parse)
+    assert parse.calls == 3
+    assert 'zlib' in index
+    
+    load(str(repo_path), cache, test_repo_mode=True, refresh=True, parse=parse)
+    assert parse.calls == 4
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Строго возрастающее время последнего использования записей
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_module.time, 'time', lambda: float(next(ticks)))
+
+def test_lru_eviction_by_entries(tmp_path, clock):
+    cache = IndexCache(str(tmp_path), max_entries=2)
+    cache.store('a', {}, {'a': 1})
+    cache.store('b', {}, {'b': 1})
+    assert cache.load('a') == {'a': 1}
+    
+    cache.store('c', {}, {'c': 1})
+    assert cache.get_meta('a') is not None
+    assert cache.get_meta('b') is None
+    assert cache.load('b') is None
+    assert cache.load('c') == {'c': 1}
+
+def test_eviction_by_size(tmp_path, clock):
+    payload = 'x' * 1000
+    cache = IndexCache(str(tmp_path), max_size=2500)
+    for key in ('a', 'b', 'c'):
+        cache.store(key, {}, payload)
+    
+    assert cache.get_meta('a') is None
+    assert cache.get_meta('b') is not None
+    assert cache.get_meta('c') is not None
+    assert sorted(name.rsplit('.', 1)[1] for name in os.listdir(tmp_path)) == ['json', 'json', 'pickle', 'pickle']
+
+def test_store_failure_warns_on_stderr(tmp_path, capsys):
+    blocker = tmp_path / 'cache'
+    blocker.write_text('')
+    IndexCache(str(blocker)).store('a', {}, {'a': 1})
+    
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert 'не удалось сохранить индекс в кэш' in captured.err
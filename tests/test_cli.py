@@ -0,0 +1,63 @@
+import os
+import pytest
+from cli import setup_arg_parser, validate_arguments
+from exceptions import ValidationError
+
+TEST_REPOSITORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'content', 'test_repository.txt')
+
+MODES = {
+    'batch': ['--packages', 'nginx', 'busybox'],
+    'arch': ['--arch', 'x86_64', 'aarch64', '--packages', 'nginx'],
+    'install-order': ['-p', 'nginx', '--install-order'],
+}
+
+# Аргументы и имя параметра в сообщении об ошибке
+IGNORED_FLAGS = [
+    (['-o', 'graph.png'], '--output'),
+    (['-R'], '--reverse'),
+    (['-W'], '--whole-repo'),
+    (['-a'], '--ascii-tree'),
+    (['--max-depth', '2'], '--max-depth'),
+    (['--max-degree', '5'], '--max-degree'),
+]
+
+def parse(arguments, mode):
+    repo = TEST_REPOSITORY.replace('test_repository', '{arch}') if mode == 'arch' else TEST_REPOSITORY
+    return setup_arg_parser().parse_args(['-r', repo, *MODES[mode], *arguments])
+
+@pytest.mark.parametrize('mode', ['batch', 'install-order'])
+def test_mode_without_ignored_flags(mode):
+    validate_arguments(parse(['-t'], mode))
+
+@pytest.mark.parametrize('arguments, flag', IGNORED_FLAGS)
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_mode_rejects_ignored_flags(mode, arguments, flag):
+    with pytest.raises(ValidationError, match=flag):
+        validate_arguments(parse(['-t', *arguments], mode))
+
+def test_install_order_rejects_jobs():
+    with pytest.raises(ValidationError, match='--jobs'):
+        validate_arguments(parse(['-t', '--jobs', '2'], 'install-order'))
+
+@pytest.mark.parametrize('mode', ['batch', 'arch'])
+def test_path_weight_requires_install_order(mode):
+    with pytest.raises(ValidationError, match='--path-weight'):
+        validate_arguments(parse(['-t', '--path-weight', 'count'], mode))
+
+def test_path_weight_in_package_mode():
+    arguments = setup_arg_parser().parse_args(['-r', TEST_REPOSITORY, '-t', '-p', 'nginx', '-o', 'graph.dot', '--path-weight', 'count'])
+    with pytest.raises(ValidationError, match='--path-weight'):
+        validate_arguments(arguments)
+
+def test_path_weight_with_install_order():
+    validate_arguments(parse(['-t', '--path-weight', 'count'], 'install-order'))
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_snapshot_only_in_package_mode(mode):
+    with pytest.raises(ValidationError, match='--snapshot'):
+        validate_arguments(parse(['-t', '--snapshot'], mode))
+
+def test_snapshot_requires_cache():
+    arguments = setup_arg_parser().parse_args(['-r', TEST_REPOSITORY, '-t', '-p', 'nginx', '--format', 'json', '--snapshot', '--no-cache'])
+    with pytest.raises(ValidationError, match='--snapshot'):
+        validate_arguments(arguments)
@@ -0,0 +1,59 @@
+import random
+from collections import deque
+import pytest
+from closures import ClosureIndex, bits_from_ids, count_bits, ids_from_bits, relocate_bits
+from compact_graph import CompactGraph
+from .test_compact_graph import random_mapping
+
+def naive_closure(graph, start, reverse=False):
+    """Транзитивное замыкание обходом в ширину (без самой вершины)"""
+    neighbors = graph.predecessors if reverse else graph.successors
+    seen = set()
+    queue = deque(neighbors(start))
+    while queue:
+        node_id = queue.popleft()
+        if node_id not in seen:
+            seen.add(node_id)
+            queue.extend(neighbors(node_id))
+    seen.discard(start)
+    return sorted(seen)
+
+@pytest.mark.parametrize('ids, size', [
+    ([], 0),
+    ([0], 1),
+    ([7, 8, 15, 16], 17),
+    (list(range(0, 4000, 3)), 4000),
+    # Разреженное множество в большом графе
+    ([5, 40000, 99999], 100000),
+    (sorted(random.Random(1).sample(range(50000), 20000)), 50000),
+])
+def test_bits_round_trip(ids, size):
+    bits = bits_from_ids(ids, size)
+    assert ids_from_bits(bits) == ids
+    assert count_bits(bits) == len(ids)
+    assert bits == sum(1 << node_id for node_id in ids)
+
+def test_relocate_bits():
+    ids = [0, 3, 7, 9]
+    # Вершины 9 и 8 переносятся на освободившиеся номера 2 и 5, 8 в множество не входит
+    assert ids_from_bits(relocate_bits(bits_from_ids(ids, 10), [(9, 2), (8, 5)])) == [0, 2, 3, 7]
+
+@pytest.mark.parametrize('reverse', [False, True])
+@pytest.mark.parametrize('seed', range(20))
+def test_closures_match_naive_search(seed, reverse):
+    graph = CompactGraph.from_mapping(random_mapping(seed, count=60, edges=90))
+    closures = ClosureIndex(graph.condensation(), reverse=reverse)
+    
+    for node_id in range(len(graph)):
+        expected = naive_closure(graph, node_id, reverse)
+        assert closures.closure_ids(node_id) == expected
+        assert closures.closure_size(node_id) == len(expected)
+        assert not closures.closure_bits(node_id) >> node_id & 1
+
+def test_deep_condensation_without_recursion():
+    count = 20000
+    graph = CompactGraph.from_mapping({f'p{node}': [f'p{node + 1}'] for node in range(count - 1)})
+    closures = ClosureIndex(graph.condensation())
+    
+    assert closures.closure_size(0) == count - 1
+    assert closures.closure_ids(count - 3) == [count - 2, count - 1]
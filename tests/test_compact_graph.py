@@ -0,0 +1,94 @@
+import random
+from collections import deque
+import pytest
+from compact_graph import CompactGraph
+
+def random_mapping(seed, count=40, edges=70):
+    rng = random.Random(seed)
+    mapping = {f'p{node}': [] for node in range(count)}
+    for _ in range(edges):
+        source, target = rng.randrange(count), rng.randrange(count)
+        if f'p{target}' not in mapping[f'p{source}']:
+            mapping[f'p{source}'].append(f'p{target}')
+    return mapping
+
+def reachable(graph, start):
+    """Вершины, достижимые из start по непустому пути"""
+    seen = set()
+    queue = deque(graph.successors(start))
+    while queue:
+        node_id = queue.popleft()
+        if node_id not in seen:
+            seen.add(node_id)
+            queue.extend(graph.successors(node_id))
+    return seen
+
+def shortest_cycle_length(graph, start, members):
+    """Длина кратчайшего цикла через start внутри компоненты (BFS)"""
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        node_id = queue.popleft()
+        for target in graph.successors(node_id):
+            if target == start:
+                return distance[node_id] + 1
+            if target in members and target not in distance:
+                distance[target] = distance[node_id] + 1
+                queue.append(target)
+
+def test_known_components():
+    graph = CompactGraph.from_mapping({
+        'a': ['b'], 'b': ['c'], 'c': ['a', 'd'], 'd': ['e'], 'e': ['d'], 'f': ['f', 'a'], 'g': [],
+    })
+    condensation = graph.condensation()
+    names = graph.names
+    
+    components = [sorted(names[node_id] for node_id in members) for members in condensation.components]
+    assert components == [['d', 'e'], ['a', 'b', 'c'], ['f'], ['g']]
+    assert [components[component_id] for component_id in condensation.cyclic_components()] == \
+        [['d', 'e'], ['a', 'b', 'c'], ['f']]
+    
+    cycles = [[names[node_id] for node_id in condensation.representative_cycle(component_id)]
+              for component_id in condensation.cyclic_components()]
+    assert cycles == [['d', 'e', 'd'], ['a', 'b', 'c', 'a'], ['f', 'f']]
+
+@pytest.mark.parametrize('seed', range(30))
+def test_components_match_mutual_reachability(seed):
+    graph = CompactGraph.from_mapping(random_mapping(seed))
+    condensation = graph.condensation()
+    component_of = condensation.component_of
+    reach = [reachable(graph, node_id) for node_id in range(len(graph))]
+    
+    for node_id in range(len(graph)):
+        same = {other for other in reach[node_id] if node_id in reach[other]} | {node_id}
+        assert set(condensation.components[component_of[node_id]]) == same
+        assert condensation.is_cyclic(component_of[node_id]) == (node_id in reach[node_id])
+        # Обратный топологический порядок: зависимости имеют меньшие номера
+        for target in graph.successors(node_id):
+            assert component_of[target] <= component_of[node_id]
+
+@pytest.mark.parametrize('seed', range(30))
+def test_representative_cycles_are_shortest_paths(seed):
+    graph = CompactGraph.from_mapping(random_mapping(seed))
+    condensation = graph.condensation()
+    
+    for component_id in condensation.cyclic_components():
+        members = set(condensation.components[component_id])
+        cycle = condensation.representative_cycle(component_id)
+        start = condensation.components[component_id][0]
+        
+        assert cycle[0] == cycle[-1] == start
+        assert len(set(cycle[:-1])) == len(cycle) - 1
+        assert set(cycle) <= members
+        assert all(target in graph.successors(source) for source, target in zip(cycle, cycle[1:]))
+        assert len(cycle) - 1 == shortest_cycle_length(graph, start, members)
+
+def test_long_chain_without_recursion():
+    count = 50000
+    # Цепочка p0 -> p1 -> ... с обратной дугой: одна компонента на всю длину
+    mapping = {f'p{node}': [f'p{node + 1}'] for node in range(count - 1)}
+    mapping[f'p{count - 1}'] = ['p0']
+    condensation = CompactGraph.from_mapping(mapping).condensation()
+    
+    assert len(condensation) == 1
+    assert len(condensation.representative_cycle(0)) == count + 1
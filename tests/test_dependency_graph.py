@@ -0,0 +1,158 @@
+import random
+import re
+import pytest
+from apk_parser import APKParser
+from repository import RepositoryManager
+
+def read_blocks(path):
+    with open(path) as f:
+        return [block for block in f.read().split('\n\n') if block.strip()]
+
+def write_blocks(path, blocks):
+    with open(path, 'w') as f:
+        f.write('\n\n'.join(blocks) + '\n')
+
+def mutate(blocks, seed):
+    """
+    Новая версия индекса: удаление пакетов (на которые обычно остаются ссылки),
+    изменение зависимостей и добавление пакетов, в том числе с именами удаленных
+    """
+    rng = random.Random(seed)
+    names = [re.search(r'^P:(\S+)', block, re.M).group(1) for block in blocks]
+    removed = set(rng.sample(range(len(blocks)), len(blocks) // 50))
+    
+    mutated = []
+    for position, block in enumerate(blocks):
+        if position in removed:
+            continue
+        if rng.random() < 0.02:
+            depends = ' '.join(rng.sample(names, 3))
+            block = re.sub(r'^C:(.*)$', r'C:\1x', block, count=1, flags=re.M)
+            block = re.sub(r'^D:.*$', f'D:{depends}', block, count=1, flags=re.M)
+        mutated.append(block)
+    
+    for number in range(len(blocks) // 100):
+        name = f'extra{number}' if number % 2 else names[rng.choice(sorted(removed))] + '-new'
+        mutated.append(f'C:Qnew{number}=\nP:{name}\nV:1.0-r0\nD:{" ".join(rng.sample(names, 2))}')
+    return mutated
+
+def prune(blocks, seed):
+    """
+    Новая версия индекса: удаление пакетов, на которые никто не ссылается
+    
+    Освободившихся номеров больше, чем новых вершин, поэтому при обновлении
+    часть вершин переносится, а большая часть компонент не затронута.
+    """
+    rng = random.Random(seed)
+    referenced = set()
+    for block in blocks:
+        match = re.search(r'^D:(.*)$', block, re.M)
+        if match:
+            referenced.update(re.split(r'[<>=~]', atom)[0] for atom in match.group(1).split())
+    unused = [
+        position for position, block in enumerate(blocks)
+        if re.search(r'^P:(\S+)', block, re.M).group(1) not in referenced
+    ]
+    removed = set(rng.sample(unused, min(len(unused), len(blocks) // 100)))
+    return [block for position, block in enumerate(blocks) if position not in removed]
+
+def closures(graph):
+    """Транзитивные замыкания всех вершин графа по именам"""
+    return {name: set(graph.get_closure(name)) - {name} for name in graph.compact.names}
+
+def components(graph):
+    """Компоненты сильной связности графа по именам"""
+    names = graph.compact.names
+    return {frozenset(names[node_id] for node_id in members) for members in graph.get_condensation().components}
+
+def check_condensation(graph):
+    """Граф конденсации обновленного графа совпадает с построенным заново"""
+    condensation = graph.get_condensation()
+    for component_id, members in enumerate(condensation.components):
+        assert all(condensation.component_of[node_id] == component_id for node_id in members)
+        successors = list(condensation.dag.successors(component_id))
+        assert successors == condensation.component_successors(component_id)
+        # Обратный топологический порядок: зависимости имеют меньшие номера
+        assert all(successor < component_id for successor in successors)
+
+def parser_for(path):
+    apk_parser = APKParser(RepositoryManager(path, test_repo_mode=True))
+    apk_parser.get_index()
+    return apk_parser
+
+@pytest.mark.parametrize('seed', [1, 2, 3, 4, 5])
+def test_apply_index_diff_matches_full_rebuild(synthetic_graph, seed, capsys):
+    old_graph = synthetic_graph(1500, cycle_density=0.05, seed=seed)
+    old_closures = closures(old_graph)
+    rebuilt = synthetic_graph(
+        1500, cycle_density=0.05, seed=seed,
+        edit=lambda path: write_blocks(path, mutate(read_blocks(path), seed))
+    )
+    new_closures = closures(rebuilt)
+    
+    # Изменения применяются с отдельным парсером нового индекса
+    new_parser = parser_for(rebuilt.apk_parser.repository_manager.repo_url)
+    updated = old_graph.fork(new_parser)
+    changed = updated.apply_index_diff(new_parser.diff_from(old_graph.apk_parser))
+    capsys.readouterr()
+    
+    assert {name: list(deps) for name, deps in updated.graph.items()} == \
+        {name: list(deps) for name, deps in rebuilt.graph.items()}
+    check_condensation(updated)
+    assert components(updated) == components(rebuilt)
+    assert closures(updated) == new_closures
+    
+    expected = {name for name in new_closures if name in old_closures and old_closures[name] != new_closures[name]}
+    assert set(changed) == expected
+    assert len(changed) == len(expected)
+
+def test_apply_index_diff_reuses_unaffected_components(package_graph):
+    old_graph = package_graph({'a': ['b'], 'b': ['c'], 'c': [], 'd': ['e', 'f'], 'e': ['f'], 'f': ['e']})
+    assert old_graph.get_closure('d') == ['e', 'f']
+    rebuilt = package_graph({'a': ['c'], 'c': [], 'd': ['e', 'f'], 'e': ['f'], 'f': ['e']})
+    
+    updated = old_graph.fork(rebuilt.apk_parser)
+    changed = updated.apply_index_diff(rebuilt.apk_parser.diff_from(old_graph.apk_parser))
+    
+    assert changed == ['a']
+    # Удаленный пакет освобождает номер, на него переносится последняя вершина
+    assert updated.compact.names == ['a', 'f', 'c', 'd', 'e']
+    check_condensation(updated)
+    assert components(updated) == components(rebuilt)
+    
+    # Замыкание компоненты вне затронутой области перенесено без пересчета
+    condensation = updated.get_condensation()
+    component_id = condensation.component_of[updated.compact.ids['d']]
+    assert updated.get_closure_index()._reach[component_id] is not None
+    assert updated.get_closure('d') == ['f', 'e']
+    assert updated.get_closure('a') == ['c']
+    assert old_graph.get_closure('a') == ['b', 'c']
+
+def test_apply_index_diff_chain(synthetic_graph, capsys):
+    def second(path):
+        write_blocks(path, prune(mutate(read_blocks(path), 6), 7))
+    
+    old_graph = synthetic_graph(1500, cycle_density=0.05, seed=6)
+    middle = synthetic_graph(1500, cycle_density=0.05, seed=6, edit=lambda path: write_blocks(path, mutate(read_blocks(path), 6)))
+    rebuilt = synthetic_graph(1500, cycle_density=0.05, seed=6, edit=second)
+    
+    first_parser = parser_for(middle.apk_parser.repository_manager.repo_url)
+    first = old_graph.fork(first_parser)
+    first.apply_index_diff(first_parser.diff_from(old_graph.apk_parser))
+    # Запомненные замыкания первой копии переносятся во вторую
+    first_closures = closures(first)
+    dependents = {name: set(packages) for name, packages in first._dependents.items()}
+    
+    second_parser = parser_for(rebuilt.apk_parser.repository_manager.repo_url)
+    updated = first.fork(second_parser)
+    updated.apply_index_diff(second_parser.diff_from(first_parser))
+    capsys.readouterr()
+    
+    assert {name: list(deps) for name, deps in updated.graph.items()} == \
+        {name: list(deps) for name, deps in rebuilt.graph.items()}
+    check_condensation(updated)
+    assert components(updated) == components(rebuilt)
+    assert closures(updated) == closures(rebuilt)
+    assert closures(first) == first_closures
+    # Обратный индекс ссылок копии не изменяет индекс исходного графа
+    assert first._dependents == dependents
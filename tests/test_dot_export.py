@@ -0,0 +1,49 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from apk_parser import APKParser
+from dependency_graph import DependencyGraph
+from dot_export import render_graph
+from exceptions import GraphRenderError
+from repository import RepositoryManager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_REPOSITORY = os.path.join(ROOT_DIR, 'content', 'test_repository.txt')
+MAIN_PATH = os.path.join(ROOT_DIR, 'app', 'main.py')
+
+@pytest.fixture
+def graph_builder(capsys):
+    graph = DependencyGraph(APKParser(RepositoryManager(TEST_REPOSITORY, test_repo_mode=True)))
+    graph.build_dependency_graph('nginx')
+    capsys.readouterr()
+    return graph
+
+def test_dot_output_without_graphviz(graph_builder, tmp_path, monkeypatch):
+    monkeypatch.setattr(shutil, 'which', lambda name: None)
+    output_path, stats = render_graph(graph_builder, str(tmp_path / 'graph.dot'), 'nginx')
+    
+    assert output_path == str(tmp_path / 'graph.dot')
+    assert stats['nodes'] > 1
+    assert (tmp_path / 'graph.dot').read_text(encoding='utf-8').startswith('digraph')
+
+@pytest.mark.parametrize('extension', ['.png', '.svg', '.pdf'])
+def test_image_without_graphviz_fails(graph_builder, tmp_path, monkeypatch, extension):
+    monkeypatch.setattr(shutil, 'which', lambda name: None)
+    with pytest.raises(GraphRenderError):
+        render_graph(graph_builder, str(tmp_path / f'graph{extension}'), 'nginx')
+    
+    assert not (tmp_path / f'graph{extension}').exists()
+    assert (tmp_path / 'graph.dot').read_text(encoding='utf-8').startswith('digraph')
+
+def test_image_without_graphviz_exit_code(tmp_path):
+    env = dict(os.environ, PATH=str(tmp_path))
+    process = subprocess.run(
+        [sys.executable, MAIN_PATH, '--no-cache', '-p', 'nginx', '-r', TEST_REPOSITORY, '-t', '-o', str(tmp_path / 'graph.png')],
+        capture_output=True, text=True, env=env
+    )
+    
+    assert process.returncode == 1
+    assert 'Graphviz' in process.stderr
+    assert (tmp_path / 'graph.dot').exists()
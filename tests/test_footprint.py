@@ -0,0 +1,68 @@
+import random
+from array import array
+import pytest
+from closures import bits_from_ids
+from footprint import PLANE_MIN_PACKAGES, weight_planes
+
+@pytest.mark.parametrize('weights', [
+    [],
+    [0, 0, 0],
+    [1, 2, 3, 255, 256, 65535],
+    [2 ** 40 + 5, 7, 0, 2 ** 63 - 1],
+    [random.Random(seed).randrange(10 ** 9) for seed in range(1000)],
+])
+def test_weight_planes_match_naive_bits(weights):
+    planes = weight_planes(array('Q', weights))
+    
+    assert len(planes) == max(weights, default=0).bit_length()
+    for bit, plane in enumerate(planes):
+        assert plane == bits_from_ids([node_id for node_id, weight in enumerate(weights) if weight >> bit & 1], len(weights))
+
+@pytest.fixture(scope='module')
+def repository(synthetic_graph):
+    return synthetic_graph(1500, cycle_density=0.05, seed=4)
+
+def naive_totals(graph_builder, names):
+    index = graph_builder.apk_parser.get_index()
+    records = [index[name] for name in names if name in index]
+    return len(names), sum(record.size for record in records), sum(record.installed_size for record in records)
+
+def install_set(graph_builder, name):
+    return {name} | set(graph_builder.get_closure(name))
+
+def test_install_totals_match_naive_sums(repository):
+    footprint = repository.get_footprint_index()
+    
+    sizes = set()
+    for node_id, name in enumerate(repository.compact.names):
+        names = install_set(repository, name)
+        sizes.add(len(names) >= PLANE_MIN_PACKAGES)
+        assert footprint.install_totals(node_id) == naive_totals(repository, names)
+    # Проверены оба способа суммирования: по идентификаторам и по плоскостям
+    assert sizes == {False, True}
+
+def test_marginal_totals_match_naive_sums(repository):
+    footprint = repository.get_footprint_index()
+    names = repository.compact.names
+    rng = random.Random(9)
+    
+    installed_ids = rng.sample(range(len(names)), 5)
+    installed = set()
+    for node_id in installed_ids:
+        installed |= install_set(repository, names[node_id])
+    installed_bits = footprint.union_bits(installed_ids)
+    
+    for node_id in rng.sample(range(len(names)), 200):
+        expected = naive_totals(repository, install_set(repository, names[node_id]) - installed)
+        assert footprint.marginal_totals(node_id, installed_bits) == expected
+        assert footprint.marginal_totals(node_id, 0) == footprint.install_totals(node_id)
+
+def test_totals_of_arbitrary_sets(repository):
+    footprint = repository.get_footprint_index()
+    names = repository.compact.names
+    rng = random.Random(3)
+    
+    for count in (0, 1, PLANE_MIN_PACKAGES - 1, PLANE_MIN_PACKAGES, 700, len(names)):
+        node_ids = rng.sample(range(len(names)), count)
+        expected = naive_totals(repository, [names[node_id] for node_id in node_ids])
+        assert footprint.totals(bits_from_ids(node_ids, len(names))) == expected
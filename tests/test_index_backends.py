@@ -0,0 +1,87 @@
+import io
+import json
+import pytest
+from exceptions import APKParseError
+from index_backends import JSON_CHUNK_SIZE, JsonIndexBackend, parse_index_stream
+
+PACKAGES = {
+    'numpy': {'version': '1.26.4', 'dependencies': ['python3', 'openblas>=0.3'], 'size': 1.5e10,
+              'installed_size': 123456, 'provider_priority': 10, 'score': -2.25E-3},
+    'python3': {'version': '3.11.8', 'dependencies': [], 'provides': ['cmd:python3'], 'size': 10},
+    'openblas': {'name': 'openblas', 'version': '0.3.26', 'size': 7, 'extra': {'nested': [1.0, 2e5, {}]}},
+}
+
+class ShortReads:
+    """Поток, отдающий не больше limit байт за чтение (границы блоков в произвольных местах)"""
+    
+    def __init__(self, data, limit):
+        self._stream = io.BytesIO(data)
+        self._limit = limit
+    
+    def read(self, size=-1):
+        return self._stream.read(min(size, self._limit) if size >= 0 else self._limit)
+
+def summary(index):
+    return {
+        name: (record.version, record.depends, record.provides, record.provider_priority, record.size, record.installed_size)
+        for name, record in index.items()
+    }
+
+EXPECTED = {
+    'numpy': ('1.26.4', ('python3', 'openblas>=0.3'), (), 10, 15000000000, 123456),
+    'python3': ('3.11.8', (), ('cmd:python3',), 0, 10, 0),
+    'openblas': ('0.3.26', (), (), 0, 7, 0),
+}
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 7, 16])
+def test_short_reads(indent, limit):
+    data = json.dumps({'meta': {'generated': 1.5e10}, 'packages': PACKAGES}, indent=indent).encode('utf-8')
+    assert summary(JsonIndexBackend().parse(ShortReads(data, limit))) == EXPECTED
+
+def test_numbers_across_chunk_boundary():
+    # Пропускаемые разделы читаются по элементам, поэтому число разбирается
+    # отдельно; граница первого блока проходит через каждую его позицию
+    head = '{"meta": {"filler": "'
+    middle = '", "generated": '
+    for offset in range(len('1.5e10') + 1):
+        filler = 'x' * (JSON_CHUNK_SIZE - offset - len(head) - len(middle))
+        document = head + filler + middle + '1.5e10}, "packages": {"pkg": {"version": "1", "size": 7}}}'
+        assert document.index('1.5e10') + offset == JSON_CHUNK_SIZE
+        index = parse_index_stream(io.BytesIO(document.encode('utf-8')))
+        assert index['pkg'].size == 7
+
+def test_list_document():
+    data = json.dumps([{'name': 'a', 'dependencies': ['b']}, {'name': 'b'}]).encode('utf-8')
+    assert summary(parse_index_stream(io.BytesIO(data)))['a'][1] == ('b',)
+
+@pytest.mark.parametrize('data', [
+    b'{"packages": {"a": {"version": "1"}',
+    b'{"packages": {"a": {"version": 1.}}}',
+    b'{"packages": 5}',
+    b'{"packages": {"a": {"dependencies": "b"}}}',
+])
+def test_invalid_documents(data):
+    with pytest.raises(APKParseError):
+        parse_index_stream(io.BytesIO(data))
+
+def test_syntax_error_does_not_read_rest_of_stream():
+    packages = ', '.join(f'"pkg{number}": {{"version": "1", "size": {number}}}' for number in range(200000))
+    data = ('{"packages": {"bad": {"version": "1",, "size": 1}, ' + packages + '}}').encode('utf-8')
+    stream = io.BytesIO(data)
+    reader = io.BufferedReader(stream)
+    
+    with pytest.raises(APKParseError):
+        parse_index_stream(reader)
+    # Прочитан первый блок (и упреждающее чтение буфера), а не весь поток
+    assert len(data) > 50 * JSON_CHUNK_SIZE
+    assert stream.tell() <= 2 * JSON_CHUNK_SIZE
+
+@pytest.mark.parametrize('limit', [1, 3, 7])
+def test_escapes_and_literals_across_reads(limit):
+    packages = {
+        'a': {'version': '1', 'dependencies': ['b'], 'note': 'é😀\\"\n', 'flag': False, 'empty': None},
+        'b': {'version': '2', 'dependencies': [], 'flag': True},
+    }
+    data = json.dumps({'packages': packages}).encode('utf-8')
+    assert summary(JsonIndexBackend().parse(ShortReads(data, limit)))['a'][1] == ('b',)
@@ -0,0 +1,87 @@
+import functools
+import pytest
+
+def reachable(graph, start):
+    """Пакеты, достижимые из start по дугам графа (без самого start, если он не в цикле)"""
+    seen = set()
+    stack = list(graph[start])
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(graph[name])
+    return seen
+
+@pytest.fixture(scope='module', params=[1, 2])
+def repository(request, synthetic_graph):
+    graph_builder = synthetic_graph(1200, cycle_density=0.05, seed=request.param)
+    graph = {name: list(deps) for name, deps in graph_builder.graph.items()}
+    reach = {name: reachable(graph, name) for name in graph}
+    return graph_builder, graph, reach
+
+def group_levels(waves):
+    """Номер группы и волны каждого пакета"""
+    group_of = {}
+    wave_of = []
+    for wave_number, wave in enumerate(waves):
+        for group in wave:
+            for name in group:
+                assert name not in group_of
+                group_of[name] = len(wave_of)
+            wave_of.append(wave_number)
+    return group_of, wave_of
+
+def test_waves_are_cycle_groups_in_dependency_order(repository):
+    graph_builder, graph, reach = repository
+    waves = graph_builder.get_install_waves()
+    group_of, wave_of = group_levels(waves)
+    
+    assert set(group_of) == set(graph)
+    assert any(len(group) > 1 for wave in waves for group in wave)
+    for name, dependencies in graph.items():
+        # Группа - пакеты, взаимно достижимые друг из друга
+        assert {other for other in graph if group_of[other] == group_of[name]} == \
+            {name} | {other for other in reach[name] if name in reach[other]}
+        
+        level = wave_of[group_of[name]]
+        dependency_levels = [wave_of[group_of[dep]] for dep in dependencies if group_of[dep] != group_of[name]]
+        assert all(dependency_level < level for dependency_level in dependency_levels)
+    
+    # Волна группы - первая, в которой установлены все ее зависимости
+    for wave_number, wave in enumerate(waves):
+        for group in wave:
+            dependency_levels = [
+                wave_of[group_of[dep]] for name in group for dep in graph[name] if group_of[dep] != group_of[name]
+            ]
+            assert wave_number == (max(dependency_levels) + 1 if dependency_levels else 0)
+
+@pytest.mark.parametrize('weight', [None, 'size', 'installed_size'])
+def test_critical_path_is_heaviest_chain(repository, weight):
+    graph_builder, graph, _ = repository
+    group_of, _ = group_levels(graph_builder.get_install_waves())
+    index = graph_builder.apk_parser.get_index()
+    
+    group_weight = {}
+    group_deps = {}
+    for name, dependencies in graph.items():
+        group = group_of[name]
+        record = index.get(name)
+        package_weight = 1 if weight is None else (getattr(record, weight) if record is not None else 0)
+        group_weight[group] = group_weight.get(group, 0) + package_weight
+        group_deps.setdefault(group, set()).update(group_of[dep] for dep in dependencies)
+    for group, deps in group_deps.items():
+        deps.discard(group)
+    
+    @functools.lru_cache(maxsize=None)
+    def heaviest(group):
+        return group_weight[group] + max((heaviest(dep) for dep in group_deps[group]), default=0)
+    
+    total, path = graph_builder.get_critical_path(weight)
+    
+    assert total == max(heaviest(group) for group in group_weight)
+    groups = [group_of[members[0]] for members in path]
+    assert all(group_of[name] == group for members, group in zip(path, groups) for name in members)
+    assert sum(group_weight[group] for group in groups) == total
+    # Путь идет от зависимостей к зависящим пакетам
+    for dependency, dependent in zip(groups, groups[1:]):
+        assert dependency in group_deps[dependent]
@@ -0,0 +1,105 @@
+import json
+import threading
+import pytest
+import instrumentation
+
+@pytest.fixture(autouse=True)
+def disabled():
+    instrumentation.disable()
+    yield
+    instrumentation.disable()
+
+@instrumentation.timed('work')
+def work(value):
+    return value * 2
+
+@instrumentation.timed('fail')
+def fail():
+    raise ValueError('ошибка')
+
+def test_disabled_by_default():
+    assert instrumentation.active() is None
+
+def test_disabled_phase_is_shared_empty_context():
+    first = instrumentation.phase('a')
+    second = instrumentation.phase('b')
+    assert first is second is instrumentation._NO_PHASE
+    with first:
+        with second:
+            pass
+    assert instrumentation.active() is None
+
+def test_disabled_count_and_timed_record_nothing():
+    instrumentation.count('items', 5)
+    assert work(21) == 42
+    with pytest.raises(ValueError):
+        fail()
+    assert instrumentation.active() is None
+
+def test_disabled_pipeline_never_touches_recorder(monkeypatch, package_graph):
+    def forbidden(*args, **kwargs):
+        raise AssertionError('замеры выключены')
+    
+    for name in ('count', 'add_time', 'phase', 'counted'):
+        monkeypatch.setattr(instrumentation.Instrumentation, name, forbidden)
+    
+    graph = package_graph({'a': ['b'], 'b': ['c'], 'c': ['a'], 'd': ['a']})
+    assert graph.get_closure('d') == ['a', 'b', 'c']
+    assert graph.has_cycles()
+    assert list(graph.iter_tree_lines('d'))
+    assert instrumentation.active() is None
+
+def test_enabled_records_timers_and_counters():
+    recorder = instrumentation.enable()
+    assert instrumentation.active() is recorder
+    
+    with instrumentation.phase('outer'):
+        with instrumentation.phase('inner'):
+            instrumentation.count('items', 3)
+    instrumentation.count('items')
+    assert work(1) == 2
+    with pytest.raises(ValueError):
+        fail()
+    assert list(recorder.counted(iter(range(4)), 'counted')) == [0, 1, 2, 3]
+    
+    assert recorder.counters == {'items': 4, 'counted': 4}
+    assert {name: calls for name, (calls, seconds) in recorder.timers.items()} == {
+        'outer': 1, 'inner': 1, 'work': 1, 'fail': 1
+    }
+    assert recorder.timers['outer'][1] >= recorder.timers['inner'][1]
+    # События собираются только для трассы
+    assert recorder.events is None
+    
+    instrumentation.disable()
+    instrumentation.count('items')
+    assert recorder.counters['items'] == 4
+
+def test_counts_from_threads():
+    recorder = instrumentation.enable()
+    
+    def run():
+        for _ in range(1000):
+            with instrumentation.phase('thread'):
+                instrumentation.count('items')
+    
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert recorder.counters['items'] == 4000
+    assert recorder.timers['thread'][0] == 4000
+
+def test_chrome_trace(tmp_path):
+    recorder = instrumentation.enable(trace=True)
+    with instrumentation.phase('parse'):
+        instrumentation.count('packages', 2)
+    
+    path = tmp_path / 'trace.json'
+    recorder.write_chrome_trace(str(path))
+    events = json.loads(path.read_text(encoding='utf-8'))['traceEvents']
+    
+    assert [(event['name'], event['ph']) for event in events] == [('parse', 'X'), ('counters', 'C')]
+    assert events[0]['dur'] >= 0
+    assert events[1]['args'] == {'packages': 2}
@@ -0,0 +1,82 @@
+import io
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from multi_arch import ArchGraph, build_arch_graph, run_arch_diff
+from synthetic_repo import generate_apkindex
+
+ARCHES = ['x86_64', 'aarch64', 'armv7']
+
+@pytest.fixture(scope='module')
+def arch_graphs(tmp_path_factory, synthetic_graph):
+    """Графы архитектур и для проверки - графы тех же индексов, построенные напрямую"""
+    tmp_dir = tmp_path_factory.mktemp('multi_arch')
+    results = []
+    graphs = []
+    for seed, arch in enumerate(ARCHES):
+        # Третья архитектура меньше: таблицы имен различаются
+        package_count = 300 if seed < 2 else 280
+        path = tmp_dir / arch / 'APKINDEX'
+        path.parent.mkdir()
+        generate_apkindex(str(path), package_count, cycle_density=0.05, seed=seed)
+        results.append(build_arch_graph(arch, [str(path)], True, None, False, False))
+        graphs.append(synthetic_graph(package_count, cycle_density=0.05, seed=seed))
+    return results, graphs
+
+def cycle_groups(graph):
+    condensation = graph.get_condensation()
+    return {
+        frozenset(graph.compact.names[node_id] for node_id in condensation.components[component_id])
+        for component_id in condensation.cyclic_components()
+    }
+
+def expected_records(results, graphs, packages):
+    records = []
+    baseline = graphs[0]
+    for result, graph in zip(results[1:], graphs[1:]):
+        compared = packages or list(dict.fromkeys([*baseline.compact.names, *graph.compact.names]))
+        for package in compared:
+            closures = [
+                set(builder.get_closure(package)) if package in builder.compact.ids else None
+                for builder in (baseline, graph)
+            ]
+            if closures[0] != closures[1]:
+                records.append(('closure', result.arch, package, sorted((closures[1] or set()) - (closures[0] or set()))))
+        
+        cycles = [cycle_groups(builder) for builder in (baseline, graph)]
+        if cycles[0] != cycles[1]:
+            records.append(('cycles', result.arch, None, sorted(sorted(cycle) for cycle in cycles[1] - cycles[0])))
+    return records
+
+def diff(results, packages=None, executor=None):
+    out = io.StringIO()
+    count = run_arch_diff(results, packages, out, executor)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == len(records)
+    return [(record['kind'], record['arch'], record.get('package'), record['added']) for record in records]
+
+def test_arch_graph_pickles_without_closures(arch_graphs):
+    results, _ = arch_graphs
+    result = results[0]
+    data = pickle.dumps(result)
+    # Запомненные замыкания не увеличивают данные, передаваемые между процессами
+    result.closure_bits('pkg0')
+    assert pickle.dumps(result) == data
+    
+    restored = pickle.loads(data)
+    assert isinstance(restored, ArchGraph)
+    assert restored.closure_names('pkg0') == result.closure_names('pkg0')
+
+@pytest.mark.parametrize('packages', [None, ['pkg0', 'pkg150', 'pkg290', 'no-such-package']])
+def test_diff_matches_direct_closures(arch_graphs, packages):
+    results, graphs = arch_graphs
+    records = diff(results, packages)
+    
+    assert records
+    assert sorted(records) == sorted(expected_records(results, graphs, packages))
+
+def test_diff_in_process_pool(arch_graphs):
+    results, _ = arch_graphs
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert diff(results, executor=executor) == diff(results)
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import pytest
+from output import FIELDS, LIST_SECTIONS, WRITE_CHUNK, create_writer
+
+# Имена со специальными символами CSV и JSON между обычными
+NAMES = [f'pkg{number}' for number in range(2 * WRITE_CHUNK + 7)]
+NAMES[5] = 'with,comma'
+NAMES[WRITE_CHUNK + 3] = 'with "quotes"'
+NAMES[-1] = 'line\nbreak é'
+CYCLES = [['a', 'b', 'a'], ['c', 'c']]
+STATS = {'dependencies': len(NAMES), 'cycles': 2}
+
+class RecordingStream(io.StringIO):
+    """Поток, запоминающий размеры операций записи"""
+    
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+    
+    def write(self, text):
+        self.writes.append(len(text))
+        return super().write(text)
+
+def write_session(output_format, out):
+    writer = create_writer(output_format, out)
+    writer.begin('root')
+    writer.write_names('dependency', 'root', NAMES)
+    writer.write_names('reverse_dependency', 'root', [])
+    writer.write_cycles(CYCLES)
+    writer.write_stats('root', STATS)
+    writer.end()
+
+def expected_records():
+    records = [('dependency', 'root', name, None) for name in NAMES]
+    for number, cycle in enumerate(CYCLES, 1):
+        records.extend(('cycle', source, target, number) for source, target in zip(cycle, cycle[1:]))
+    records.extend(('stat', 'root', name, value) for name, value in STATS.items())
+    return records
+
+def test_ndjson():
+    out = io.StringIO()
+    write_session('ndjson', out)
+    
+    lines = out.getvalue().splitlines()
+    assert [tuple(json.loads(line)[field] for field in FIELDS) for line in lines] == expected_records()
+
+def test_csv_quoting():
+    out = io.StringIO()
+    write_session('csv', out)
+    
+    rows = list(csv.reader(io.StringIO(out.getvalue(), newline='')))
+    assert tuple(rows[0]) == FIELDS
+    expected = [tuple('' if value is None else str(value) for value in record) for record in expected_records()]
+    assert [tuple(row) for row in rows[1:]] == expected
+    # Обычные имена выводятся без кавычек
+    assert 'dependency,root,pkg0,\n' in out.getvalue()
+    assert '"with,comma"' in out.getvalue()
+
+def test_json_document():
+    out = io.StringIO()
+    write_session('json', out)
+    
+    document = json.loads(out.getvalue())
+    assert document == {
+        'package': 'root',
+        LIST_SECTIONS['dependency']: NAMES,
+        LIST_SECTIONS['reverse_dependency']: [],
+        'cycles': CYCLES,
+        'stats': STATS,
+    }
+
+@pytest.mark.parametrize('output_format', ['json', 'ndjson', 'csv'])
+def test_records_are_written_in_chunks(output_format):
+    out = RecordingStream()
+    writer = create_writer(output_format, out)
+    writer.begin('root')
+    writer.write_names('dependency', 'root', NAMES[:WRITE_CHUNK // 2])
+    # Меньше блока записей - в поток еще ничего не выведено
+    assert out.writes == []
+    
+    writer.write_names('transitive_dependency', 'root', NAMES)
+    writer.end()
+    record_count = WRITE_CHUNK // 2 + len(NAMES)
+    assert 1 <= len(out.writes) <= record_count // WRITE_CHUNK + 2
@@ -0,0 +1,62 @@
+import gzip
+import os
+import pytest
+from cache import IndexCache
+from exceptions import RepositoryError
+from index_backends import parse_index_stream
+from repository import RepositoryManager
+from synthetic_repo import generate_apkindex, pack_apkindex
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'content')
+TEST_REPOSITORY = os.path.join(CONTENT_DIR, 'test_repository.txt')
+
+def records(index):
+    """Индекс в виде сравнимых значений (PackageRecord сравнивается по ссылке)"""
+    return {name: record.__reduce__()[1] for name, record in index.items()}
+
+def load(path, cache_dir=None):
+    cache = IndexCache(str(cache_dir)) if cache_dir is not None else None
+    return RepositoryManager(path, test_repo_mode=True, cache=cache).load_index(path, parse_index_stream)
+
+@pytest.fixture(scope='module')
+def synthetic_index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('index') / 'APKINDEX')
+    generate_apkindex(path, 3000, seed=3)
+    return path
+
+def test_plain_gzip_and_tar_gz_match_text(synthetic_index, tmp_path):
+    expected = records(load(synthetic_index))
+    
+    gz_path = tmp_path / 'APKINDEX.gz'
+    with open(synthetic_index, 'rb') as f:
+        gz_path.write_bytes(gzip.compress(f.read()))
+    archive_path = tmp_path / 'APKINDEX.tar.gz'
+    pack_apkindex(synthetic_index, str(archive_path))
+    
+    assert len(expected) == 3000
+    assert records(load(str(gz_path))) == expected
+    assert records(load(str(archive_path))) == expected
+
+@pytest.mark.parametrize('kind', ['gz', 'tar.gz'])
+@pytest.mark.parametrize('fraction', [0.1, 0.5, 0.99])
+def test_truncated_gzip_is_rejected(synthetic_index, tmp_path, kind, fraction):
+    if kind == 'gz':
+        with open(synthetic_index, 'rb') as f:
+            data = gzip.compress(f.read())
+    else:
+        archive_path = tmp_path / 'APKINDEX.tar.gz'
+        pack_apkindex(synthetic_index, str(archive_path))
+        data = archive_path.read_bytes()
+    
+    truncated = tmp_path / f'truncated.{kind}'
+    truncated.write_bytes(data[:int(len(data) * fraction)])
+    cache_dir = tmp_path / 'cache'
+    
+    with pytest.raises(RepositoryError):
+        load(str(truncated), cache_dir)
+    # Усеченный индекс не попадает в кэш
+    assert IndexCache(str(cache_dir)).get_meta(os.path.abspath(truncated)) is None
+
+def test_missing_file():
+    with pytest.raises(RepositoryError):
+        load(os.path.join(CONTENT_DIR, 'no-such-file.txt'))
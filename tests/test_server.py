@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import threading
+import pytest
+from repository import RepositoryManager
+from server import QueryServer
+
+TEST_REPOSITORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'content', 'test_repository.txt')
+
+@pytest.fixture(scope='module')
+def server():
+    query_server = QueryServer(RepositoryManager(TEST_REPOSITORY, test_repo_mode=True))
+    query_server.snapshot, _ = query_server.load()
+    return query_server
+
+def request(server, payload):
+    line = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    data = asyncio.run(server.handle_request(line))
+    assert data.endswith(b'\n')
+    return json.loads(data)
+
+def test_closure(server):
+    response = request(server, {'op': 'closure', 'package': 'busybox', 'id': 7})
+    assert response == {'ok': True, 'id': 7, 'result': ['musl']}
+    # Повторный запрос отвечает запомненным результатом
+    assert request(server, {'op': 'closure', 'package': 'busybox', 'id': 7}) == response
+
+def test_stats(server):
+    result = request(server, {'op': 'stats'})['result']
+    assert result['generation'] == 1
+    assert result['packages'] > 0
+
+@pytest.mark.parametrize('payload', [
+    b'not json',
+    b'[1, 2]',
+    {'package': 'busybox'},
+    {'op': ['closure'], 'package': 'busybox'},
+    {'op': {'closure': 1}},
+    {'op': 'unknown'},
+    {'op': 'closure', 'package': 'no-such-package'},
+    {'op': 'closure', 'package': ['busybox']},
+    {'op': 'deps', 'package': {'name': 'busybox'}},
+    {'op': 'footprint', 'package': 'busybox', 'installed': 'musl'},
+    {'op': 'footprint', 'package': 'busybox', 'installed': [1]},
+])
+def test_invalid_requests_answer_with_error(server, payload):
+    response = request(server, payload)
+    assert response['ok'] is False
+    assert response['error']
+
+def test_unexpected_error_keeps_connection(server, monkeypatch):
+    def broken(snapshot, request):
+        raise KeyError('broken')
+    monkeypatch.setitem(server._operations, 'stats', broken)
+    
+    response = request(server, {'op': 'stats', 'id': 'a'})
+    assert response['ok'] is False and response['id'] == 'a'
+    assert 'KeyError' in response['error']
+
+def test_connection_survives_bad_request(server, tmp_path):
+    async def session():
+        path = str(tmp_path / 'server.sock')
+        listener = await asyncio.start_unix_server(server._handle_client, path)
+        async with listener:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"op": ["closure"]}\n{"op": "closure", "package": "busybox"}\n')
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+            await writer.wait_closed()
+        return responses
+    
+    first, second = asyncio.run(session())
+    assert first['ok'] is False
+    assert second == {'ok': True, 'result': ['musl']}
+
+@pytest.mark.parametrize('operation', ['closure', 'footprint'])
+def test_slow_query_does_not_block_event_loop(server, monkeypatch, operation):
+    released = threading.Event()
+    
+    def slow(snapshot, request):
+        # Вычисление в цикле событий не дождалось бы запроса stats
+        assert released.wait(5)
+        return ['musl']
+    monkeypatch.setitem(server._operations, operation, slow)
+    monkeypatch.setattr(server.snapshot, '_results', type(server.snapshot._results)())
+    
+    async def session():
+        slow_request = asyncio.ensure_future(server.handle_request(
+            json.dumps({'op': operation, 'package': 'busybox'}).encode('utf-8')
+        ))
+        # Медленный запрос начинает выполняться до запроса stats
+        await asyncio.sleep(0.05)
+        stats = json.loads(await server.handle_request(b'{"op": "stats"}'))
+        released.set()
+        return stats, json.loads(await slow_request)
+    
+    stats, response = asyncio.run(session())
+    assert stats['ok'] is True
+    assert response == {'ok': True, 'result': ['musl']}
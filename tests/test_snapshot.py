@@ -0,0 +1,86 @@
+import gc
+import pickle
+import re
+import sys
+import pytest
+from dependency_graph import DependencyGraph
+from snapshot import IndexSnapshot
+
+def add_conflicts(path, step):
+    """Конфликт "!" с соседним пакетом у каждого step-го пакета, уже имеющего зависимости"""
+    with open(path) as f:
+        blocks = f.read().split('\n\n')
+    for position in range(0, len(blocks) - 1, step):
+        blocks[position] = re.sub(r'^D:', f'D:!pkg{position + 1} ', blocks[position], count=1, flags=re.M)
+    with open(path, 'w') as f:
+        f.write('\n\n'.join(blocks))
+
+def issue_values(issues):
+    return [(str(constraint), provider, kind) for constraint, provider, kind in issues]
+
+def build_snapshot(synthetic_graph, package_count):
+    """Парсер синтетического индекса и сериализованный снимок по нему"""
+    repository_graph = synthetic_graph(package_count, seed=7, edit=lambda path: add_conflicts(path, 7))
+    return repository_graph.apk_parser, pickle.dumps(IndexSnapshot.from_graph(repository_graph), pickle.HIGHEST_PROTOCOL)
+
+@pytest.fixture(scope='module')
+def parsed(synthetic_graph):
+    return build_snapshot(synthetic_graph, 1500)
+
+def test_snapshot_answers_like_parser(parsed, capsys):
+    apk_parser, data = parsed
+    snapshot = pickle.loads(data)
+    capsys.readouterr()
+    
+    issue_kinds = set()
+    for package in apk_parser.get_index():
+        assert snapshot.has_package(package)
+        assert snapshot.get_package_dependencies(package) == apk_parser.get_package_dependencies(package)
+        
+        issues = apk_parser.get_constraint_issues(package)
+        assert issue_values(snapshot.get_constraint_issues(package)) == issue_values(issues)
+        for constraint, _, kind in issues:
+            issue_kinds.add(kind)
+            if kind == 'version':
+                assert snapshot.get_provided_version(constraint.name) == apk_parser.get_provided_version(constraint.name)
+    
+    assert issue_kinds == {'version', 'conflict'}
+    assert not snapshot.has_package('no-such-package')
+
+@pytest.mark.parametrize('package', ['pkg0', 'pkg7', 'pkg700', 'pkg1499'])
+def test_graph_from_snapshot_matches_parser(parsed, package, capsys):
+    apk_parser, data = parsed
+    
+    graphs = []
+    for source in (apk_parser, pickle.loads(data)):
+        graph = DependencyGraph(source)
+        graph.build_dependency_graph(package)
+        graphs.append((
+            list(graph.iter_tree_lines(package)),
+            [(name, str(constraint), provider, kind)
+             for name, constraint, provider, kind in graph.get_constraint_problems(package)],
+            capsys.readouterr().out,
+        ))
+    assert graphs[0] == graphs[1]
+
+def loaded_blocks(data):
+    """Число блоков памяти, занятых загруженным снимком"""
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        snapshot = pickle.loads(data)
+        blocks = sys.getallocatedblocks() - before
+    finally:
+        gc.enable()
+    assert snapshot.has_package('pkg0')
+    return blocks
+
+def test_snapshot_load_does_not_grow_with_index(parsed, synthetic_graph, capsys):
+    _, data = parsed
+    _, small_data = build_snapshot(synthetic_graph, 100)
+    
+    # Загрузка снимка копирует блоки байт и массивы: объекты на каждый пакет
+    # не создаются, поэтому занятые блоки памяти не зависят от размера индекса
+    assert len(data) > 10 * len(small_data)
+    assert loaded_blocks(data) <= loaded_blocks(small_data) + 10
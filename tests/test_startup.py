@@ -0,0 +1,72 @@
+import statistics
+import subprocess
+import pytest
+from benchmark import import_times, run_times, startup_commands, startup_environment, stdlib_command
+from cache import IndexCache
+from repository import RepositoryManager
+from snapshot import load_snapshot
+from synthetic_repo import generate_apkindex
+
+# Модули разбора индекса, сети, архивов и запуска Graphviz: запрос по снимку не должен их загружать
+INDEX_MODULES = {
+    'apk_parser', 'apkindex', 'index_backends', 'index_diff',
+    'urllib.request', 'http.client', 'tarfile', 'concurrent.futures',
+    'subprocess', 'tempfile', 'shutil', 'pathlib',
+}
+# Допустимое время запуска запроса по снимку сверх импорта необходимых модулей
+# стандартной библиотеки (мс): импорт модулей приложения, загрузка снимка и ответ
+APP_STARTUP_BUDGET_MS = 30
+# Модули, не нужные конкретному виду запроса
+QUERY_MODULES = {
+    'json': {'dot_export', 'csv'},
+    'text': {'output', 'csv'},
+}
+
+@pytest.fixture(scope='module')
+def startup(tmp_path_factory):
+    tmp_dir = tmp_path_factory.mktemp('startup')
+    index_path = str(tmp_dir / 'APKINDEX')
+    generate_apkindex(index_path, 2000, seed=1)
+    
+    env = startup_environment(str(tmp_dir / 'pycache'))
+    commands = startup_commands(index_path, str(tmp_dir / 'cache'), str(tmp_dir / 'graph.dot'))
+    for command in commands.values():
+        # Первые запуски заполняют кэш индекса, снимка и байт-кода
+        run_times(command, 2, env)
+    return commands, env
+
+@pytest.mark.parametrize('kind', sorted(QUERY_MODULES))
+def test_snapshot_is_stored_only_on_request(tmp_path, kind):
+    index_path = str(tmp_path / 'APKINDEX')
+    generate_apkindex(index_path, 200, seed=2)
+    cache_dir = str(tmp_path / 'cache')
+    command = startup_commands(index_path, cache_dir, str(tmp_path / 'graph.dot'))[kind]
+    repository_manager = RepositoryManager(index_path, test_repo_mode=True, cache=IndexCache(cache_dir))
+    
+    # Запрос без --snapshot кэширует индекс, но не строит граф всего репозитория
+    subprocess.run([argument for argument in command if argument != '--snapshot'], capture_output=True, check=True)
+    assert repository_manager.cache.get_meta(repository_manager.cache_key(index_path)) is not None
+    assert load_snapshot(repository_manager) is None
+    
+    subprocess.run(command, capture_output=True, check=True)
+    assert load_snapshot(repository_manager) is not None
+
+@pytest.mark.parametrize('kind', sorted(QUERY_MODULES))
+def test_cached_lookup_skips_index_modules(startup, kind):
+    commands, env = startup
+    modules = {name for _, name, _ in import_times(commands[kind], env)}
+    
+    assert 'snapshot' in modules
+    assert not modules & (INDEX_MODULES | QUERY_MODULES[kind])
+
+@pytest.mark.parametrize('kind', sorted(QUERY_MODULES))
+def test_cached_lookup_startup_time(startup, kind):
+    commands, env = startup
+    stdlib_ms = statistics.median(run_times(stdlib_command(), 15, env)) * 1000
+    median_ms = statistics.median(run_times(commands[kind], 15, env)) * 1000
+    
+    # Абсолютная цель 50 мс на медленных машинах не достижима уже для запуска
+    # интерпретатора с argparse, json и pickle, поэтому проверяется доля приложения
+    assert median_ms - stdlib_ms <= APP_STARTUP_BUDGET_MS, \
+        f"медиана запуска {median_ms:.1f} мс, без приложения {stdlib_ms:.1f} мс: " \
+        f"доля приложения превышает {APP_STARTUP_BUDGET_MS} мс"
@@ -0,0 +1,82 @@
+import random
+import re
+import pytest
+
+DIAMOND = {'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': ['e'], 'e': []}
+CYCLE = {'a': ['b'], 'b': ['c'], 'c': ['a', 'd'], 'd': []}
+# Пакет c на глубине 1 встречается раньше на глубине 3 (через b и x)
+FORWARD = {'a': ['b', 'c'], 'b': ['x'], 'x': ['c'], 'c': ['y'], 'y': []}
+
+def tree(graph, root, max_depth=None):
+    return list(graph.iter_tree_lines(root, max_depth))
+
+def test_diamond_is_expanded_once(package_graph):
+    assert tree(package_graph(DIAMOND), 'a') == [
+        "└── a",
+        "    ├── b",
+        "    │   └── d",
+        "    │       └── e",
+        "    └── c",
+        "        └── d (см. выше)",
+    ]
+
+def test_cycle_is_marked(package_graph):
+    assert tree(package_graph(CYCLE), 'a') == [
+        "└── a",
+        "    └── b",
+        "        └── c",
+        "            ├── a (ЦИКЛ)",
+        "            └── d",
+    ]
+
+def test_max_depth(package_graph):
+    graph = package_graph(DIAMOND)
+    assert tree(graph, 'a', 0) == ["└── a (...)"]
+    assert tree(graph, 'a', 1) == ["└── a", "    ├── b (...)", "    └── c (...)"]
+    assert tree(graph, 'a', 2) == [
+        "└── a",
+        "    ├── b",
+        "    │   └── d (...)",
+        "    └── c",
+        "        └── d (...)",
+    ]
+
+def test_forward_reference(package_graph):
+    graph = package_graph(FORWARD)
+    assert tree(graph, 'a') == [
+        "└── a",
+        "    ├── b",
+        "    │   └── x",
+        "    │       └── c (см. ниже)",
+        "    └── c",
+        "        └── y",
+    ]
+    assert tree(graph, 'a', 2) == [
+        "└── a",
+        "    ├── b",
+        "    │   └── x (...)",
+        "    └── c",
+        "        └── y",
+    ]
+
+def random_graph(seed):
+    rng = random.Random(seed)
+    count = rng.randint(2, 12)
+    return {
+        f'p{node}': [f'p{target}' for target in rng.sample(range(count), rng.randint(0, min(3, count)))]
+        for node in range(count)
+    }
+
+@pytest.mark.parametrize('seed', range(40))
+def test_references_point_to_printed_subtrees(package_graph, seed):
+    graph = package_graph(random_graph(seed))
+    for max_depth in (None, 0, 1, 2, 3):
+        lines = tree(graph, 'p0', max_depth)
+        expanded = [re.fullmatch(r'[│├└─ ]*(\S+)', line) for line in lines]
+        for position, line in enumerate(lines):
+            reference = re.fullmatch(r'[│├└─ ]*(\S+) \((см\. выше|см\. ниже)\)', line)
+            if reference is None:
+                continue
+            name, direction = reference.groups()
+            scope = expanded[:position] if direction == 'см. выше' else expanded[position + 1:]
+            assert any(match is not None and match.group(1) == name for match in scope)